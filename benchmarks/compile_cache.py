@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measure the SQL compilation cost of the Athena dialect with and without
+the SQLAlchemy statement cache. No connection to Athena is needed.
+
+    $ python benchmarks/compile_cache.py
+"""
+import argparse
+import timeit
+from typing import Any, Callable, Optional
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, and_, bindparam, func
+from sqlalchemy.sql import select
+from sqlalchemy.util import LRUCache
+
+from pyathenajdbc.sqlalchemy_athena import AthenaDialect
+
+
+class _NoCacheAthenaDialect(AthenaDialect):
+    supports_statement_cache = False
+
+
+_TABLE = Table(
+    "many_rows",
+    MetaData(),
+    Column("a", Integer),
+    Column("b", String),
+    Column("c", String),
+    schema="test_pyathena_jdbc",
+)
+
+
+def _build_statement() -> Any:
+    # Statements are rebuilt on each call, as ORM and Core applications do.
+    return (
+        select(
+            _TABLE.c.a,
+            func.char_length(_TABLE.c.b).label("length"),
+            func.count().label("count"),
+        )
+        .where(
+            and_(
+                _TABLE.c.a > bindparam("a"),
+                _TABLE.c.b.like(bindparam("b")),
+                _TABLE.c.c.in_(["x", "y", "z"]),
+            )
+        )
+        .group_by(_TABLE.c.a, _TABLE.c.b)
+        .order_by(_TABLE.c.a)
+        .limit(10)
+    )
+
+
+def _compile(dialect: AthenaDialect, cache: Optional[LRUCache]) -> Callable[[], Any]:
+    def _run() -> Any:
+        # The same call the Connection makes before executing a statement.
+        return _build_statement()._compile_w_cache(
+            dialect, compiled_cache=cache, column_keys=[], for_executemany=False
+        )
+
+    return _run
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    build = min(timeit.repeat(_build_statement, number=args.number, repeat=args.repeat))
+    print(
+        "{0:<24} {1:8.2f} us/statement".format(
+            "statement construction", build / args.number * 1000000
+        )
+    )
+    results = []
+    for label, dialect in [
+        ("without statement cache", _NoCacheAthenaDialect()),
+        ("with statement cache", AthenaDialect()),
+    ]:
+        elapsed = min(
+            timeit.repeat(
+                _compile(dialect, LRUCache(500)),
+                number=args.number,
+                repeat=args.repeat,
+            )
+        )
+        results.append(elapsed)
+        print(
+            "{0:<24} {1:8.2f} us/statement".format(
+                label, elapsed / args.number * 1000000
+            )
+        )
+    print(
+        "reduction: {0:.1%} (compilation only: {1:.1%})".format(
+            1 - results[1] / results[0],
+            1 - (results[1] - build) / (results[0] - build),
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measure every converter of `DefaultJDBCTypeConverter` and every formatter of
+`DefaultParameterFormatter` on large synthetic inputs. The result set is simulated
+in Python, so no JVM or connection to Athena is needed.
+
+    $ python benchmarks/convert_format.py --baseline benchmarks/baselines/convert_format.json
+
+Converter cases report converted cells per second, and formatter cases report
+formatted queries per second. Each formatter case formats the query as many times
+as it takes `--min-time`.
+"""
+import argparse
+import random
+import string
+import sys
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+from harness import Case, add_arguments, autorange, run
+
+from pyathenajdbc.converter import _DEFAULT_JDBC_CONVERTERS
+from pyathenajdbc.formatter import _DEFAULT_FORMATTERS, DefaultParameterFormatter
+
+# Number of distinct values generated per input.
+_POOL_SIZE: int = 1024
+
+
+class _JavaObject(object):
+    """Stands in for the Java objects converted with `toString`."""
+
+    __slots__ = ("_value",)
+
+    def __init__(self, value: str) -> None:
+        self._value = value
+
+    def toString(self) -> str:
+        return self._value
+
+
+class _ResultSet(object):
+    """Returns the value of the current row from every getter of java.sql.ResultSet.
+
+    Every `null_interval`-th value is null."""
+
+    def __init__(self, values: List[Any], null: Any, null_interval: int) -> None:
+        self._values = values
+        self._null = null
+        self._null_interval = null_interval
+        self._row = 0
+        self._was_null = False
+
+    def next(self) -> None:
+        self._row = (self._row + 1) % len(self._values)
+
+    def getObject(self, index: int) -> Any:
+        if self._null_interval and self._row % self._null_interval == 0:
+            self._was_null = True
+            return self._null
+        self._was_null = False
+        return self._values[self._row]
+
+    getString = getLong = getDouble = getBoolean = getDate = getTimestamp = getObject
+    getArray = getObject
+
+    def wasNull(self) -> bool:
+        return self._was_null
+
+
+def _random_string(rnd: random.Random, length: int) -> str:
+    # Quotes, backslashes and control characters need escaping.
+    letters = string.ascii_letters + string.digits + "'\\\r\n\t "
+    return "".join(rnd.choice(letters) for _ in range(length))
+
+
+def _converter_inputs(rnd: random.Random) -> Dict[str, Any]:
+    """Values returned by the getter, and the null value, per converter function."""
+    start = date(2000, 1, 1)
+    return {
+        "_to_none": ([None] * _POOL_SIZE, None),
+        "_to_boolean": ([rnd.random() < 0.5 for _ in range(_POOL_SIZE)], False),
+        "_to_int": (
+            [rnd.randint(-(2**63), 2**63 - 1) for _ in range(_POOL_SIZE)],
+            0,
+        ),
+        "_to_float": ([rnd.random() * 10**6 for _ in range(_POOL_SIZE)], 0.0),
+        "_to_string": ([_random_string(rnd, 1024) for _ in range(_POOL_SIZE)], None),
+        "_to_date": (
+            [
+                _JavaObject(str(start + timedelta(days=rnd.randint(0, 20000))))
+                for _ in range(_POOL_SIZE)
+            ],
+            None,
+        ),
+        "_to_datetime": (
+            [
+                _JavaObject(
+                    str(
+                        datetime(2000, 1, 1)
+                        + timedelta(seconds=rnd.randint(0, 10**9), milliseconds=123)
+                    )[:23]
+                )
+                for _ in range(_POOL_SIZE)
+            ],
+            None,
+        ),
+        "_to_array_str": (
+            [
+                _JavaObject(str([rnd.randint(0, 1000) for _ in range(32)]))
+                for _ in range(_POOL_SIZE)
+            ],
+            None,
+        ),
+        "_to_decimal": (
+            ["{0:.18f}".format(rnd.random() * 10**18) for _ in range(_POOL_SIZE)],
+            None,
+        ),
+        "_to_binary": (
+            [
+                " ".join("{0:02x}".format(rnd.randint(0, 255)) for _ in range(256))
+                for _ in range(_POOL_SIZE)
+            ],
+            None,
+        ),
+    }
+
+
+def _converter_case(
+    name: str,
+    converter: Callable[[Any, int], Optional[Any]],
+    values: List[Any],
+    null: Any,
+    null_interval: int,
+    cells: int,
+) -> Case:
+    def setup() -> Callable[[], int]:
+        result_set = _ResultSet(values, null, null_interval)
+
+        def _run() -> int:
+            next_ = result_set.next
+            for _ in range(cells):
+                next_()
+                converter(result_set, 1)
+            return cells
+
+        return _run
+
+    return Case(name, setup)
+
+
+def converter_cases(cells: int) -> List[Case]:
+    inputs = _converter_inputs(random.Random(0))
+    functions: Dict[str, List[str]] = dict()
+    for type_name, converter in _DEFAULT_JDBC_CONVERTERS.items():
+        functions.setdefault(converter.__name__, []).append(type_name)
+    cases = []
+    for function_name in sorted(functions.keys()):
+        # The types sharing a converter share the case.
+        converter = _DEFAULT_JDBC_CONVERTERS[functions[function_name][0]]
+        values, null = inputs[function_name]
+        for label, null_interval in [("", 0), ("/nulls", 4)]:
+            cases.append(
+                _converter_case(
+                    "converter/{0}{1}".format(function_name, label),
+                    converter,
+                    values,
+                    null,
+                    null_interval,
+                    cells,
+                )
+            )
+    return cases
+
+
+def _formatter_inputs(rnd: random.Random) -> Dict[str, Dict[str, Any]]:
+    start = datetime(2000, 1, 1)
+    return {
+        "none": {"a": None},
+        "int": {"a": 2**62},
+        "float": {"a": 0.1234567},
+        "bool": {"a": True},
+        "decimal": {"a": Decimal("12345678901234567890.123456789")},
+        "date": {"a": date(2020, 1, 2)},
+        "datetime": {"a": datetime(2020, 1, 2, 3, 4, 5, 678000)},
+        "str": {"a": "a string"},
+        "str/long": {"a": _random_string(rnd, 65536)},
+        "list/int": {"a": list(range(10000))},
+        "list/str": {"a": [_random_string(rnd, 32) for _ in range(1000)]},
+        "list/decimal": {
+            "a": [Decimal(rnd.randint(0, 10**9)) / 1000 for _ in range(1000)]
+        },
+        "list/date": {
+            "a": [
+                (start + timedelta(seconds=rnd.randint(0, 10**9))).date()
+                for _ in range(1000)
+            ]
+        },
+        "list/datetime": {
+            "a": [
+                start + timedelta(seconds=rnd.randint(0, 10**9)) for _ in range(1000)
+            ]
+        },
+        "set/int": {"a": set(range(10000))},
+        "tuple/float": {"a": tuple(rnd.random() for _ in range(10000))},
+        "list/nested": {
+            "a": [(i, "x{0}".format(i), [i, i + 1]) for i in range(1000)],
+        },
+        "many": {"p{0}".format(i): i for i in range(1000)},
+    }
+
+
+def _operation(parameters: Dict[str, Any]) -> str:
+    return "SELECT * FROM t WHERE " + " AND ".join(
+        "c = %({0})s".format(k) for k in parameters.keys()
+    )
+
+
+def _formatter_case(
+    name: str, operation: str, parameters: Dict[str, Any], min_time: float
+) -> Case:
+    def setup() -> Callable[[], int]:
+        formatter = DefaultParameterFormatter()
+        number = autorange(lambda: formatter.format(operation, parameters), min_time)
+
+        def _run() -> int:
+            for _ in range(number):
+                formatter.format(operation, parameters)
+            return number
+
+        return _run
+
+    return Case(name, setup)
+
+
+def formatter_cases(min_time: float) -> List[Case]:
+    inputs = _formatter_inputs(random.Random(0))
+    # Every formatter mapping must have a case.
+    types = {type(v) for p in inputs.values() for v in p.values()}
+    missing = set(_DEFAULT_FORMATTERS.keys()) - types
+    assert not missing, "No formatter case for {0}".format(missing)
+    cases = []
+    for name, parameters in inputs.items():
+        operation = _operation(parameters)
+        # Select formats strings with the Presto escaper and others with the Hive one.
+        for label, prefix in [("select", ""), ("insert", "INSERT INTO u ")]:
+            if label == "insert" and not name.startswith("str"):
+                continue
+            cases.append(
+                _formatter_case(
+                    "formatter/{0}/{1}".format(label, name),
+                    prefix + operation,
+                    parameters,
+                    min_time,
+                )
+            )
+    return cases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cells", type=int, default=100000)
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.1,
+        help="Minimum duration of a run of a formatter case in seconds.",
+    )
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    cases = converter_cases(args.cells) + formatter_cases(args.min_time)
+    sys.exit(run("convert_format", cases, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measure the fetch throughput, execute overhead and multi-thread scaling of the
+cursor on the stub driver of `stub_driver.py`. No connection to Athena is needed,
+but a JVM is.
+
+    $ python benchmarks/fetch.py --baseline benchmarks/baselines/fetch.json
+
+`--mode java` (the default) exposes the result set through a `jpype.JProxy`, so
+every call crosses JNI. `--mode python` uses plain Python stubs to measure only
+the Python side of the fetch path. Case names are prefixed with the mode.
+"""
+import argparse
+import sys
+import threading
+from typing import Callable, List, Optional
+
+from harness import Case, add_arguments, run
+from stub_driver import ResultSetSpec, cursor, start_jvm, wide_columns
+
+from pyathenajdbc.util import as_pandas
+
+
+def _specs(rows: int) -> List[ResultSetSpec]:
+    return [
+        ResultSetSpec(rows, [("col_{0}".format(i), "BIGINT") for i in range(4)]),
+        ResultSetSpec(rows, wide_columns(26)),
+        ResultSetSpec(
+            rows // 10,
+            [("col_{0}".format(i), "VARCHAR") for i in range(4)],
+            string_length=4096,
+        ),
+        ResultSetSpec(rows, wide_columns(13), null_ratio=0.5),
+    ]
+
+
+_SPEC_NAMES: List[str] = ["narrow", "wide", "long_strings", "nulls"]
+
+
+def _fetch_case(
+    name: str, spec: ResultSetSpec, proxy: bool, fetch: Callable[..., int]
+) -> Case:
+    def setup() -> Callable[[], int]:
+        cur = cursor(spec, proxy=proxy)
+        # Generates the data of the spec outside of the measured runs.
+        cur.execute("SELECT * FROM stub")
+
+        def _run() -> int:
+            cur.execute("SELECT * FROM stub")
+            return fetch(cur)
+
+        return _run
+
+    return Case(name, setup)
+
+
+def _iterate(cur) -> int:
+    return sum(1 for _ in cur)
+
+
+def _fetchone(cur) -> int:
+    count = 0
+    while cur.fetchone() is not None:
+        count += 1
+    return count
+
+
+def _fetchmany(cur) -> int:
+    count = 0
+    rows = cur.fetchmany()
+    while rows:
+        count += len(rows)
+        rows = cur.fetchmany()
+    return count
+
+
+def _fetchall(cur) -> int:
+    return len(cur.fetchall())
+
+
+def _as_pandas(cur) -> int:
+    return len(as_pandas(cur))
+
+
+def _execute_case(
+    name: str, proxy: bool, number: int, parameters: Optional[dict]
+) -> Case:
+    def setup() -> Callable[[], int]:
+        cur = cursor(ResultSetSpec(0, [("col_0", "BIGINT")]), proxy=proxy)
+
+        def _run() -> int:
+            for _ in range(number):
+                if parameters is None:
+                    cur.execute("SELECT * FROM stub")
+                else:
+                    cur.execute(
+                        "SELECT * FROM stub WHERE a = %(a)s AND b IN %(b)s", parameters
+                    )
+            return number
+
+        return _run
+
+    return Case(name, setup)
+
+
+def _threads_case(name: str, spec: ResultSetSpec, proxy: bool, threads: int) -> Case:
+    def setup() -> Callable[[], int]:
+        cursors = [cursor(spec, proxy=proxy) for _ in range(threads)]
+        for cur in cursors:
+            cur.execute("SELECT * FROM stub")
+
+        def _run() -> int:
+            counts = [0] * threads
+
+            def _target(i: int) -> None:
+                cursors[i].execute("SELECT * FROM stub")
+                counts[i] = len(cursors[i].fetchall())
+
+            workers = [
+                threading.Thread(target=_target, args=(i,)) for i in range(threads)
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            return sum(counts)
+
+        return _run
+
+    return Case(name, setup)
+
+
+def cases(mode: str, rows: int) -> List[Case]:
+    proxy = mode == "java"
+    result: List[Case] = []
+    for spec_name, spec in zip(_SPEC_NAMES, _specs(rows)):
+        for fetch_name, fetch in [
+            ("iterate", _iterate),
+            ("fetchone", _fetchone),
+            ("fetchmany", _fetchmany),
+            ("fetchall", _fetchall),
+            ("as_pandas", _as_pandas),
+        ]:
+            result.append(
+                _fetch_case(
+                    "{0}/{1}/{2}".format(mode, fetch_name, spec_name),
+                    spec,
+                    proxy,
+                    fetch,
+                )
+            )
+    result.append(_execute_case("{0}/execute".format(mode), proxy, 1000, None))
+    result.append(
+        _execute_case(
+            "{0}/execute/parameters".format(mode),
+            proxy,
+            1000,
+            {"a": "it's a string", "b": list(range(100))},
+        )
+    )
+    for threads in [1, 2, 4, 8]:
+        result.append(
+            _threads_case(
+                "{0}/threads/{1}".format(mode, threads),
+                _specs(rows)[0],
+                proxy,
+                threads,
+            )
+        )
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["java", "python", "all"], default="java")
+    parser.add_argument("--rows", type=int, default=2000)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    start_jvm()
+    modes = ["java", "python"] if args.mode == "all" else [args.mode]
+    all_cases = [c for mode in modes for c in cases(mode, args.rows)]
+    sys.exit(run("fetch", all_cases, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""Run benchmark cases, and save or compare their results against a baseline.
+
+A case returns the number of operations (e.g. rows) it ran. The best of
+`--repeat` runs is reported in operations per second. With `--baseline`, a case
+slower than the baseline by more than `--threshold` is a regression and the
+process exits with status 1. Baselines are only comparable on the same machine.
+
+With `--results-dir`, the results are also stored per commit as
+`<suite>-<commit>.json` (with a `-dirty` suffix for uncommitted changes), and
+`--baseline-commit <revision>` compares against the results stored for a commit.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+_DEFAULT_THRESHOLD: float = 0.2
+
+
+class Case(NamedTuple):
+    name: str
+    # Called once before the runs, returns the function that runs the case.
+    setup: Callable[[], Callable[[], int]]
+
+
+def measure(run: Callable[[], int], repeat: int) -> float:
+    """Returns the best operations per second of `repeat` runs, after a warm-up run."""
+    run()
+    best = 0.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ops = run()
+        elapsed = time.perf_counter() - start
+        best = max(best, ops / elapsed if elapsed else 0.0)
+    return best
+
+
+def autorange(func: Callable[[], Any], min_time: float) -> int:
+    """Returns the number of calls of `func` that take at least `min_time` seconds."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_time:
+            return number
+        number *= 2
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return (
+            subprocess.check_output(
+                ["git"] + list(args),
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                stderr=subprocess.DEVNULL,
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _git_commit(revision: str = "HEAD") -> Optional[str]:
+    return _git("rev-parse", "--verify", "{0}^{{commit}}".format(revision))
+
+
+def _git_dirty() -> bool:
+    return bool(_git("status", "--porcelain", "--untracked-files=no"))
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "commit": _git_commit(),
+        "dirty": _git_dirty(),
+    }
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path, "r") as f:
+        baseline: Dict[str, Any] = json.load(f)
+    return baseline
+
+
+def save_baseline(path: str, results: Dict[str, float], **metadata: Any) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    baseline = {"environment": environment(), "results": results}
+    baseline.update(metadata)
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def results_path(
+    results_dir: str, suite: str, revision: str = "HEAD", dirty: bool = False
+) -> str:
+    commit = _git_commit(revision)
+    if commit is None:
+        raise ValueError("Unknown revision: {0}".format(revision))
+    name = "{0}-{1}{2}".format(suite, commit, "-dirty" if dirty else "")
+    return os.path.join(results_dir, name + ".json")
+
+
+def compare(
+    results: Dict[str, float], baseline: Dict[str, float], threshold: float
+) -> List[Tuple[str, float]]:
+    """Returns the `(name, change)` of the cases slower than the baseline by
+    more than `threshold`, as a ratio."""
+    regressions = []
+    for name, ops in results.items():
+        expected = baseline.get(name, None)
+        if not expected:
+            continue
+        change = ops / expected - 1
+        if change < -threshold:
+            regressions.append((name, change))
+    return regressions
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--filter", default=None, help="Only run the cases containing this string."
+    )
+    parser.add_argument(
+        "--baseline", default=None, help="Compare against this baseline file."
+    )
+    parser.add_argument(
+        "--save-baseline", default=None, help="Save the results to this baseline file."
+    )
+    parser.add_argument(
+        "--results-dir", default=None, help="Store the results per commit here."
+    )
+    parser.add_argument(
+        "--baseline-commit",
+        default=None,
+        help="Compare against the results stored in --results-dir for this revision.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=_DEFAULT_THRESHOLD,
+        help="Slowdown flagged as a regression (default: %(default)s).",
+    )
+
+
+def run(
+    suite: str, cases: Sequence[Case], args: argparse.Namespace, unit: str = "ops"
+) -> int:
+    """Runs the cases and returns the exit status."""
+    baseline: Dict[str, float] = dict()
+    if args.baseline:
+        baseline = load_baseline(args.baseline)["results"]
+    elif args.baseline_commit:
+        if not args.results_dir:
+            raise ValueError("--baseline-commit requires --results-dir.")
+        baseline = load_baseline(
+            results_path(args.results_dir, suite, args.baseline_commit)
+        )["results"]
+    results: Dict[str, float] = dict()
+    for case in cases:
+        if args.filter and args.filter not in case.name:
+            continue
+        ops = measure(case.setup(), args.repeat)
+        results[case.name] = ops
+        expected = baseline.get(case.name, None)
+        change = "{0:+8.1%}".format(ops / expected - 1) if expected else ""
+        # Slow cases, e.g. of process startup, keep two decimals.
+        value = "{0:14,.0f}".format(ops) if ops >= 100 else "{0:14,.2f}".format(ops)
+        print("{0:<40} {1} {2}/s {3}".format(case.name, value, unit, change))
+        sys.stdout.flush()
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results, repeat=args.repeat)
+    if args.results_dir:
+        save_baseline(
+            results_path(args.results_dir, suite, dirty=_git_dirty()),
+            results,
+            repeat=args.repeat,
+        )
+    regressions = compare(results, baseline, args.threshold)
+    for name, change in regressions:
+        print(
+            "REGRESSION {0}: {1:+.1%} (threshold {2:.0%})".format(
+                name, change, args.threshold
+            )
+        )
+    return 1 if regressions else 0
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Compare the startup time and the fetch throughput of the HTTP backend with the
+JDBC path. The HTTP backend runs against the stub Athena API of `stub_athena.py`,
+served over the loopback by another process. The JDBC path runs on the stub
+driver of `stub_driver.py` with `jpype.JProxy` result sets, as `fetch.py --mode java`.
+
+    $ python benchmarks/http_backend.py --baseline benchmarks/baselines/http_backend.json
+
+The `startup/*` cases run a fresh interpreter that connects, executes a query
+and fetches its single row, and are reported in starts per second. Without the
+Athena JDBC driver jar, `startup/jdbc` only starts the JVM and does not load the
+driver, so it is a lower bound of the startup time of the JDBC path. The other
+cases are reported in rows (or executes) per second. Numbers of the two backends
+are not equivalent: the HTTP cases include the loopback round trips and the JSON
+parsing, while the stub driver has no network at all.
+"""
+import argparse
+import atexit
+import os
+import subprocess
+import sys
+from typing import Callable, List
+
+from fetch import _SPEC_NAMES, _fetchall, _iterate, _specs
+from harness import Case, add_arguments, run
+from stub_athena import start_server
+
+from pyathenajdbc import connect
+
+_BENCHMARKS_DIR: str = os.path.dirname(os.path.abspath(__file__))
+
+_STARTUP_HTTP: str = """
+import sys
+from pyathenajdbc import connect
+conn = connect(backend="http", AwsRegion="us-west-2", EndpointOverride=sys.argv[1],
+               User="AKID", Password="secret")
+cursor = conn.cursor()
+cursor.execute("SELECT * FROM one_row")
+assert len(cursor.fetchall()) == 1
+"""
+
+_STARTUP_JDBC: str = """
+import sys
+sys.path.insert(0, sys.argv[2])
+from stub_driver import ResultSetSpec, cursor
+cursor = cursor(ResultSetSpec(1, [("a", "BIGINT")]), proxy=True)
+cursor.execute("SELECT * FROM one_row")
+assert len(cursor.fetchall()) == 1
+"""
+
+# The specs compared, as the others only change the cost of the conversion.
+_COMPARED_SPECS: List[str] = ["narrow", "wide"]
+
+
+def _startup_case(name: str, script: str, endpoint: str) -> Case:
+    def setup() -> Callable[[], int]:
+        def _run() -> int:
+            subprocess.check_call(
+                [sys.executable, "-c", script, endpoint, _BENCHMARKS_DIR]
+            )
+            return 1
+
+        return _run
+
+    return Case(name, setup)
+
+
+def _connect(endpoint: str):
+    return connect(
+        backend="http",
+        AwsRegion="us-west-2",
+        EndpointOverride=endpoint,
+        User="AKID",
+        Password="secret",
+    )
+
+
+def _http_case(name: str, endpoint: str, sql: str, fetch: Callable[..., int]) -> Case:
+    def setup() -> Callable[[], int]:
+        cur = _connect(endpoint).cursor()
+
+        def _run() -> int:
+            cur.execute(sql)
+            return fetch(cur)
+
+        return _run
+
+    return Case(name, setup)
+
+
+def _jdbc_case(name: str, spec, fetch: Callable[..., int]) -> Case:
+    def setup() -> Callable[[], int]:
+        from stub_driver import cursor
+
+        cur = cursor(spec, proxy=True)
+        cur.execute("SELECT * FROM stub")
+
+        def _run() -> int:
+            cur.execute("SELECT * FROM stub")
+            return fetch(cur)
+
+        return _run
+
+    return Case(name, setup)
+
+
+def _execute(count: int) -> Callable[..., int]:
+    def _run(cur) -> int:
+        cur.fetchall()
+        for _ in range(count - 1):
+            cur.execute("SELECT * FROM one_row")
+            cur.fetchall()
+        return count
+
+    return _run
+
+
+def cases(backend: str, endpoint: str, rows: int) -> List[Case]:
+    from stub_driver import ResultSetSpec
+
+    result: List[Case] = []
+    if backend in ("http", "all"):
+        result.append(_startup_case("startup/http", _STARTUP_HTTP, endpoint))
+    if backend in ("jdbc", "all"):
+        result.append(_startup_case("startup/jdbc", _STARTUP_JDBC, endpoint))
+    specs = dict(zip(_SPEC_NAMES, _specs(rows)))
+    for spec_name in _COMPARED_SPECS:
+        for fetch_name, fetch in [("iterate", _iterate), ("fetchall", _fetchall)]:
+            if backend in ("http", "all"):
+                result.append(
+                    _http_case(
+                        "http/{0}/{1}".format(fetch_name, spec_name),
+                        endpoint,
+                        "SELECT * FROM {0}".format(spec_name),
+                        fetch,
+                    )
+                )
+            if backend in ("jdbc", "all"):
+                result.append(
+                    _jdbc_case(
+                        "jdbc/{0}/{1}".format(fetch_name, spec_name),
+                        specs[spec_name],
+                        fetch,
+                    )
+                )
+    if backend in ("http", "all"):
+        result.append(
+            _http_case("http/execute", endpoint, "SELECT * FROM one_row", _execute(20))
+        )
+    if backend in ("jdbc", "all"):
+        result.append(
+            _jdbc_case(
+                "jdbc/execute", ResultSetSpec(1, [("a", "BIGINT")]), _execute(20)
+            )
+        )
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["http", "jdbc", "all"], default="all")
+    parser.add_argument("--rows", type=int, default=2000)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server, endpoint = start_server(["--rows", str(args.rows)])
+    atexit.register(server.kill)
+    sys.exit(run("http_backend", cases(args.backend, endpoint, args.rows), args))
+
+
+if __name__ == "__main__":
+    main()
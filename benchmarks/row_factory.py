@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measure the throughput and memory of the row factories against the per-cell
+`convert` dispatch that built every row before. The result set is simulated in
+Python, so no JVM or connection to Athena is needed. The simulated cells are
+shared between rows, so the memory column is the size of the row container.
+
+    $ python benchmarks/row_factory.py
+"""
+import argparse
+import gc
+import timeit
+import tracemalloc
+from typing import Any, Callable, List, Optional, Tuple
+
+from pyathenajdbc.converter import _DEFAULT_JDBC_CONVERTERS, _to_default
+from pyathenajdbc.row import compile_row_builder, dict_row, named_row
+
+_COLUMNS: List[Tuple[str, str, Any]] = [
+    ("id", "BIGINT", 1234567),
+    ("name", "VARCHAR", "a string"),
+    ("price", "DOUBLE", 1.5),
+    ("quantity", "INTEGER", 10),
+    ("flag", "BOOLEAN", True),
+    ("category", "VARCHAR", "category"),
+    ("score", "DOUBLE", 0.25),
+    ("total", "BIGINT", 100),
+]
+
+
+class _ResultSet(object):
+    """Returns the same values for every row, like the getters of java.sql.ResultSet."""
+
+    def __init__(self) -> None:
+        self._values = [None] + [v for _, _, v in _COLUMNS]
+
+    def getLong(self, index: int) -> Any:
+        return self._values[index]
+
+    getString = getDouble = getBoolean = getObject = getLong
+
+    def wasNull(self) -> bool:
+        return False
+
+
+def _baseline() -> Callable[[Any], Tuple[Any, ...]]:
+    # Cursor._fetch before the row factories: a list per row and a mapping
+    # lookup per cell.
+    mappings = dict(_DEFAULT_JDBC_CONVERTERS)
+    column_types = [t for _, t, _ in _COLUMNS]
+
+    def convert(type_code: Any, result_set: Any, index: int) -> Optional[Any]:
+        return mappings.get(type_code, _to_default)(result_set, index)
+
+    def build(result_set: Any) -> Tuple[Any, ...]:
+        return tuple(
+            [
+                convert(column_types[i], result_set, i + 1)
+                for i in range(len(column_types))
+            ]
+        )
+
+    return build
+
+
+def _compiled(factory: Optional[Any]) -> Callable[[Any], Any]:
+    names = [n for n, _, _ in _COLUMNS]
+    return compile_row_builder(
+        [_DEFAULT_JDBC_CONVERTERS[t] for _, t, _ in _COLUMNS],
+        list(range(1, len(_COLUMNS) + 1)),
+        factory(names) if factory else None,
+    )
+
+
+def _measure_memory(build: Callable[[Any], Any], rows: int) -> int:
+    result_set = _ResultSet()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        retained = [build(result_set) for _ in range(rows)]
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del retained
+    return current
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    result_set = _ResultSet()
+    baseline = None
+    print(
+        "{0} rows x {1} columns, best of {2}".format(
+            args.rows, len(_COLUMNS), args.repeat
+        )
+    )
+    for label, build in [
+        ("tuple (before)", _baseline()),
+        ("tuple_row", _compiled(None)),
+        ("named_row", _compiled(named_row)),
+        ("dict_row", _compiled(dict_row)),
+    ]:
+        elapsed = min(
+            timeit.repeat(
+                lambda: build(result_set), number=args.rows, repeat=args.repeat
+            )
+        )
+        memory = _measure_memory(build, args.rows)
+        if baseline is None:
+            baseline = elapsed
+        print(
+            "{0:<16} {1:10.0f} rows/s ({2:+.1%}) {3:8.1f} bytes/row".format(
+                label,
+                args.rows / elapsed,
+                baseline / elapsed - 1,
+                memory / args.rows,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""A stub of the Athena HTTP API that returns synthetic result sets.
+
+It implements StartQueryExecution, GetQueryExecution, GetQueryResults and
+StopQueryExecution for the HTTP backend. Queries succeed at once, and
+`SELECT * FROM <name>` returns the result set of the spec registered as `name`,
+generated as by `stub_driver.py`. Pages are encoded once and cached, so that
+the server takes little of the measured time. Run it in its own process with
+`start_server`, so that it does not share the GIL with the client.
+
+    $ python benchmarks/stub_athena.py --rows 2000
+"""
+import argparse
+import json
+import socketserver
+import subprocess
+import sys
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from stub_driver import _POOL_SIZE, ResultSetSpec, _Data
+
+# Athena type names of the java.sql.Types names of the stub driver.
+_ATHENA_TYPES: Dict[str, str] = {
+    "BOOLEAN": "boolean",
+    "TINYINT": "tinyint",
+    "SMALLINT": "smallint",
+    "INTEGER": "integer",
+    "BIGINT": "bigint",
+    "REAL": "float",
+    "DOUBLE": "double",
+    "CHAR": "char",
+    "VARCHAR": "varchar",
+    "DECIMAL": "decimal",
+    "VARBINARY": "varbinary",
+    "DATE": "date",
+    "TIMESTAMP": "timestamp",
+}
+
+
+def _to_string(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if hasattr(value, "toString"):
+        return str(value.toString())
+    return str(value)
+
+
+class _Table(object):
+    def __init__(self, spec: ResultSetSpec) -> None:
+        data = _Data(spec, proxy=False)
+        self.rows = spec.rows
+        self.columns = [
+            {
+                "Name": name,
+                "Label": name,
+                "Type": _ATHENA_TYPES[type_],
+                "Precision": spec.string_length,
+                "Scale": 0,
+                "Nullable": "UNKNOWN",
+            }
+            for name, type_ in spec.columns
+        ]
+        header = {"Data": [{"VarCharValue": name} for name in data.names]}
+        self.pool: List[Dict[str, Any]] = [
+            {
+                "Data": [
+                    {}
+                    if data.nulls[c][i]
+                    else {"VarCharValue": _to_string(data.pools[c][i])}
+                    for c in range(len(data.names))
+                ]
+            }
+            for i in range(_POOL_SIZE)
+        ]
+        # The first row of a SELECT query holds the column names.
+        self.header = header
+
+    def page(self, start: int, max_results: int) -> Dict[str, Any]:
+        rows = []
+        end = min(start + max_results, self.rows + 1)
+        for i in range(start, end):
+            rows.append(self.header if i == 0 else self.pool[(i - 1) % _POOL_SIZE])
+        page: Dict[str, Any] = {
+            "ResultSet": {
+                "Rows": rows,
+                "ResultSetMetadata": {"ColumnInfo": self.columns},
+            }
+        }
+        if end < self.rows + 1:
+            page["NextToken"] = str(end)
+        return page
+
+
+class StubAthenaServer(socketserver.ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+
+    def __init__(self, specs: Dict[str, ResultSetSpec], port: int = 0) -> None:
+        super(StubAthenaServer, self).__init__(("127.0.0.1", port), _Handler)
+        self.tables = {
+            "SELECT * FROM {0}".format(name): _Table(spec)
+            for name, spec in specs.items()
+        }
+        self.queries: Dict[str, str] = dict()
+        self.pages: Dict[Tuple[str, int, int], bytes] = dict()
+        self.lock = threading.Lock()
+
+    def call(self, operation: str, request: Dict[str, Any]) -> bytes:
+        if operation == "StartQueryExecution":
+            query_id = str(uuid.uuid4())
+            with self.lock:
+                self.queries[query_id] = request["QueryString"]
+            return json.dumps({"QueryExecutionId": query_id}).encode("utf-8")
+        query_id = request["QueryExecutionId"]
+        sql = self.queries[query_id]
+        if operation == "GetQueryExecution":
+            return json.dumps(
+                {
+                    "QueryExecution": {
+                        "QueryExecutionId": query_id,
+                        "StatementType": "DML",
+                        "Status": {"State": "SUCCEEDED"},
+                    }
+                }
+            ).encode("utf-8")
+        elif operation == "GetQueryResults":
+            key = (sql, int(request.get("NextToken") or 0), request["MaxResults"])
+            page = self.pages.get(key, None)
+            if page is None:
+                page = json.dumps(self.tables[sql].page(key[1], key[2])).encode("utf-8")
+                with self.lock:
+                    self.pages[key] = page
+            return page
+        elif operation == "StopQueryExecution":
+            return b"{}"
+        raise ValueError("Unsupported operation: {0}".format(operation))
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    # The headers and the body are written separately, which the Nagle algorithm
+    # would delay until the client acknowledges the headers.
+    disable_nagle_algorithm = True
+    server: StubAthenaServer
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        operation = self.headers["X-Amz-Target"].split(".")[-1]
+        data = self.server.call(operation, json.loads(body))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-amz-json-1.1")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def start_server(args: Optional[List[str]] = None) -> Tuple[subprocess.Popen, str]:
+    """Starts the server in a child process and returns it with its endpoint."""
+    process = subprocess.Popen(
+        [sys.executable, __file__] + (args if args else []),
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    port = process.stdout.readline().strip() if process.stdout else ""
+    if not port:
+        process.kill()
+        raise RuntimeError("Stub server failed to start.")
+    return process, "http://127.0.0.1:{0}".format(port)
+
+
+def main() -> None:
+    from fetch import _SPEC_NAMES, _specs
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=0)
+    args = parser.parse_args()
+
+    specs = dict(zip(_SPEC_NAMES, _specs(args.rows)))
+    specs["one_row"] = ResultSetSpec(1, [("a", "BIGINT")])
+    server = StubAthenaServer(specs, args.port)
+    print(server.server_port)
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""An in-process JDBC driver stub that returns synthetic result sets.
+
+The stub implements the parts of `java.sql.Connection`, `Statement`, `ResultSet`
+and `ResultSetMetaData` that `pyathenajdbc.cursor.Cursor` uses. With `proxy=True`
+the result set is exposed to Python as a `java.sql.ResultSet` through
+`jpype.JProxy` and the metadata is a `javax.sql.rowset.RowSetMetaDataImpl`, so
+every call of the fetch path crosses JNI as with the real driver. Since each call
+into the proxy also calls back into Python, absolute numbers are lower than with
+the real driver; compare them against baselines of the same mode. Otherwise the
+stubs are plain Python objects and only the Python side of the fetch path is
+measured. The connection and the statement are always plain Python objects.
+
+A JVM is required in both modes, since the cursor attaches threads to it.
+"""
+import random
+import string
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import jpype
+
+from pyathenajdbc.connection import Connection
+from pyathenajdbc.converter import DefaultJDBCTypeConverter
+from pyathenajdbc.cursor import Cursor
+from pyathenajdbc.formatter import DefaultParameterFormatter
+
+# Size of the pool of distinct values generated per column.
+_POOL_SIZE: int = 1024
+
+_GETTERS: Dict[str, str] = {
+    "BOOLEAN": "getBoolean",
+    "TINYINT": "getLong",
+    "SMALLINT": "getLong",
+    "INTEGER": "getLong",
+    "BIGINT": "getLong",
+    "REAL": "getDouble",
+    "DOUBLE": "getDouble",
+    "CHAR": "getString",
+    "VARCHAR": "getString",
+    "DECIMAL": "getString",
+    "VARBINARY": "getString",
+    "DATE": "getDate",
+    "TIMESTAMP": "getTimestamp",
+}
+
+_NULLS: Dict[str, Any] = {
+    "getBoolean": False,
+    "getLong": 0,
+    "getDouble": 0.0,
+    "getString": None,
+    "getDate": None,
+    "getTimestamp": None,
+}
+
+
+class ResultSetSpec(NamedTuple):
+    rows: int
+    columns: Sequence[Tuple[str, str]]
+    null_ratio: float = 0.0
+    string_length: int = 16
+    seed: int = 0
+
+
+def wide_columns(count: int) -> List[Tuple[str, str]]:
+    """Columns cycling through every supported type."""
+    types = list(_GETTERS.keys())
+    return [("col_{0}".format(i), types[i % len(types)]) for i in range(count)]
+
+
+class _JavaString(object):
+    """Stands in for java.sql.Date and Timestamp in the Python mode."""
+
+    __slots__ = ("_value",)
+
+    def __init__(self, value: str) -> None:
+        self._value = value
+
+    def toString(self) -> str:
+        return self._value
+
+
+def _generate(
+    type_name: str, spec: ResultSetSpec, rnd: random.Random, proxy: bool
+) -> List[Any]:
+    if type_name == "BOOLEAN":
+        return [rnd.random() < 0.5 for _ in range(_POOL_SIZE)]
+    if type_name in ("TINYINT", "SMALLINT", "INTEGER", "BIGINT"):
+        return [rnd.randint(0, 2**31 - 1) for _ in range(_POOL_SIZE)]
+    if type_name in ("REAL", "DOUBLE"):
+        return [rnd.random() * 1000000 for _ in range(_POOL_SIZE)]
+    if type_name in ("CHAR", "VARCHAR"):
+        letters = string.ascii_letters + string.digits + "'%"
+        return [
+            "".join(rnd.choice(letters) for _ in range(spec.string_length))
+            for _ in range(_POOL_SIZE)
+        ]
+    if type_name == "DECIMAL":
+        return ["{0:.4f}".format(rnd.random() * 1000000) for _ in range(_POOL_SIZE)]
+    if type_name == "VARBINARY":
+        return [
+            " ".join("{0:02x}".format(rnd.randint(0, 255)) for _ in range(8))
+            for _ in range(_POOL_SIZE)
+        ]
+    if type_name == "DATE":
+        values = [
+            str(date(2000, 1, 1) + timedelta(days=rnd.randint(0, 10000)))
+            for _ in range(_POOL_SIZE)
+        ]
+        if proxy:
+            return [jpype.java.sql.Date.valueOf(v) for v in values]
+        return [_JavaString(v) for v in values]
+    if type_name == "TIMESTAMP":
+        values = [
+            str(
+                datetime(2000, 1, 1)
+                + timedelta(seconds=rnd.randint(0, 10**9), milliseconds=123)
+            )[:23]
+            for _ in range(_POOL_SIZE)
+        ]
+        if proxy:
+            return [jpype.java.sql.Timestamp.valueOf(v) for v in values]
+        return [_JavaString(v) for v in values]
+    raise ValueError("Unsupported type: {0}".format(type_name))
+
+
+class _Data(object):
+    """Pools of column values and the null mask, shared by the result sets of a spec."""
+
+    def __init__(self, spec: ResultSetSpec, proxy: bool) -> None:
+        rnd = random.Random(spec.seed)
+        types = DefaultJDBCTypeConverter()
+        self.spec = spec
+        self.names = [name for name, _ in spec.columns]
+        self.type_codes = [types.get_jdbc_type_code(t) for _, t in spec.columns]
+        self.getters = [_GETTERS[t] for _, t in spec.columns]
+        self.pools = [_generate(t, spec, rnd, proxy) for _, t in spec.columns]
+        self.nulls = [
+            [rnd.random() < spec.null_ratio for _ in range(_POOL_SIZE)]
+            for _ in spec.columns
+        ]
+
+
+class _StubMetaData(object):
+    def __init__(self, data: _Data) -> None:
+        self._data = data
+
+    def getColumnCount(self) -> int:
+        return len(self._data.names)
+
+    def getColumnName(self, column: int) -> str:
+        return self._data.names[column - 1]
+
+    def getColumnType(self, column: int) -> int:
+        return int(self._data.type_codes[column - 1])
+
+    def getColumnDisplaySize(self, column: int) -> int:
+        return self._data.spec.string_length
+
+    def getPrecision(self, column: int) -> int:
+        return 38
+
+    def getScale(self, column: int) -> int:
+        return 4
+
+    def isNullable(self, column: int) -> int:
+        return 1
+
+
+def _java_meta_data(data: _Data) -> Any:
+    meta_data = jpype.JClass("javax.sql.rowset.RowSetMetaDataImpl")()
+    python = _StubMetaData(data)
+    meta_data.setColumnCount(python.getColumnCount())
+    for i in range(1, python.getColumnCount() + 1):
+        meta_data.setColumnName(i, python.getColumnName(i))
+        meta_data.setColumnType(i, python.getColumnType(i))
+        meta_data.setColumnDisplaySize(i, python.getColumnDisplaySize(i))
+        meta_data.setPrecision(i, python.getPrecision(i))
+        meta_data.setScale(i, python.getScale(i))
+        meta_data.setNullable(i, python.isNullable(i))
+    return meta_data
+
+
+class _StubResultSet(object):
+    def __init__(self, data: _Data, java: bool, max_rows: int = 0) -> None:
+        self._data = data
+        self._java = java
+        self._rows = min(data.spec.rows, max_rows) if max_rows else data.spec.rows
+        self._row = -1
+        self._was_null = False
+        self._closed = False
+        # Each getter of the result set returns the current value of the column.
+        for getter in set(data.getters):
+            setattr(self, getter, self._make_getter(_NULLS[getter]))
+
+    def _make_getter(self, null: Any) -> Callable[[int], Any]:
+        pools, nulls = self._data.pools, self._data.nulls
+
+        def _get(column: int) -> Any:
+            position = self._row % _POOL_SIZE
+            if nulls[column - 1][position]:
+                self._was_null = True
+                return null
+            self._was_null = False
+            return pools[column - 1][position]
+
+        return _get
+
+    def next(self) -> bool:
+        self._row += 1
+        return self._row < self._rows
+
+    def wasNull(self) -> bool:
+        return self._was_null
+
+    def getObject(self, column: int) -> Any:
+        return getattr(self, self._data.getters[column - 1])(column)
+
+    def setFetchSize(self, rows: int) -> None:
+        pass
+
+    def getMetaData(self) -> Any:
+        if self._java:
+            return _java_meta_data(self._data)
+        return _StubMetaData(self._data)
+
+    def isClosed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        self._closed = True
+
+
+class _StubStatement(object):
+    def __init__(self, connection: "StubConnection") -> None:
+        self._connection = connection
+        self._result_set: Optional[Any] = None
+        self._max_rows = 0
+        self._closed = False
+
+    def setMaxRows(self, max_rows: int) -> None:
+        self._max_rows = max_rows
+
+    def setQueryTimeout(self, seconds: int) -> None:
+        pass
+
+    def execute(self, sql: str) -> bool:
+        data = self._connection.get_data(sql)
+        if data is None:
+            self._result_set = None
+            return False
+        self._result_set = self._connection.wrap_result_set(data, self._max_rows)
+        return True
+
+    def getResultSet(self) -> Any:
+        return self._result_set
+
+    def getUpdateCount(self) -> int:
+        return -1 if self._result_set is not None else 0
+
+    def cancel(self) -> None:
+        pass
+
+    def isClosed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        self._closed = True
+
+
+class StubConnection(object):
+    """Returns the result set of `spec` for every query, or of `specs[query]`.
+
+    Queries mapped to `None` have no result set."""
+
+    def __init__(
+        self,
+        spec: Optional[ResultSetSpec],
+        specs: Optional[Dict[str, Optional[ResultSetSpec]]] = None,
+        proxy: bool = True,
+    ) -> None:
+        self._proxy = proxy
+        self._data: Dict[str, Optional[_Data]] = dict()
+        self._spec = spec
+        self._specs = specs if specs else dict()
+
+    def wrap_result_set(self, data: _Data, max_rows: int = 0) -> Any:
+        result_set = _StubResultSet(data, self._proxy, max_rows)
+        if not self._proxy:
+            return result_set
+        # Returned straight to Python, so the cast proxy keeps its Java methods.
+        return jpype.JObject(
+            jpype.JProxy("java.sql.ResultSet", inst=result_set), "java.sql.ResultSet"
+        )
+
+    def get_data(self, sql: str) -> Optional[_Data]:
+        spec = self._specs.get(sql, self._spec)
+        if spec is None:
+            return None
+        key = repr(spec)
+        if key not in self._data:
+            self._data[key] = _Data(spec, self._proxy)
+        return self._data[key]
+
+    def createStatement(self) -> Any:
+        return _StubStatement(self)
+
+
+def start_jvm() -> None:
+    Connection._start_jvm(None, None, None, None)
+
+
+def cursor(
+    spec: Optional[ResultSetSpec],
+    specs: Optional[Dict[str, Optional[ResultSetSpec]]] = None,
+    proxy: bool = True,
+    **kwargs: Any
+) -> Cursor:
+    """Returns a cursor of the default converter and formatter on a stub connection."""
+    start_jvm()
+    return Cursor(
+        StubConnection(spec, specs, proxy),
+        DefaultJDBCTypeConverter(),
+        DefaultParameterFormatter(),
+        **kwargs
+    )
@@ -1,11 +1,17 @@
 # -*- coding: utf-8 -*-
 import datetime
-from typing import TYPE_CHECKING, FrozenSet, Type
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Any, FrozenSet, Optional, Type, Union
 
 from pyathenajdbc.error import *  # noqa
 
 if TYPE_CHECKING:
     from pyathenajdbc.connection import Connection
+    from pyathenajdbc.http_backend import HTTPConnection
+    from pyathenajdbc.jvm import JVMStats
+    from pyathenajdbc.sidecar import SidecarConnection
 
 __version__: str = "3.0.1"
 __athena_driver_version__: str = "2.0.16.1000"
@@ -23,6 +29,7 @@ ATHENA_DRIVER_DOWNLOAD_URL: str = (
 ATHENA_DRIVER_CLASS_NAME: str = "com.simba.athena.jdbc.Driver"
 ATHENA_CONNECTION_STRING: str = "jdbc:awsathena://AwsRegion={region};"
 LOG4J_PROPERTIES: str = "log4j.properties"
+ENV_PREWARM: str = "PYATHENAJDBC_PREWARM"
 
 
 class DBAPITypeObject(FrozenSet[str]):
@@ -82,7 +89,70 @@ Time: Type[datetime.time] = datetime.time
 Timestamp: Type[datetime.datetime] = datetime.datetime
 
 
-def connect(*args, **kwargs) -> "Connection":
+def connect(
+    *args, **kwargs
+) -> Union["Connection", "SidecarConnection", "HTTPConnection"]:
+    """Connects with the JDBC driver, or with `backend="http"` through the Athena
+    HTTP API without a JVM (see `pyathenajdbc.http_backend`)."""
+    backend = kwargs.pop("backend", "jdbc")
+    if backend not in ("jdbc", "http"):
+        raise NotSupportedError("Unknown backend: {0}".format(backend))  # noqa
+    sidecar = kwargs.pop("sidecar", None)
+    if sidecar:
+        if backend == "http":
+            raise NotSupportedError(  # noqa
+                "The sidecar is not supported by the HTTP backend."
+            )
+        from pyathenajdbc.sidecar import SidecarConnection
+
+        return SidecarConnection(sidecar, *args, **kwargs)
+
+    if backend == "http":
+        from pyathenajdbc.http_backend import HTTPConnection
+
+        return HTTPConnection(*args, **kwargs)
+
     from pyathenajdbc.connection import Connection
 
     return Connection(*args, **kwargs)
+
+
+def prewarm(background: bool = False, **kwargs: Any) -> Optional[threading.Thread]:
+    """Start the JVM and load the JDBC driver ahead of the first connection.
+
+    Accepts the `jvm_path`, `jvm_options`, `driver_path` and `log4j_conf` arguments
+    of `connect`. With `background=True` the work is done in a daemon thread,
+    which is returned. A connection created meanwhile waits for it to finish."""
+    from pyathenajdbc.connection import Connection
+
+    if not background:
+        Connection.prewarm(**kwargs)
+        return None
+
+    def _prewarm() -> None:
+        import jpype
+
+        try:
+            Connection.prewarm(**kwargs)
+        except Exception:
+            logging.getLogger(__name__).exception("Failed to prewarm the JVM.")
+        finally:
+            if jpype.isJVMStarted() and jpype.java.lang.Thread.isAttached():
+                jpype.java.lang.Thread.detach()
+
+    thread = threading.Thread(target=_prewarm, name="pyathenajdbc-prewarm")
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def jvm_stats() -> "JVMStats":
+    """Returns the heap usage and garbage collector stats of the JVM,
+    see `pyathenajdbc.jvm.JVMStats`."""
+    from pyathenajdbc.jvm import jvm_stats as _jvm_stats
+
+    return _jvm_stats()
+
+
+if os.getenv(ENV_PREWARM, "").lower() in ("1", "true"):
+    prewarm(background=True)
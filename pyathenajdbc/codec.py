@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+import struct
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Type
+
+from pyathenajdbc.error import DataError
+
+_TAG_NONE: int = 0x00
+_TAG_TRUE: int = 0x01
+_TAG_FALSE: int = 0x02
+_TAG_INT: int = 0x03
+_TAG_BIG_INT: int = 0x04
+_TAG_FLOAT: int = 0x05
+_TAG_STR: int = 0x06
+_TAG_BYTES: int = 0x07
+_TAG_DECIMAL: int = 0x08
+_TAG_DATE: int = 0x09
+_TAG_DATETIME: int = 0x0A
+_TAG_LIST: int = 0x0B
+_TAG_DICT: int = 0x0C
+
+_UINT32 = struct.Struct("<I")
+_INT32 = struct.Struct("<i")
+_INT64 = struct.Struct("<q")
+_FLOAT64 = struct.Struct("<d")
+_DATETIME = struct.Struct("<iq")
+_BATCH_HEADER = struct.Struct("<II")
+
+_INT64_MIN: int = -(2**63)
+_INT64_MAX: int = 2**63 - 1
+
+
+def _encode_none(buf: bytearray, val: Any) -> None:
+    buf.append(_TAG_NONE)
+
+
+def _encode_bool(buf: bytearray, val: bool) -> None:
+    buf.append(_TAG_TRUE if val else _TAG_FALSE)
+
+
+def _encode_int(buf: bytearray, val: int) -> None:
+    if _INT64_MIN <= val <= _INT64_MAX:
+        buf.append(_TAG_INT)
+        buf += _INT64.pack(val)
+    else:
+        _encode_sized(buf, _TAG_BIG_INT, str(val).encode("ascii"))
+
+
+def _encode_float(buf: bytearray, val: float) -> None:
+    buf.append(_TAG_FLOAT)
+    buf += _FLOAT64.pack(val)
+
+
+def _encode_sized(buf: bytearray, tag: int, val: bytes) -> None:
+    buf.append(tag)
+    buf += _UINT32.pack(len(val))
+    buf += val
+
+
+def _encode_str(buf: bytearray, val: str) -> None:
+    _encode_sized(buf, _TAG_STR, val.encode("utf-8"))
+
+
+def _encode_bytes(buf: bytearray, val: bytes) -> None:
+    _encode_sized(buf, _TAG_BYTES, bytes(val))
+
+
+def _encode_decimal(buf: bytearray, val: Decimal) -> None:
+    _encode_sized(buf, _TAG_DECIMAL, str(val).encode("ascii"))
+
+
+def _encode_date(buf: bytearray, val: date) -> None:
+    buf.append(_TAG_DATE)
+    buf += _INT32.pack(val.toordinal())
+
+
+def _encode_datetime(buf: bytearray, val: datetime) -> None:
+    buf.append(_TAG_DATETIME)
+    buf += _DATETIME.pack(
+        val.toordinal(),
+        ((val.hour * 60 + val.minute) * 60 + val.second) * 1000000 + val.microsecond,
+    )
+
+
+def _encode_list(buf: bytearray, val: Sequence[Any]) -> None:
+    buf.append(_TAG_LIST)
+    buf += _UINT32.pack(len(val))
+    for v in val:
+        encode_value(buf, v)
+
+
+def _encode_dict(buf: bytearray, val: Dict[Any, Any]) -> None:
+    buf.append(_TAG_DICT)
+    buf += _UINT32.pack(len(val))
+    for k, v in val.items():
+        encode_value(buf, k)
+        encode_value(buf, v)
+
+
+_ENCODERS: Dict[Type[Any], Callable[[bytearray, Any], None]] = {
+    type(None): _encode_none,
+    bool: _encode_bool,
+    int: _encode_int,
+    float: _encode_float,
+    str: _encode_str,
+    bytes: _encode_bytes,
+    bytearray: _encode_bytes,
+    Decimal: _encode_decimal,
+    # Before date, of which datetime is a subclass, for the isinstance fallback.
+    datetime: _encode_datetime,
+    date: _encode_date,
+    list: _encode_list,
+    tuple: _encode_list,
+    dict: _encode_dict,
+}
+
+
+def encode_value(buf: bytearray, val: Any) -> None:
+    """Append the binary representation of `val` to `buf`.
+
+    Values of unknown types (e.g. Java objects returned by the default converter)
+    are encoded as their string representation."""
+    encoder = _ENCODERS.get(type(val))
+    if encoder is None:
+        for type_, func in _ENCODERS.items():
+            if isinstance(val, type_):
+                encoder = func
+                break
+        else:
+            encoder = _encode_str
+            val = str(val)
+    encoder(buf, val)
+
+
+def _read_sized(data: memoryview, offset: int) -> Tuple[bytes, int]:
+    (length,) = _UINT32.unpack_from(data, offset)
+    start = offset + _UINT32.size
+    end = start + length
+    return bytes(data[start:end]), end
+
+
+def decode_value(data: memoryview, offset: int) -> Tuple[Any, int]:
+    """Decode one value starting at `offset` and return it with the next offset."""
+    tag = data[offset]
+    offset += 1
+    if tag == _TAG_NONE:
+        return None, offset
+    elif tag == _TAG_TRUE:
+        return True, offset
+    elif tag == _TAG_FALSE:
+        return False, offset
+    elif tag == _TAG_INT:
+        return _INT64.unpack_from(data, offset)[0], offset + _INT64.size
+    elif tag == _TAG_FLOAT:
+        return _FLOAT64.unpack_from(data, offset)[0], offset + _FLOAT64.size
+    elif tag == _TAG_STR:
+        raw, offset = _read_sized(data, offset)
+        return raw.decode("utf-8"), offset
+    elif tag == _TAG_BYTES:
+        return _read_sized(data, offset)
+    elif tag == _TAG_BIG_INT:
+        raw, offset = _read_sized(data, offset)
+        return int(raw.decode("ascii")), offset
+    elif tag == _TAG_DECIMAL:
+        raw, offset = _read_sized(data, offset)
+        return Decimal(raw.decode("ascii")), offset
+    elif tag == _TAG_DATE:
+        (ordinal,) = _INT32.unpack_from(data, offset)
+        return date.fromordinal(ordinal), offset + _INT32.size
+    elif tag == _TAG_DATETIME:
+        ordinal, micros = _DATETIME.unpack_from(data, offset)
+        d = date.fromordinal(ordinal)
+        seconds, microsecond = divmod(micros, 1000000)
+        minutes, second = divmod(seconds, 60)
+        hour, minute = divmod(minutes, 60)
+        return (
+            datetime(d.year, d.month, d.day, hour, minute, second, microsecond),
+            offset + _DATETIME.size,
+        )
+    elif tag == _TAG_LIST:
+        (length,) = _UINT32.unpack_from(data, offset)
+        offset += _UINT32.size
+        values = []
+        for _ in range(length):
+            v, offset = decode_value(data, offset)
+            values.append(v)
+        return values, offset
+    elif tag == _TAG_DICT:
+        (length,) = _UINT32.unpack_from(data, offset)
+        offset += _UINT32.size
+        mapping = dict()
+        for _ in range(length):
+            k, offset = decode_value(data, offset)
+            v, offset = decode_value(data, offset)
+            mapping[k] = v
+        return mapping, offset
+    else:
+        raise DataError("Unknown type tag: {0:#04x}".format(tag))
+
+
+def encode(val: Any) -> bytes:
+    buf = bytearray()
+    encode_value(buf, val)
+    return bytes(buf)
+
+
+def decode(data: bytes) -> Any:
+    val, _ = decode_value(memoryview(data), 0)
+    return val
+
+
+def encode_rows(rows: Sequence[Sequence[Any]]) -> bytes:
+    """Encode a batch of rows that share the same number of columns.
+
+    The batch header holds the row and column counts, so each cell is stored
+    with only its one byte type tag as overhead."""
+    num_columns = len(rows[0]) if rows else 0
+    buf = bytearray(_BATCH_HEADER.pack(len(rows), num_columns))
+    for row in rows:
+        for v in row:
+            encode_value(buf, v)
+    return bytes(buf)
+
+
+def decode_rows(data: bytes) -> List[Tuple[Any, ...]]:
+    view = memoryview(data)
+    num_rows, num_columns = _BATCH_HEADER.unpack_from(view, 0)
+    offset = _BATCH_HEADER.size
+    rows = []
+    for _ in range(num_rows):
+        row = []
+        for _ in range(num_columns):
+            v, offset = decode_value(view, offset)
+            row.append(v)
+        rows.append(tuple(row))
+    return rows
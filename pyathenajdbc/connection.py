@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import logging
 import os
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import jpype
 
@@ -10,11 +10,20 @@ from pyathenajdbc import (
     ATHENA_DRIVER_CLASS_NAME,
     ATHENA_JAR,
     LOG4J_PROPERTIES,
+    __athena_driver_version__,
+)
+from pyathenajdbc.converter import (
+    DefaultJDBCTypeConverter,
+    JDBCTypeConverter,
+    get_jdbc_type_mappings,
 )
-from pyathenajdbc.converter import DefaultJDBCTypeConverter, JDBCTypeConverter
 from pyathenajdbc.cursor import Cursor
-from pyathenajdbc.error import NotSupportedError, ProgrammingError
+from pyathenajdbc.error import DatabaseError, NotSupportedError, ProgrammingError
+from pyathenajdbc.events import QueryListener
 from pyathenajdbc.formatter import DefaultParameterFormatter, Formatter
+from pyathenajdbc.jvm import BackpressurePolicy, memory_options
+from pyathenajdbc.profiler import Profiler
+from pyathenajdbc.row import RowFactory
 from pyathenajdbc.util import attach_thread_to_jvm, synchronized
 
 _logger = logging.getLogger(__name__)  # type: ignore
@@ -28,6 +37,7 @@ class Connection(object):
     _BASE_PATH: str = os.path.dirname(os.path.abspath(__file__))
 
     _class_loader = None
+    _driver_loaded: bool = False
 
     def __init__(
         self,
@@ -37,9 +47,14 @@ class Connection(object):
         formatter: Optional[Formatter] = None,
         driver_path: Optional[str] = None,
         log4j_conf: Optional[str] = None,
+        row_factory: Optional[RowFactory] = None,
+        listeners: Optional[List[QueryListener]] = None,
+        profile: bool = False,
+        memory_budget: Optional[Union[int, str]] = None,
+        backpressure: Optional[BackpressurePolicy] = None,
         **driver_kwargs
     ) -> None:
-        self._start_jvm(jvm_path, jvm_options, driver_path, log4j_conf)
+        self._start_jvm(jvm_path, jvm_options, driver_path, log4j_conf, memory_budget)
         self._driver_kwargs = driver_kwargs
         self.region_name = self._driver_kwargs.get(
             "AwsRegion", os.getenv("AWS_DEFAULT_REGION", None)
@@ -49,7 +64,7 @@ class Connection(object):
             "Workgroup", os.getenv(self._ENV_WORK_GROUP, None)
         )
         props = self._build_driver_args()
-        jpype.JClass(ATHENA_DRIVER_CLASS_NAME)
+        self._load_driver()
         if self.region_name:
             self._jdbc_conn = jpype.java.sql.DriverManager.getConnection(
                 ATHENA_CONNECTION_STRING.format(region=self.region_name), props
@@ -58,6 +73,10 @@ class Connection(object):
             self._jdbc_conn = jpype.java.sql.DriverManager.getConnection()
         self._converter = converter if converter else DefaultJDBCTypeConverter()
         self._formatter = formatter if formatter else DefaultParameterFormatter()
+        self._row_factory = row_factory
+        self.listeners: List[QueryListener] = list(listeners) if listeners else []
+        self.profiler: Optional[Profiler] = Profiler() if profile else None
+        self.backpressure = backpressure
 
     @classmethod
     @synchronized
@@ -67,6 +86,7 @@ class Connection(object):
         jvm_options: Optional[List[str]],
         driver_path: Optional[str],
         log4j_conf: Optional[str],
+        memory_budget: Optional[Union[int, str]] = None,
     ) -> None:
         if jvm_path is None:
             jvm_path = jpype.getDefaultJVMPath()
@@ -81,6 +101,11 @@ class Connection(object):
                 "-Djava.class.path={0}".format(driver_path),
                 "-Dlog4j.configuration=file:{0}".format(log4j_conf),
             ]
+            shared_archive = cls._find_shared_archive(driver_path, jvm_options)
+            if shared_archive:
+                args.append("-XX:SharedArchiveFile={0}".format(shared_archive))
+            if memory_budget is not None:
+                args.extend(memory_options(memory_budget, jvm_options))
             if jvm_options:
                 args.extend(jvm_options)
             _logger.debug("JVM args: %s", args)
@@ -102,6 +127,54 @@ class Connection(object):
             )
             jpype.java.lang.Thread.currentThread().setContextClassLoader(class_loader)
 
+    @classmethod
+    def _load_driver(cls) -> None:
+        if not cls._driver_loaded:
+            # Loading the class registers the driver with the DriverManager.
+            jpype.JClass(ATHENA_DRIVER_CLASS_NAME)
+            cls._driver_loaded = True
+
+    @classmethod
+    def prewarm(
+        cls,
+        jvm_path: Optional[str] = None,
+        jvm_options: Optional[List[str]] = None,
+        driver_path: Optional[str] = None,
+        log4j_conf: Optional[str] = None,
+        memory_budget: Optional[Union[int, str]] = None,
+    ) -> None:
+        """Starts the JVM, registers the JDBC driver and builds the JDBC type
+        mappings, so that the first connection does not pay for them."""
+        cls._start_jvm(jvm_path, jvm_options, driver_path, log4j_conf, memory_budget)
+        cls._load_driver()
+        get_jdbc_type_mappings()
+
+    @classmethod
+    def _get_shared_archive_path(cls, driver_path: str) -> str:
+        return "{0}-{1}.jsa".format(
+            os.path.splitext(driver_path)[0], __athena_driver_version__
+        )
+
+    @classmethod
+    def _find_shared_archive(
+        cls, driver_path: str, jvm_options: Optional[List[str]]
+    ) -> Optional[str]:
+        """Returns the class data sharing archive created by `pyathenajdbc.warmup`
+        if it is newer than the JDBC driver and no CDS option is given explicitly."""
+        if jvm_options and any(
+            opt.startswith(("-Xshare", "-XX:SharedArchiveFile", "-XX:ArchiveClasses"))
+            for opt in jvm_options
+        ):
+            return None
+        archive = cls._get_shared_archive_path(driver_path)
+        if (
+            os.path.exists(archive)
+            and os.path.exists(driver_path)
+            and os.path.getmtime(archive) >= os.path.getmtime(driver_path)
+        ):
+            return archive
+        return None
+
     def _build_driver_args(self) -> Any:
         props = jpype.java.util.Properties()
         props.setProperty(
@@ -132,10 +205,14 @@ class Connection(object):
         self.close()
 
     @attach_thread_to_jvm
-    def cursor(self) -> Cursor:
+    def cursor(self, **kwargs) -> Cursor:
         if self.is_closed:
             raise ProgrammingError("Connection is closed.")
-        return Cursor(self._jdbc_conn, self._converter, self._formatter)
+        kwargs.setdefault("row_factory", self._row_factory)
+        kwargs.setdefault("listeners", self.listeners)
+        kwargs.setdefault("profiler", self.profiler)
+        kwargs.setdefault("backpressure", self.backpressure)
+        return Cursor(self._jdbc_conn, self._converter, self._formatter, **kwargs)
 
     @attach_thread_to_jvm
     @synchronized
@@ -144,6 +221,117 @@ class Connection(object):
             self._jdbc_conn.close()
             self._jdbc_conn = None
 
+    @attach_thread_to_jvm
+    def _get_meta_data(self) -> Any:
+        if self.is_closed:
+            raise ProgrammingError("Connection is closed.")
+        return self._jdbc_conn.getMetaData()
+
+    @staticmethod
+    def _escape_pattern(meta_data: Any, value: str) -> str:
+        escape = meta_data.getSearchStringEscape()
+        if not escape:
+            return value
+        return (
+            value.replace(escape, escape + escape)
+            .replace("_", escape + "_")
+            .replace("%", escape + "%")
+        )
+
+    @staticmethod
+    def _read_meta_data(
+        result_set: Any, columns: List[Tuple[str, str]]
+    ) -> List[Dict[str, Any]]:
+        rows = []
+        try:
+            while result_set.next():
+                row: Dict[str, Any] = dict()
+                for name, getter in columns:
+                    val = getattr(result_set, getter)(name)
+                    if result_set.wasNull():
+                        row[name] = None
+                    elif getter == "getInt":
+                        row[name] = int(val)
+                    else:
+                        row[name] = str(val)
+                rows.append(row)
+        finally:
+            result_set.close()
+        return rows
+
+    @attach_thread_to_jvm
+    def get_schema_names(self) -> List[str]:
+        """Returns the schema names from `java.sql.DatabaseMetaData`."""
+        meta_data = self._get_meta_data()
+        try:
+            rows = self._read_meta_data(
+                meta_data.getSchemas(), [("TABLE_SCHEM", "getString")]
+            )
+        except Exception as e:
+            raise DatabaseError(*e.args) from e
+        return [row["TABLE_SCHEM"] for row in rows]
+
+    @attach_thread_to_jvm
+    def get_table_names(self, schema: Optional[str] = None) -> List[str]:
+        """Returns the table names in the schema from `java.sql.DatabaseMetaData`."""
+        schema = schema if schema else self.schema_name
+        meta_data = self._get_meta_data()
+        try:
+            rows = self._read_meta_data(
+                meta_data.getTables(
+                    None, self._escape_pattern(meta_data, schema), "%", None
+                ),
+                [("TABLE_NAME", "getString")],
+            )
+        except Exception as e:
+            raise DatabaseError(*e.args) from e
+        return [row["TABLE_NAME"] for row in rows]
+
+    @attach_thread_to_jvm
+    def get_columns(
+        self, schema: Optional[str] = None, table_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Returns the columns of the table, or of all tables in the schema
+        if `table_name` is not specified, from `java.sql.DatabaseMetaData`.
+
+        `jdbc_type` is the `java.sql.Types` name of the column type."""
+        schema = schema if schema else self.schema_name
+        meta_data = self._get_meta_data()
+        try:
+            rows = self._read_meta_data(
+                meta_data.getColumns(
+                    None,
+                    self._escape_pattern(meta_data, schema),
+                    self._escape_pattern(meta_data, table_name) if table_name else "%",
+                    "%",
+                ),
+                [
+                    ("TABLE_NAME", "getString"),
+                    ("COLUMN_NAME", "getString"),
+                    ("DATA_TYPE", "getInt"),
+                    ("TYPE_NAME", "getString"),
+                    ("NULLABLE", "getInt"),
+                    ("REMARKS", "getString"),
+                    ("COLUMN_DEF", "getString"),
+                    ("ORDINAL_POSITION", "getInt"),
+                ],
+            )
+        except Exception as e:
+            raise DatabaseError(*e.args) from e
+        return [
+            {
+                "table_name": row["TABLE_NAME"],
+                "column_name": row["COLUMN_NAME"],
+                "type_name": row["TYPE_NAME"],
+                "jdbc_type": self._converter.get_jdbc_type_name(row["DATA_TYPE"]),
+                "nullable": row["NULLABLE"] != 0,
+                "default": row["COLUMN_DEF"],
+                "ordinal_position": row["ORDINAL_POSITION"],
+                "comment": row["REMARKS"] if row["REMARKS"] else None,
+            }
+            for row in rows
+        ]
+
     @property  # type: ignore
     @attach_thread_to_jvm
     def is_closed(self) -> bool:
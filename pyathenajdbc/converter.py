@@ -1,34 +1,102 @@
 # -*- coding: utf-8 -*-
 import binascii
+import functools
 import logging
 from abc import ABCMeta, abstractmethod
 from copy import deepcopy
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
 
 import jpype
 
+from pyathenajdbc.util import synchronized
+
 _logger = logging.getLogger(__name__)  # type: ignore
 
 
-class JDBCTypeConverter(object, metaclass=ABCMeta):
-    def __init__(
-        self,
-        mappings: Dict[str, Callable[[Any, int], Optional[Any]]],
-        default: Callable[[Any, int], Optional[Any]] = None,
-    ) -> None:
+_jdbc_type_mappings: Optional[Tuple[Dict[str, Any], Dict[Any, str]]] = None
+
+# The constants of `java.sql.Types`, used when the JVM is not started.
+_JDBC_TYPES: Dict[str, int] = {
+    "BIT": -7,
+    "TINYINT": -6,
+    "SMALLINT": 5,
+    "INTEGER": 4,
+    "BIGINT": -5,
+    "FLOAT": 6,
+    "REAL": 7,
+    "DOUBLE": 8,
+    "NUMERIC": 2,
+    "DECIMAL": 3,
+    "CHAR": 1,
+    "VARCHAR": 12,
+    "LONGVARCHAR": -1,
+    "DATE": 91,
+    "TIME": 92,
+    "TIMESTAMP": 93,
+    "BINARY": -2,
+    "VARBINARY": -3,
+    "LONGVARBINARY": -4,
+    "NULL": 0,
+    "OTHER": 1111,
+    "JAVA_OBJECT": 2000,
+    "DISTINCT": 2001,
+    "STRUCT": 2002,
+    "ARRAY": 2003,
+    "BLOB": 2004,
+    "CLOB": 2005,
+    "REF": 2006,
+    "DATALINK": 70,
+    "BOOLEAN": 16,
+    "ROWID": -8,
+    "NCHAR": -15,
+    "NVARCHAR": -9,
+    "LONGNVARCHAR": -16,
+    "NCLOB": 2011,
+    "SQLXML": 2009,
+    "REF_CURSOR": 2012,
+    "TIME_WITH_TIMEZONE": 2013,
+    "TIMESTAMP_WITH_TIMEZONE": 2014,
+}
+
+
+@synchronized
+def get_jdbc_type_mappings() -> Tuple[Dict[str, Any], Dict[Any, str]]:
+    """Returns the name to code and code to name mappings of `java.sql.Types`.
+
+    The mappings are built by reflection only once per process
+    and shared by all converters. Without a JVM (e.g. with the HTTP backend),
+    they are built from a copy of the constants and not cached."""
+    global _jdbc_type_mappings
+    if _jdbc_type_mappings is None:
+        if not jpype.isJVMStarted():
+            return dict(_JDBC_TYPES), {v: k for k, v in _JDBC_TYPES.items()}
         modifier = jpype.java.lang.reflect.Modifier
         types = jpype.java.sql.Types
-        self._jdbc_type_name_mappings = dict()
-        self._jdbc_type_code_mappings = dict()
+        name_mappings = dict()
+        code_mappings = dict()
         for field in types.class_.getFields():
             if modifier.isStatic(field.getModifiers()):
                 name = field.getName()
                 attr = getattr(types, field.getName())
-                self._jdbc_type_name_mappings[name] = attr
-                self._jdbc_type_code_mappings[attr] = name
-        _logger.debug(self._jdbc_type_name_mappings)
+                name_mappings[name] = attr
+                code_mappings[attr] = name
+        _logger.debug(name_mappings)
+        _jdbc_type_mappings = (name_mappings, code_mappings)
+    return _jdbc_type_mappings
+
+
+class JDBCTypeConverter(object, metaclass=ABCMeta):
+    def __init__(
+        self,
+        mappings: Dict[str, Callable[[Any, int], Optional[Any]]],
+        default: Callable[[Any, int], Optional[Any]] = None,
+    ) -> None:
+        (
+            self._jdbc_type_name_mappings,
+            self._jdbc_type_code_mappings,
+        ) = get_jdbc_type_mappings()
 
         self._mappings = dict()
         if mappings:
@@ -64,6 +132,13 @@ class JDBCTypeConverter(object, metaclass=ABCMeta):
     def convert(self, type_code: Any, result_set: Any, index: int) -> Optional[Any]:
         raise NotImplementedError  # pragma: no cover
 
+    def resolve(self, type_code: Any) -> Callable[[Any, int], Optional[Any]]:
+        """Returns the function that converts a column of `type_code`.
+
+        It is called once per column of a result set. Subclasses can return
+        the converter function itself to skip the dispatch of `convert`."""
+        return functools.partial(self.convert, type_code)
+
     def get_jdbc_type_code(self, type_name: Any) -> Any:
         return self._jdbc_type_name_mappings.get(type_name, None)
 
@@ -212,3 +287,9 @@ class DefaultJDBCTypeConverter(JDBCTypeConverter):
     def convert(self, type_code: Any, result_set: Any, index: int) -> Optional[Any]:
         converter = self._mappings.get(type_code, _to_default)
         return converter(result_set, index)
+
+    def resolve(self, type_code: Any) -> Callable[[Any, int], Optional[Any]]:
+        converter: Callable[[Any, int], Optional[Any]] = self._mappings.get(
+            type_code, _to_default
+        )
+        return converter
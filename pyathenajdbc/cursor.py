@@ -1,15 +1,68 @@
 # -*- coding: utf-8 -*-
+import collections
+import functools
 import logging
-from typing import Any, Dict, List, Optional, Tuple, cast
+import math
+import time
+import weakref
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+)
 
 from pyathenajdbc.converter import JDBCTypeConverter
-from pyathenajdbc.error import DatabaseError, ProgrammingError
-from pyathenajdbc.formatter import Formatter
-from pyathenajdbc.util import attach_thread_to_jvm, synchronized
+from pyathenajdbc.error import DatabaseError, OperationalError, ProgrammingError
+from pyathenajdbc.events import QueryListener, dispatch, estimate_size
+from pyathenajdbc.formatter import Formatter, limit_query
+from pyathenajdbc.jvm import BackpressurePolicy
+from pyathenajdbc.profiler import Profiler, instrument_converters
+from pyathenajdbc.row import (
+    LazyRow,
+    RowFactory,
+    compile_row_builder,
+    get_column_indexes,
+    tuple_row,
+)
+from pyathenajdbc.spill import SpillBuffer
+from pyathenajdbc.util import DEFAULT_BATCH_SIZE, attach_thread_to_jvm, synchronized
+from pyathenajdbc.watchdog import (
+    CancelMetrics,
+    StatementState,
+    finalize_statement,
+    get_watchdog,
+)
+
+if TYPE_CHECKING:
+    from pyathenajdbc.export import ExportResult
 
 _logger = logging.getLogger(__name__)  # type: ignore
 
 
+def _is_timeout_error(e: BaseException) -> bool:
+    """Returns whether the driver raised `java.sql.SQLTimeoutException`, or an
+    exception caused by it, for the query timeout of the statement."""
+    import jpype
+
+    if not jpype.isJVMStarted():
+        return False
+    timeout_exception = jpype.JClass("java.sql.SQLTimeoutException")
+    cause: Any = e
+    while cause is not None:
+        if isinstance(cause, timeout_exception):
+            return True
+        cause = cause.getCause() if isinstance(cause, jpype.JException) else None
+    return False
+
+
 class Cursor(object):
 
     DEFAULT_FETCH_SIZE: int = 1000
@@ -19,13 +72,31 @@ class Cursor(object):
         connection: Any,
         converter: JDBCTypeConverter,
         formatter: Formatter,
+        spill_threshold: Optional[int] = None,
+        spill_directory: Optional[str] = None,
+        lazy: bool = False,
+        row_factory: Optional[RowFactory] = None,
+        listeners: Optional[List[QueryListener]] = None,
+        profiler: Optional[Profiler] = None,
+        backpressure: Optional[BackpressurePolicy] = None,
     ):
         self._connection = connection
         self._converter = converter
         self._formatter = formatter
+        self.spill_threshold = spill_threshold
+        self.spill_directory = spill_directory
+        self.lazy = lazy
+        self.row_factory = row_factory
+        self._listeners: List[QueryListener] = (
+            listeners if listeners is not None else []
+        )
+        self.profiler = profiler
+        self.backpressure = backpressure
 
         self._rownumber: Optional[int] = None
         self._arraysize: int = self.DEFAULT_FETCH_SIZE
+        self._fetch_size: int = self._arraysize
+        self._page_rows: int = 0
 
         self._description: Optional[
             List[
@@ -41,9 +112,33 @@ class Cursor(object):
             ]
         ] = None
         self._statement: Any = self.connection.createStatement()
+        self._statement_state = StatementState(self._statement)
+        # Cancels the running query and closes the statement if the cursor is
+        # garbage-collected without being closed.
+        self._finalizer = weakref.finalize(
+            self, finalize_statement, self._statement_state
+        )
+        self._finalizer.atexit = False
+        self._query_timeout: int = 0
+        self._statement_max_rows: int = 0
+        self._max_rows: Optional[int] = None
+        self._limit_reached: bool = False
         self._result_set: Optional[Any] = None
+        self._result_set_profiler: Optional[Profiler] = None
         self._meta_data: Optional[Any] = None
+        self._column_types: Optional[List[Any]] = None
+        self._row_builders: Dict[
+            Tuple[Optional[Tuple[int, ...]], bool], Callable[[Any], Any]
+        ] = dict()
+        self._row_generation: int = 0
+        # Rows read ahead by iteration, not yet returned.
+        self._buffer: Deque[Any] = collections.deque()
         self._update_count: int = -1
+        self._query: Optional[str] = None
+        self._batch_rows: int = 0
+        self._batch_bytes: int = 0
+        self._batch_elapsed: float = 0.0
+        self._batch_finished: bool = False
 
     @property
     def connection(self) -> Any:
@@ -65,7 +160,9 @@ class Cursor(object):
 
     @property
     def rownumber(self) -> Optional[int]:
-        return self._rownumber
+        if self._rownumber is None:
+            return None
+        return self._rownumber - len(self._buffer)
 
     @property
     def rowcount(self) -> int:
@@ -78,7 +175,7 @@ class Cursor(object):
         return (
             self._result_set is not None
             and self._meta_data is not None
-            and not self._result_set.isClosed()
+            and (self._limit_reached or not self._result_set.isClosed())
         )
 
     @property  # type: ignore
@@ -120,6 +217,12 @@ class Cursor(object):
     @attach_thread_to_jvm
     @synchronized
     def close(self) -> None:
+        # Cancels the query running in another thread, if any.
+        self._statement_state.cancel(CancelMetrics.CLOSE)
+        self._finalizer.detach()
+        if self._listeners and not self.is_closed:
+            self._emit_fetch_batch(False)
+            dispatch(self._listeners, "on_close", self)
         self._meta_data = None
         if self._result_set and not self._result_set.isClosed():
             self._result_set.close()
@@ -128,6 +231,7 @@ class Cursor(object):
             self._statement.close()
         self._statement = None
         self._description = None
+        self._buffer.clear()
         self._connection = None
 
     @property
@@ -137,32 +241,133 @@ class Cursor(object):
     def _reset_state(self) -> None:
         self._description = None
         self._result_set = None
+        self._result_set_profiler = None
         self._meta_data = None
+        self._column_types = None
+        self._row_builders = dict()
+        self._row_generation += 1
+        self._buffer.clear()
         self._rownumber = 0
+        self._max_rows = None
+        self._limit_reached = False
+        self._fetch_size = self._arraysize
+        self._page_rows = 0
+        self._batch_rows, self._batch_bytes, self._batch_elapsed = 0, 0, 0.0
+        self._batch_finished = False
 
     @attach_thread_to_jvm
     @synchronized
-    def execute(self, operation: str, parameters: Optional[Dict[str, Any]] = None):
+    def execute(
+        self,
+        operation: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        max_rows: Optional[int] = None,
+    ):
+        """Executes the operation.
+
+        With `timeout` in seconds, the query is cancelled and `OperationalError`
+        is raised if it does not complete in time.
+
+        With `max_rows`, at most that many rows are fetched: the limit is set on
+        the statement, a LIMIT is added to (or tightened in) a SELECT query, and
+        the result set is closed once the limit is reached."""
         if self.is_closed:
             raise ProgrammingError("Connection is closed.")
-
-        query = self._formatter.format(operation, parameters)
+        if timeout is not None and timeout <= 0:
+            raise ProgrammingError("Timeout must be positive.")
+        if max_rows is not None and max_rows <= 0:
+            raise ProgrammingError("max_rows must be positive.")
+
+        listeners = self._listeners
+        if listeners:
+            self._emit_fetch_batch(False)
+            dispatch(listeners, "before_execute", self, operation, parameters)
+        start = time.perf_counter()
+        try:
+            query = self._formatter.format(operation, parameters)
+            if max_rows is not None:
+                query = limit_query(query, max_rows)
+        except Exception as e:
+            if listeners:
+                dispatch(listeners, "on_error", self, None, e)
+            raise
         _logger.debug(query)
+        formatted = time.perf_counter()
         try:
             self._reset_state()
-            has_result_set = self._statement.execute(query)
+            self._query = query
+            self._set_max_rows(max_rows)
+            has_result_set = self._execute_statement(query, timeout)
             if has_result_set:
+                if max_rows is not None:
+                    self._max_rows = max_rows
+                    self._fetch_size = min(self._fetch_size, max_rows)
                 self._result_set = self._statement.getResultSet()
-                self._result_set.setFetchSize(self._arraysize)
+                if self.profiler is not None:
+                    self._result_set_profiler = self.profiler
+                    self._result_set = self.profiler.wrap_result_set(self._result_set)
+                self._result_set.setFetchSize(self._fetch_size)
                 self._meta_data = self._result_set.getMetaData()
                 self._update_count = -1
             else:
                 self._update_count = self._statement.getUpdateCount()
         except Exception as e:
             _logger.exception("Failed to execute query.")
+            if listeners:
+                dispatch(listeners, "on_error", self, query, e)
+            if timeout is not None and (
+                self._statement_state.cancel_reason == CancelMetrics.TIMEOUT
+                or _is_timeout_error(e)
+            ):
+                raise OperationalError(
+                    "Query timed out after {0} seconds.".format(timeout)
+                ) from e
             raise DatabaseError(*e.args) from e
+        if listeners:
+            dispatch(
+                listeners,
+                "after_execute",
+                self,
+                query,
+                formatted - start,
+                time.perf_counter() - formatted,
+            )
         return self
 
+    def _set_query_timeout(self, timeout: Optional[float]) -> None:
+        seconds = int(math.ceil(timeout)) if timeout is not None else 0
+        if seconds != self._query_timeout:
+            try:
+                self._statement.setQueryTimeout(seconds)
+            except Exception:
+                # The watchdog still cancels the query.
+                _logger.debug("Failed to set the query timeout.", exc_info=True)
+            self._query_timeout = seconds
+
+    def _set_max_rows(self, max_rows: Optional[int]) -> None:
+        max_rows = max_rows if max_rows is not None else 0
+        if max_rows != self._statement_max_rows:
+            self._statement.setMaxRows(max_rows)
+            self._statement_max_rows = max_rows
+
+    def _execute_statement(self, query: str, timeout: Optional[float]) -> bool:
+        self._set_query_timeout(timeout)
+        state = self._statement_state
+        state.start()
+        handle = None
+        try:
+            if timeout is not None:
+                handle = get_watchdog().schedule(
+                    timeout, functools.partial(state.cancel, CancelMetrics.TIMEOUT)
+                )
+            has_result_set: bool = self._statement.execute(query)
+            return has_result_set
+        finally:
+            if handle is not None:
+                get_watchdog().unschedule(handle)
+            state.finish()
+
     def executemany(
         self, operation: str, seq_of_parameters: List[Optional[Dict[str, Any]]]
     ):
@@ -176,56 +381,338 @@ class Cursor(object):
     def cancel(self) -> None:
         if self.is_closed:
             raise ProgrammingError("Connection is closed.")
-        self._statement.cancel()
+        if not self._statement_state.cancel(CancelMetrics.CANCEL):
+            self._statement.cancel()
+
+    def _get_column_types(self) -> List[Any]:
+        if self._column_types is None:
+            meta_data = cast(Any, self._meta_data)
+            self._column_types = [
+                meta_data.getColumnType(i)
+                for i in range(1, meta_data.getColumnCount() + 1)
+            ]
+        return self._column_types
 
-    @attach_thread_to_jvm
-    def _fetch(self):
+    def _get_column_names(self, indexes: Sequence[int]) -> List[str]:
+        description = cast(List[Tuple[Any, ...]], self.description)
+        return [description[i][0] for i in indexes]
+
+    def _get_make_row(self, indexes: Sequence[int]) -> Optional[Callable[..., Any]]:
+        if self.row_factory is None or self.row_factory is tuple_row:
+            return None
+        return self.row_factory(self._get_column_names(indexes))
+
+    def _get_row_builder(
+        self, indexes: Optional[List[int]], raw: bool = False
+    ) -> Callable[[Any], Any]:
+        """Returns the function that builds a row, compiled once per result set.
+
+        With `raw`, rows are tuples regardless of `row_factory`."""
+        key = (tuple(indexes) if indexes is not None else None, raw)
+        builder = self._row_builders.get(key, None)
+        if builder is None:
+            column_types = self._get_column_types()
+            if indexes is None:
+                indexes = list(range(len(column_types)))
+            converters = [self._converter.resolve(column_types[i]) for i in indexes]
+            profiler = self._result_set_profiler
+            if profiler is not None:
+                converters = instrument_converters(
+                    profiler,
+                    converters,
+                    [
+                        (
+                            i + 1,
+                            name,
+                            self._converter.get_jdbc_type_name(column_types[i]),
+                        )
+                        for i, name in zip(indexes, self._get_column_names(indexes))
+                    ],
+                )
+            builder = compile_row_builder(
+                converters,
+                [i + 1 for i in indexes],
+                None if raw else self._get_make_row(indexes),
+            )
+            if profiler is not None:
+                builder = profiler.wrap_row_builder(builder)
+            self._row_builders[key] = builder
+        return builder
+
+    def _get_column_indexes(
+        self, columns: Optional[Sequence[Union[str, int]]]
+    ) -> Optional[List[int]]:
+        if columns is None:
+            return None
+        description = self.description
+        if not description:
+            raise ProgrammingError("No result set.")
+        return get_column_indexes([d[0] for d in description], columns)
+
+    def _close_limited_result_set(self) -> None:
+        """Closes the result set once `max_rows` rows are fetched, so that the
+        driver does not fetch the remaining pages. The description stays available."""
+        # Reads the description and the column types before the result set is closed.
+        self._description = self.description
+        self._get_column_types()
+        self._limit_reached = True
+        result_set = cast(Any, self._result_set)
+        if not result_set.isClosed():
+            result_set.close()
+
+    def _check_result_set(self) -> None:
         if self.is_closed:
             raise ProgrammingError("Connection is closed.")
         if not self.has_result_set:
             raise ProgrammingError("No result set.")
 
-        result_set = cast(Any, self._result_set)
-        if not result_set.next():
-            return None
+    def _advance(self) -> bool:
+        """Moves to the next row of the result set, checked by `_check_result_set`."""
+        if self._max_rows is not None and cast(int, self._rownumber) >= self._max_rows:
+            self._row_generation += 1
+            if not self._limit_reached:
+                self._close_limited_result_set()
+            return False
+
+        self._row_generation += 1
+        if self.backpressure is not None:
+            if self._page_rows >= self._fetch_size:
+                self._apply_backpressure()
+            self._page_rows += 1
+        if not cast(Any, self._result_set).next():
+            return False
         if self._rownumber is None:
             self._rownumber = 0
         self._rownumber += 1
-        meta_data = cast(Any, self._meta_data)
-        return tuple(
-            [
-                self._converter.convert(meta_data.getColumnType(i), result_set, i)
-                for i in range(1, meta_data.getColumnCount() + 1)
-            ]
+        return True
+
+    def _next(self) -> bool:
+        self._check_result_set()
+        return self._advance()
+
+    def _apply_backpressure(self) -> None:
+        """Applies the backpressure policy before the next page is fetched."""
+        policy = cast(BackpressurePolicy, self.backpressure)
+        fetch_size = policy.apply(self._fetch_size, self._arraysize)
+        if fetch_size != self._fetch_size:
+            _logger.debug("Fetch size: %d -> %d", self._fetch_size, fetch_size)
+            cast(Any, self._result_set).setFetchSize(fetch_size)
+            self._fetch_size = fetch_size
+        self._page_rows = 0
+
+    def _emit_fetch_batch(self, finished: bool) -> None:
+        if self._batch_rows or (finished and not self._batch_finished):
+            dispatch(
+                self._listeners,
+                "on_fetch_batch",
+                self,
+                self._batch_rows,
+                self._batch_bytes,
+                self._batch_elapsed,
+                finished,
+            )
+        self._batch_rows, self._batch_bytes, self._batch_elapsed = 0, 0, 0.0
+        self._batch_finished = self._batch_finished or finished
+
+    def _observe_fetch(self, fetch: Callable[..., Any], *args: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            row = fetch(*args)
+        except Exception as e:
+            dispatch(self._listeners, "on_error", self, self._query, e)
+            raise
+        self._batch_elapsed += time.perf_counter() - start
+        if row is None:
+            self._emit_fetch_batch(True)
+            return None
+        self._batch_rows += 1
+        if not isinstance(row, LazyRow):
+            self._batch_bytes += estimate_size(row)
+        if self._batch_rows >= self._arraysize:
+            self._emit_fetch_batch(False)
+        return row
+
+    def _fetch_row(self, indexes: Optional[List[int]], raw: bool) -> Any:
+        if not self._next():
+            return None
+        return self._get_row_builder(indexes, raw)(self._result_set)
+
+    @attach_thread_to_jvm
+    def _fetch(self, indexes: Optional[List[int]] = None, raw: bool = False):
+        if self._listeners:
+            return self._observe_fetch(self._fetch_row, indexes, raw)
+        return self._fetch_row(indexes, raw)
+
+    def _fetch_lazy_row(self) -> Optional[LazyRow]:
+        if not self._next():
+            return None
+        return LazyRow(self, self._row_generation, len(self._get_column_types()))
+
+    @attach_thread_to_jvm
+    def _fetch_lazy(self) -> Optional[LazyRow]:
+        if self._listeners:
+            return cast(Optional[LazyRow], self._observe_fetch(self._fetch_lazy_row))
+        return self._fetch_lazy_row()
+
+    @attach_thread_to_jvm
+    def _read_cell(self, generation: int, index: int) -> Optional[Any]:
+        if generation != self._row_generation:
+            raise ProgrammingError(
+                "The row is no longer the current row of the cursor."
+            )
+        return self._converter.convert(
+            self._get_column_types()[index], self._result_set, index + 1
+        )
+
+    @attach_thread_to_jvm
+    def _read_rows(
+        self, size: Optional[int], indexes: Optional[List[int]], raw: bool = False
+    ) -> List[Any]:
+        """Reads up to `size` rows, checking the state of the cursor once."""
+        rows: List[Any] = []
+        if self._listeners:
+            while size is None or len(rows) < size:
+                row = self._fetch(indexes, raw)
+                if row is None:
+                    break
+                rows.append(row)
+            return rows
+
+        self._check_result_set()
+        advance = self._advance
+        build = self._get_row_builder(indexes, raw)
+        result_set = self._result_set
+        while size is None or len(rows) < size:
+            if not advance():
+                break
+            rows.append(build(result_set))
+        return rows
+
+    def _pop_buffer(self, size: Optional[int], columns: Any) -> List[Any]:
+        """Returns up to `size` rows read ahead by iteration."""
+        buffer = self._buffer
+        if not buffer:
+            return []
+        if columns is not None:
+            raise ProgrammingError("Columns cannot be fetched while iterating.")
+        if size is None or size >= len(buffer):
+            rows = list(buffer)
+            buffer.clear()
+            return rows
+        return [buffer.popleft() for _ in range(size)]
+
+    def _fetch_rows(
+        self,
+        size: Optional[int] = None,
+        columns: Optional[Sequence[Union[str, int]]] = None,
+    ) -> Sequence[Any]:
+        buffered = self._pop_buffer(size, columns)
+        if size is not None and size == len(buffered):
+            return buffered
+        indexes = self._get_column_indexes(columns)
+        if self.spill_threshold is None:
+            rows: List[Any] = self._read_rows(
+                size - len(buffered) if size is not None else None, indexes
+            )
+            if buffered:
+                buffered.extend(rows)
+                return buffered
+            return rows
+
+        if not self.has_result_set:
+            raise ProgrammingError("No result set.")
+        # Rows are buffered as tuples and built with the row factory when read.
+        buffer = SpillBuffer(
+            self.spill_threshold,
+            self._arraysize,
+            self.spill_directory,
+            self._get_make_row(
+                indexes if indexes is not None else range(len(self._get_column_types()))
+            ),
         )
+        for row in buffered:
+            # Rows read ahead by iteration are already built.
+            buffer.rows.append(row)
+        batch_size = self._arraysize
+        while size is None or len(buffer) < size:
+            batch: List[Any] = self._read_rows(
+                batch_size if size is None else min(batch_size, size - len(buffer)),
+                indexes,
+                raw=True,
+            )
+            for row in batch:
+                buffer.append(row)
+            if len(batch) < batch_size:
+                break
+        if not buffer.spilled:
+            return buffer.rows
+        buffer.flush()
+        return buffer
 
     @synchronized
-    def fetchone(self):
-        return self._fetch()
+    def fetchone(self, columns: Optional[Sequence[Union[str, int]]] = None):
+        """Fetches the next row, or only `columns` (names or 0-based indexes) of it.
+
+        If the cursor is `lazy`, a `LazyRow` is returned unless `columns` is given."""
+        if self._buffer:
+            return self._pop_buffer(1, columns)[0]
+        if self.lazy and columns is None:
+            return self._fetch_lazy()
+        return self._fetch(self._get_column_indexes(columns))
 
     @synchronized
-    def fetchmany(self, size: int = None):
+    def fetchmany(
+        self, size: int = None, columns: Optional[Sequence[Union[str, int]]] = None
+    ):
         if not size or size <= 0:
             size = self._arraysize
-        rows = []
-        for i in range(size):
-            row = self._fetch()
-            if row:
-                rows.append(row)
-            else:
-                break
-        return rows
+        return self._fetch_rows(size, columns)
 
     @synchronized
-    def fetchall(self):
-        rows = []
-        while True:
-            row = self._fetch()
-            if row:
-                rows.append(row)
-            else:
-                break
-        return rows
+    def fetchall(self, columns: Optional[Sequence[Union[str, int]]] = None):
+        return self._fetch_rows(columns=columns)
+
+    def head(
+        self,
+        operation: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        n: int = 10,
+        columns: Optional[Sequence[Union[str, int]]] = None,
+    ):
+        """Executes the operation with `max_rows=n` and returns its first `n` rows."""
+        self.execute(operation, parameters, max_rows=n)
+        return self.fetchall(columns=columns)
+
+    def to_parquet(
+        self,
+        path: str,
+        row_group_size: int = DEFAULT_BATCH_SIZE,
+        compression: str = "snappy",
+        max_rows_per_file: Optional[int] = None,
+        writers: int = 1,
+    ) -> "ExportResult":
+        """Streams the remaining rows into a Parquet file, see `export.to_parquet`."""
+        from pyathenajdbc.export import to_parquet
+
+        return to_parquet(
+            self, path, row_group_size, compression, max_rows_per_file, writers
+        )
+
+    def to_csv(
+        self,
+        path: str,
+        header: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_rows_per_file: Optional[int] = None,
+        writers: int = 1,
+        **fmtparams: Any
+    ) -> "ExportResult":
+        """Streams the remaining rows into a CSV file, see `export.to_csv`."""
+        from pyathenajdbc.export import to_csv
+
+        return to_csv(
+            self, path, header, batch_size, max_rows_per_file, writers, **fmtparams
+        )
 
     def setinputsizes(self, sizes):
         """Does nothing by default"""
@@ -241,12 +728,25 @@ class Cursor(object):
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
+    @synchronized
+    def _fill_buffer(self) -> None:
+        self._buffer.extend(self._read_rows(self._arraysize, None))
+
     def __next__(self):
-        row = self.fetchone()
-        if row is None:
-            raise StopIteration
-        else:
-            return row
+        """Returns the next row from a buffer, filled with `arraysize` rows at a time.
+
+        A `lazy` cursor returns the rows of `fetchone` instead."""
+        buffer = self._buffer
+        if not buffer:
+            if self.lazy:
+                row = self.fetchone()
+                if row is None:
+                    raise StopIteration
+                return row
+            self._fill_buffer()
+            if not buffer:
+                raise StopIteration
+        return buffer.popleft()
 
     next = __next__
 
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""Read a query into a Dask DataFrame, one filtered query per partition.
+
+Each partition connects with `pyathenajdbc.connect` and runs its own query on
+the worker, so the data does not pass through a single JVM."""
+import contextlib
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from pyathenajdbc.error import ProgrammingError
+from pyathenajdbc.formatter import DefaultParameterFormatter, _escape_presto
+from pyathenajdbc.util import as_arrow, to_arrow_schema
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+    from pandas import DataFrame
+
+_logger = logging.getLogger(__name__)  # type: ignore
+
+_formatter = DefaultParameterFormatter()
+
+
+def _format_literal(value: Any) -> str:
+    func = _formatter.get(value)
+    if func is None:
+        raise ProgrammingError("Unsupported bound type: {0}".format(type(value)))
+    formatted: str = func(_formatter, _escape_presto, value)
+    return formatted
+
+
+def _range_bounds(lower: Any, upper: Any, npartitions: int) -> List[Any]:
+    """Splits [lower, upper] into at most `npartitions` ranges of equal width.
+
+    Integer and date ranges end at the exclusive bound `upper + 1`."""
+    if isinstance(lower, datetime):
+        width = (upper - lower) / npartitions
+        return [lower + width * i for i in range(npartitions)] + [upper]
+    elif isinstance(lower, date):
+        ordinals = _range_bounds(lower.toordinal(), upper.toordinal(), npartitions)
+        return [date.fromordinal(o) for o in ordinals]
+    elif isinstance(lower, int) and isinstance(upper, int):
+        size = upper - lower + 1
+        npartitions = max(1, min(npartitions, size))
+        return [lower + size * i // npartitions for i in range(npartitions)] + [
+            upper + 1
+        ]
+    else:
+        width = (upper - lower) / npartitions
+        return [lower + width * i for i in range(npartitions)] + [upper]
+
+
+def _partition_predicates(
+    column: str,
+    type_code: Any,
+    npartitions: int,
+    bounds: Optional[Tuple[Any, Any]],
+) -> List[str]:
+    """Returns one predicate per partition, which together select every row once.
+
+    Numeric, date and timestamp columns are split into ranges between `bounds`.
+    Other columns are split by the hash of their value."""
+    quoted = '"{0}"'.format(column.replace('"', '""'))
+    if npartitions <= 1:
+        return ["TRUE"]
+    if bounds is None:
+        hashed = "from_big_endian_64(xxhash64(to_utf8(coalesce(CAST({0} AS varchar), ''))))".format(
+            quoted
+        )
+        return [
+            "mod(mod({0}, {1}) + {1}, {1}) = {2}".format(hashed, npartitions, i)
+            for i in range(npartitions)
+        ]
+    lower, upper = bounds
+    if lower is None or upper is None:
+        return ["TRUE"]
+    if isinstance(lower, float) or isinstance(upper, float):
+        lower, upper = float(lower), float(upper)
+    elif isinstance(lower, Decimal) or isinstance(upper, Decimal):
+        lower, upper = Decimal(lower), Decimal(upper)
+    points = _range_bounds(lower, upper, npartitions)
+    exclusive = isinstance(points[-1], (int, date)) and not isinstance(
+        points[-1], datetime
+    )
+    predicates = []
+    for i in range(len(points) - 1):
+        predicate = "{0} >= {1} AND {0} {2} {3}".format(
+            quoted,
+            _format_literal(points[i]),
+            "<=" if i == len(points) - 2 and not exclusive else "<",
+            _format_literal(points[i + 1]),
+        )
+        if i == 0:
+            # Rows without a value do not fall into any range.
+            predicate = "({0}) OR {1} IS NULL".format(predicate, quoted)
+        predicates.append(predicate)
+    return predicates
+
+
+_RANGE_TYPES = frozenset(
+    (
+        "TINYINT",
+        "SMALLINT",
+        "INTEGER",
+        "BIGINT",
+        "REAL",
+        "FLOAT",
+        "DOUBLE",
+        "DECIMAL",
+        "NUMERIC",
+        "DATE",
+        "TIMESTAMP",
+    )
+)
+
+
+def _types_mapper(type_: "pa.DataType") -> Any:
+    # Nullable dtypes keep integer and boolean columns stable across partitions
+    # with and without NULL values.
+    import pandas as pd
+    import pyarrow as pa
+
+    mappings = {
+        pa.int8(): pd.Int8Dtype(),
+        pa.int16(): pd.Int16Dtype(),
+        pa.int32(): pd.Int32Dtype(),
+        pa.int64(): pd.Int64Dtype(),
+        pa.bool_(): pd.BooleanDtype(),
+    }
+    return mappings.get(type_)
+
+
+def _read_partition(
+    operation: str, connect_kwargs: Dict[str, Any], schema: "pa.Schema"
+) -> "DataFrame":
+    from pyathenajdbc import connect
+
+    _logger.debug(operation)
+    with contextlib.closing(connect(**connect_kwargs)) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(operation)
+            table = as_arrow(cursor)
+    return table.cast(schema).to_pandas(types_mapper=_types_mapper)
+
+
+def read_athena(
+    sql: str,
+    partition_on: Optional[str] = None,
+    npartitions: int = 1,
+    connect_kwargs: Optional[Dict[str, Any]] = None,
+    bounds: Optional[Tuple[Any, Any]] = None,
+) -> Any:
+    """Returns a Dask DataFrame of the query result.
+
+    The column types are taken from the `description` of a single `LIMIT 0` probe.
+    With `partition_on`, the result is split into `npartitions` filtered queries.
+    Numeric, date and timestamp columns are split into ranges between `bounds`,
+    queried with min/max if not given. Other columns are split by hash.
+
+    `connect_kwargs` are passed to `pyathenajdbc.connect` on the workers
+    and have to be picklable."""
+    import dask.dataframe as dd
+    from dask import delayed
+
+    from pyathenajdbc import connect
+
+    connect_kwargs = connect_kwargs if connect_kwargs else dict()
+    sql = sql.strip().rstrip(";")
+    subquery = "SELECT * FROM ({0}) AS t".format(sql)
+    with contextlib.closing(connect(**connect_kwargs)) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("{0} LIMIT 0".format(subquery))
+            description = cursor.description
+            if not description:
+                raise ProgrammingError("The query does not return a result set.")
+            predicates = ["TRUE"]
+            if partition_on:
+                types = {d[0]: d[1] for d in description}
+                if partition_on not in types:
+                    raise ProgrammingError(
+                        "Column `{0}` is not in the result.".format(partition_on)
+                    )
+                if types[partition_on] in _RANGE_TYPES and bounds is None:
+                    cursor.execute(
+                        'SELECT min("{0}"), max("{0}") FROM ({1}) AS t'.format(
+                            partition_on.replace('"', '""'), sql
+                        )
+                    )
+                    bounds = cursor.fetchone()
+                predicates = _partition_predicates(
+                    partition_on,
+                    types[partition_on],
+                    npartitions,
+                    bounds if types[partition_on] in _RANGE_TYPES else None,
+                )
+
+    schema = to_arrow_schema(description)
+    meta = schema.empty_table().to_pandas(types_mapper=_types_mapper)
+    parts = [
+        delayed(_read_partition)(
+            "{0} WHERE {1}".format(subquery, predicate), connect_kwargs, schema
+        )
+        for predicate in predicates
+    ]
+    return dd.from_delayed(parts, meta=meta)
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import logging
+import sys
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence
+
+if TYPE_CHECKING:
+    from pyathenajdbc.cursor import Cursor
+
+_logger = logging.getLogger(__name__)  # type: ignore
+
+
+class QueryListener(object):
+    """Receives the lifecycle events of the queries run by the cursors of a connection.
+
+    Override the methods of interest. Times are in seconds. Exceptions raised by
+    a listener are logged and do not affect the query."""
+
+    def before_execute(
+        self, cursor: "Cursor", operation: str, parameters: Optional[Dict[str, Any]]
+    ) -> None:
+        """Called before the operation is formatted."""
+
+    def after_execute(
+        self,
+        cursor: "Cursor",
+        query: str,
+        format_elapsed: float,
+        execute_elapsed: float,
+    ) -> None:
+        """Called after the driver returned from executing the formatted query.
+
+        `execute_elapsed` includes the time the query was queued and run in Athena."""
+
+    def on_fetch_batch(
+        self,
+        cursor: "Cursor",
+        rows: int,
+        bytes: int,
+        elapsed: float,
+        finished: bool,
+    ) -> None:
+        """Called for every `arraysize` rows fetched, which is the page size of the driver.
+
+        `elapsed` is the time spent in the cursor reading and converting the rows,
+        including the wait for the first row. `bytes` is the estimated size of
+        the converted rows. `finished` is true when the result set is exhausted."""
+
+    def on_close(self, cursor: "Cursor") -> None:
+        """Called when the cursor is closed."""
+
+    def on_error(
+        self, cursor: "Cursor", query: Optional[str], error: BaseException
+    ) -> None:
+        """Called when formatting, executing or fetching fails.
+
+        `query` is `None` if the operation could not be formatted."""
+
+
+def dispatch(
+    listeners: Sequence[QueryListener], event: str, *args: Any, **kwargs: Any
+) -> None:
+    for listener in listeners:
+        try:
+            getattr(listener, event)(*args, **kwargs)
+        except Exception:
+            _logger.exception("Listener %r failed on %s.", listener, event)
+
+
+def estimate_size(row: Any) -> int:
+    """Returns the estimated size of a fetched row in bytes."""
+    values = row.values() if isinstance(row, dict) else row
+    return sys.getsizeof(row) + sum(sys.getsizeof(v) for v in values)
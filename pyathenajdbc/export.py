@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""Stream a result set into Parquet or CSV files with bounded memory.
+
+Batches are fetched in the calling thread and handed to one writer thread per
+output file, so encoding, compression and I/O overlap with fetching. With
+`writers`, that many files are written concurrently and the batches are handed
+to them in turn. At most `_QUEUE_SIZE` batches per file are buffered."""
+import csv
+import logging
+import os
+import queue
+import threading
+from abc import ABCMeta, abstractmethod
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from pyathenajdbc.error import ProgrammingError
+from pyathenajdbc.util import DEFAULT_BATCH_SIZE
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+    from pyathenajdbc.cursor import Cursor
+
+_logger = logging.getLogger(__name__)  # type: ignore
+
+_QUEUE_SIZE: int = 2
+_PUT_TIMEOUT: float = 0.5
+
+
+class ExportResult(NamedTuple):
+    rows: int
+    bytes: int
+    paths: List[str]
+
+
+class _FileWriter(object, metaclass=ABCMeta):
+    @abstractmethod
+    def write(self, batch: Any) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+    @abstractmethod
+    def close(self) -> None:
+        raise NotImplementedError  # pragma: no cover
+
+
+class _ParquetFileWriter(_FileWriter):
+    def __init__(self, path: str, schema: "pa.Schema", compression: str) -> None:
+        import pyarrow.parquet as pq
+
+        self._writer = pq.ParquetWriter(path, schema, compression=compression)
+
+    def write(self, batch: "pa.RecordBatch") -> None:
+        import pyarrow as pa
+
+        # Each batch is written as one row group.
+        self._writer.write_table(pa.Table.from_batches([batch]))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class _CSVFileWriter(_FileWriter):
+    def __init__(
+        self, path: str, header: Optional[List[str]], **fmtparams: Any
+    ) -> None:
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file, **fmtparams)
+        if header:
+            self._writer.writerow(header)
+
+    def write(self, batch: List[Any]) -> None:
+        if batch and isinstance(batch[0], dict):
+            # Rows of the `dict_row` factory.
+            batch = [row.values() for row in batch]
+        self._writer.writerows(batch)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ShardWriterThread(threading.Thread):
+    def __init__(self, open_writer: Callable[[], _FileWriter], path: str) -> None:
+        super(_ShardWriterThread, self).__init__(name="pyathenajdbc-export")
+        self.daemon = True
+        self.path = path
+        self._open_writer = open_writer
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=_QUEUE_SIZE)
+        self._error: Optional[BaseException] = None
+        self._stopped = False
+
+    def run(self) -> None:
+        try:
+            writer = self._open_writer()
+            try:
+                while True:
+                    batch = self._queue.get()
+                    if batch is None:
+                        break
+                    writer.write(batch)
+            finally:
+                writer.close()
+        except BaseException as e:
+            self._error = e
+            # Unblock the producer.
+            while not self._queue.empty():
+                self._queue.get_nowait()
+
+    def put(self, batch: Any) -> None:
+        while True:
+            if self._error is not None or not self.is_alive():
+                self.finish()
+            try:
+                self._queue.put(batch, timeout=_PUT_TIMEOUT)
+                return
+            except queue.Full:
+                continue
+
+    def stop(self) -> None:
+        """Closes the file after the queued batches, without waiting for it."""
+        if not self._stopped:
+            self.put(None)
+            self._stopped = True
+
+    def finish(self) -> None:
+        if self.is_alive():
+            if not self._stopped:
+                self._stopped = True
+                self._queue.put(None)
+            self.join()
+        if self._error is not None:
+            raise self._error
+        if self.is_alive():
+            raise ProgrammingError("The writer thread is still running.")
+
+
+def _shard_path(path: str, shard: int, extension: str) -> str:
+    return os.path.join(path, "part-{0:05d}.{1}".format(shard, extension))
+
+
+def _export(
+    batches: Iterator[Any],
+    open_writer: Callable[[str], _FileWriter],
+    path: str,
+    extension: str,
+    max_rows_per_file: Optional[int],
+    writers: int,
+    slice_batch: Callable[[Any, int, int], Any],
+) -> ExportResult:
+    if max_rows_per_file is not None and max_rows_per_file <= 0:
+        raise ProgrammingError("max_rows_per_file must be a positive integer.")
+    if writers <= 0:
+        raise ProgrammingError("writers must be a positive integer.")
+    sharded = max_rows_per_file is not None or writers > 1
+    if sharded:
+        os.makedirs(path, exist_ok=True)
+
+    threads: List[_ShardWriterThread] = []
+
+    def _start() -> _ShardWriterThread:
+        shard_path = _shard_path(path, len(threads), extension) if sharded else path
+        thread = _ShardWriterThread(lambda: open_writer(shard_path), shard_path)
+        threads.append(thread)
+        thread.start()
+        return thread
+
+    # The shards being written, at most `writers`, and the rows handed to each.
+    active = [_start()]
+    shard_rows = [0]
+    rows, turn = 0, 0
+    try:
+        for batch in batches:
+            slot = turn % writers
+            turn += 1
+            if slot == len(active):
+                active.append(_start())
+                shard_rows.append(0)
+            num_rows = len(batch)
+            offset = 0
+            while offset < num_rows:
+                length = num_rows - offset
+                if max_rows_per_file:
+                    if shard_rows[slot] >= max_rows_per_file:
+                        active[slot].stop()
+                        active[slot] = _start()
+                        shard_rows[slot] = 0
+                    length = min(length, max_rows_per_file - shard_rows[slot])
+                active[slot].put(
+                    slice_batch(batch, offset, length) if length < num_rows else batch
+                )
+                offset += length
+                shard_rows[slot] += length
+                rows += length
+    finally:
+        errors = []
+        for thread in threads:
+            try:
+                thread.finish()
+            except BaseException as e:
+                errors.append(e)
+    if errors:
+        raise errors[0]
+    paths = [t.path for t in threads]
+    return ExportResult(rows, sum(os.path.getsize(p) for p in paths), paths)
+
+
+def _check_result_set(cursor: "Cursor") -> List[Tuple[Any, ...]]:
+    description: Optional[List[Tuple[Any, ...]]] = cursor.description
+    if not description:
+        raise ProgrammingError("No result set.")
+    return description
+
+
+def to_parquet(
+    cursor: "Cursor",
+    path: str,
+    row_group_size: int = DEFAULT_BATCH_SIZE,
+    compression: str = "snappy",
+    max_rows_per_file: Optional[int] = None,
+    writers: int = 1,
+) -> ExportResult:
+    """Writes the remaining rows of the cursor to a Parquet file.
+
+    With `max_rows_per_file` or `writers`, `path` is a directory and the rows are
+    split into `part-NNNNN.parquet` files, each written by its own thread.
+    `writers` files are written concurrently, batches are handed to them in turn,
+    so rows are not in the order of the result set across the files."""
+    from pyathenajdbc.util import iter_record_batches, to_arrow_schema
+
+    schema = to_arrow_schema(_check_result_set(cursor))
+    return _export(
+        iter_record_batches(cursor, schema, row_group_size),
+        lambda p: _ParquetFileWriter(p, schema, compression),
+        path,
+        "parquet",
+        max_rows_per_file,
+        writers,
+        lambda batch, offset, length: batch.slice(offset, length),
+    )
+
+
+def _iter_row_batches(
+    cursor: "Cursor", batch_size: int
+) -> Iterator[List[Tuple[Any, ...]]]:
+    rows: List[Tuple[Any, ...]] = []
+    while True:
+        fetched = cursor.fetchmany(cursor.arraysize)
+        rows.extend(fetched)
+        if len(rows) >= batch_size or (not fetched and rows):
+            yield rows
+            rows = []
+        if not fetched:
+            break
+
+
+def _slice_rows(
+    rows: List[Tuple[Any, ...]], offset: int, length: int
+) -> List[Tuple[Any, ...]]:
+    end = offset + length
+    return rows[offset:end]
+
+
+def to_csv(
+    cursor: "Cursor",
+    path: str,
+    header: bool = True,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_rows_per_file: Optional[int] = None,
+    writers: int = 1,
+    **fmtparams: Any
+) -> ExportResult:
+    """Writes the remaining rows of the cursor to a CSV file.
+
+    `fmtparams` are passed to `csv.writer`. NULL values are written as empty fields.
+    With `max_rows_per_file` or `writers`, `path` is a directory and the rows are
+    split into `part-NNNNN.csv` files, each with a header and written by its own
+    thread. `writers` files are written concurrently as with `to_parquet`."""
+    description = _check_result_set(cursor)
+    names = [d[0] for d in description] if header else None
+    return _export(
+        _iter_row_batches(cursor, batch_size),
+        lambda p: _CSVFileWriter(p, names, **fmtparams),
+        path,
+        "csv",
+        max_rows_per_file,
+        writers,
+        _slice_rows,
+    )
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import logging
+import re
 from abc import ABCMeta, abstractmethod
 from copy import deepcopy
 from datetime import date, datetime
@@ -11,6 +12,16 @@ from pyathenajdbc.error import ProgrammingError
 _logger = logging.getLogger(__name__)  # type: ignore
 _T = TypeVar("_T", bound="Formatter")
 
+# A LIMIT or FETCH clause at the end of the query, which applies to the whole query.
+_PATTERN_LIMIT = re.compile(r"\bLIMIT\s+(\d+|ALL)\s*$", re.IGNORECASE)
+_PATTERN_FETCH = re.compile(
+    r"\bFETCH\s+(FIRST|NEXT)\b[^;]*\bONLY\s*$|\bWITH\s+TIES\s*$", re.IGNORECASE
+)
+# String literals, quoted identifiers and comments, which may contain LIMIT, -- or ;.
+_PATTERN_MASKED = re.compile(
+    r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/", re.DOTALL
+)
+
 
 class Formatter(object, metaclass=ABCMeta):
     def __init__(
@@ -185,3 +196,32 @@ class DefaultParameterFormatter(Formatter):
                 )
 
         return (operation % kwargs).strip() if kwargs is not None else operation.strip()
+
+
+def limit_query(query: str, max_rows: int) -> str:
+    """Returns the SELECT query limited to `max_rows` rows.
+
+    A LIMIT at the end of the query is tightened, otherwise one is appended.
+    String literals, quoted identifiers and comments are ignored. Other statements,
+    and queries that cannot be tokenized, are returned as is."""
+    # Blanks out literals and comments, keeping the positions of the query.
+    masked = _PATTERN_MASKED.sub(lambda m: " " * len(m.group(0)), query)
+    if any(token in masked for token in ("'", '"', "/*")):
+        # An unterminated literal or comment.
+        return query
+    if not masked.lstrip().upper().startswith(("SELECT", "WITH")):
+        return query
+    end = len(masked.rstrip().rstrip(";").rstrip())
+    # The trailing comments, without the semicolon.
+    tail = "".join(c for c, m in zip(query[end:], masked[end:]) if m != ";").rstrip()
+    body = masked[:end]
+    if _PATTERN_FETCH.search(body):
+        return query
+    match = _PATTERN_LIMIT.search(body)
+    if match:
+        limit = match.group(1)
+        if limit.upper() != "ALL" and int(limit) <= max_rows:
+            return query[:end] + tail
+        return "{0}LIMIT {1}{2}".format(query[: match.start()], max_rows, tail)
+    # On a new line, in case the query ends with a comment.
+    return "{0}{1}\nLIMIT {2}".format(query[:end], tail, max_rows)
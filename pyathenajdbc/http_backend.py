@@ -0,0 +1,875 @@
+# -*- coding: utf-8 -*-
+"""HTTP backend.
+
+Runs queries through the Athena HTTP API instead of the JDBC driver, so no JVM is
+started. This suits short-lived processes such as AWS Lambda functions and CLI
+tools, where starting the JVM takes longer than the query.
+
+Connect with ``pyathenajdbc.connect(backend="http", ...)``. The cursor is the
+`pyathenajdbc.cursor.Cursor` of the JDBC backend, on top of the parts of the
+`java.sql` interfaces it uses: queries are started with StartQueryExecution,
+polled with GetQueryExecution and read with GetQueryResults, over a pool of
+keep-alive HTTP connections signed with AWS Signature Version 4. Converters,
+formatters, row factories and listeners work as with the JDBC backend.
+"""
+import configparser
+import hashlib
+import hmac
+import http.client
+import json
+import logging
+import os
+import random
+import re
+import ssl
+import threading
+import time
+import urllib.parse
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from pyathenajdbc.converter import (
+    DefaultJDBCTypeConverter,
+    JDBCTypeConverter,
+    get_jdbc_type_mappings,
+)
+from pyathenajdbc.cursor import Cursor
+from pyathenajdbc.error import (
+    DatabaseError,
+    NotSupportedError,
+    OperationalError,
+    ProgrammingError,
+)
+from pyathenajdbc.events import QueryListener
+from pyathenajdbc.formatter import DefaultParameterFormatter, Formatter
+from pyathenajdbc.profiler import Profiler
+from pyathenajdbc.row import RowFactory
+
+_logger = logging.getLogger(__name__)  # type: ignore
+
+_SERVICE: str = "athena"
+_TARGET_PREFIX: str = "AmazonAthena."
+_CONTENT_TYPE: str = "application/x-amz-json-1.1"
+_DEFAULT_CATALOG: str = "AwsDataCatalog"
+# Maximum of MaxResults of GetQueryResults.
+_MAX_RESULTS: int = 1000
+
+# Connection arguments that only apply to the JDBC backend.
+_JVM_OPTIONS: Tuple[str, ...] = (
+    "jvm_path",
+    "jvm_options",
+    "driver_path",
+    "log4j_conf",
+    "memory_budget",
+    "backpressure",
+)
+# Driver arguments used by the HTTP backend, the others are ignored.
+_DRIVER_OPTIONS: Tuple[str, ...] = (
+    "AwsRegion",
+    "Schema",
+    "Workgroup",
+    "Catalog",
+    "S3OutputLocation",
+    "EndpointOverride",
+    "User",
+    "Password",
+    "SessionToken",
+    "Profile",
+)
+
+_RETRYABLE_ERRORS: Tuple[str, ...] = (
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "InternalServerException",
+)
+
+# java.sql.Types name and display size of the Athena types,
+# the display size of the others is their precision.
+_COLUMN_TYPES: Dict[str, Tuple[str, Optional[int]]] = {
+    "boolean": ("BOOLEAN", 1),
+    "tinyint": ("TINYINT", 3),
+    "smallint": ("SMALLINT", 6),
+    "integer": ("INTEGER", 11),
+    "int": ("INTEGER", 11),
+    "bigint": ("BIGINT", 20),
+    "float": ("REAL", 14),
+    "real": ("REAL", 14),
+    "double": ("DOUBLE", 24),
+    "decimal": ("DECIMAL", None),
+    "char": ("CHAR", None),
+    "varchar": ("VARCHAR", None),
+    "string": ("VARCHAR", None),
+    "varbinary": ("VARBINARY", None),
+    "binary": ("VARBINARY", None),
+    "date": ("DATE", 10),
+    "timestamp": ("TIMESTAMP", 23),
+    "time": ("TIME", 12),
+    "array": ("ARRAY", None),
+}
+# Maps, rows, JSON and the other types are read as strings, as by the JDBC driver.
+_DEFAULT_COLUMN_TYPE: Tuple[str, Optional[int]] = ("VARCHAR", None)
+
+_PATTERN_TYPE_NAME = re.compile(r"^\s*([a-z ]+?)\s*(?:[(<].*)?$", re.IGNORECASE)
+
+
+class Credentials(NamedTuple):
+    access_key: str
+    secret_key: str
+    token: Optional[str] = None
+
+
+def _get_static_credentials(profile: Optional[str]) -> Optional[Credentials]:
+    access_key = os.getenv("AWS_ACCESS_KEY_ID", None)
+    secret_key = os.getenv("AWS_SECRET_ACCESS_KEY", None)
+    if access_key and secret_key:
+        return Credentials(access_key, secret_key, os.getenv("AWS_SESSION_TOKEN", None))
+
+    path = os.path.expanduser(
+        os.getenv(
+            "AWS_SHARED_CREDENTIALS_FILE", os.path.join("~", ".aws", "credentials")
+        )
+    )
+    profile = profile if profile else os.getenv("AWS_PROFILE", "default")
+    parser = configparser.ConfigParser()
+    parser.read(path)
+    if parser.has_section(profile):
+        section = parser[profile]
+        access_key = section.get("aws_access_key_id", None)
+        secret_key = section.get("aws_secret_access_key", None)
+        if access_key and secret_key:
+            return Credentials(
+                access_key, secret_key, section.get("aws_session_token", None)
+            )
+    return None
+
+
+def get_credentials_provider(
+    user: Optional[str] = None,
+    password: Optional[str] = None,
+    session_token: Optional[str] = None,
+    profile: Optional[str] = None,
+) -> Callable[[], Credentials]:
+    """Returns a function that returns the credentials to sign a request with.
+
+    The credentials given as `User` and `Password` (the access key ID and the secret
+    access key) are used as they are. Otherwise, if botocore is installed, they are
+    resolved by its credential provider chain with the `profile`, which includes
+    instance profiles, container credentials, web identity tokens and SSO, and
+    temporary credentials are refreshed before they expire. Without botocore, only
+    the `AWS_ACCESS_KEY_ID`, `AWS_SECRET_ACCESS_KEY` and `AWS_SESSION_TOKEN`
+    environment variables and the profile of the shared credentials file are read,
+    once, and are not refreshed."""
+    if user and password:
+        credentials = Credentials(user, password, session_token)
+        return lambda: credentials
+
+    try:
+        import botocore.exceptions
+        import botocore.session
+    except ImportError:
+        found = _get_static_credentials(profile)
+        if found is None:
+            raise ProgrammingError(
+                "No AWS credentials found in User and Password, the environment "
+                "variables or the shared credentials file. Install botocore to "
+                "use the other sources of credentials, such as instance profiles."
+            )
+        static_credentials: Credentials = found
+        return lambda: static_credentials
+
+    try:
+        resolved = botocore.session.Session(profile=profile).get_credentials()
+    except botocore.exceptions.BotoCoreError as e:
+        raise ProgrammingError(
+            "Failed to resolve AWS credentials: {0}".format(e)
+        ) from e
+    if resolved is None:
+        raise ProgrammingError("No AWS credentials found.")
+
+    def _get() -> Credentials:
+        try:
+            # Refreshes temporary credentials that are about to expire.
+            frozen = resolved.get_frozen_credentials()
+        except botocore.exceptions.BotoCoreError as e:
+            raise OperationalError(
+                "Failed to refresh AWS credentials: {0}".format(e)
+            ) from e
+        return Credentials(frozen.access_key, frozen.secret_key, frozen.token)
+
+    return _get
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+
+def sign_request(
+    method: str,
+    host: str,
+    path: str,
+    headers: Dict[str, str],
+    body: bytes,
+    credentials: Credentials,
+    region: str,
+    service: str = _SERVICE,
+    now: Optional[datetime] = None,
+) -> Dict[str, str]:
+    """Returns `headers` with the `Host`, `X-Amz-Date` and `Authorization`
+    headers of AWS Signature Version 4, and `X-Amz-Security-Token` with
+    temporary credentials. `path` may contain a query string."""
+    now = now if now else datetime.now(timezone.utc)
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    headers = dict(headers)
+    headers["Host"] = host
+    headers["X-Amz-Date"] = amz_date
+    if credentials.token:
+        headers["X-Amz-Security-Token"] = credentials.token
+
+    url = urllib.parse.urlsplit(path)
+    query = sorted(urllib.parse.parse_qsl(url.query, keep_blank_values=True))
+    canonical_headers = sorted(
+        (k.lower(), " ".join(v.strip().split())) for k, v in headers.items()
+    )
+    signed_headers = ";".join(k for k, _ in canonical_headers)
+    canonical_request = "\n".join(
+        [
+            method,
+            urllib.parse.quote(url.path if url.path else "/", safe="/~"),
+            "&".join(
+                "{0}={1}".format(
+                    urllib.parse.quote(k, safe="~"), urllib.parse.quote(v, safe="~")
+                )
+                for k, v in query
+            ),
+            "".join("{0}:{1}\n".format(k, v) for k, v in canonical_headers),
+            signed_headers,
+            hashlib.sha256(body).hexdigest(),
+        ]
+    )
+    scope = "{0}/{1}/{2}/aws4_request".format(now.strftime("%Y%m%d"), region, service)
+    string_to_sign = "\n".join(
+        [
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        ]
+    )
+    key = ("AWS4" + credentials.secret_key).encode("utf-8")
+    for part in (now.strftime("%Y%m%d"), region, service, "aws4_request"):
+        key = _hmac(key, part)
+    signature = hmac.new(
+        key, string_to_sign.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+    headers["Authorization"] = "{0} Credential={1}/{2}, {3}, {4}".format(
+        "AWS4-HMAC-SHA256",
+        credentials.access_key,
+        scope,
+        "SignedHeaders=" + signed_headers,
+        "Signature=" + signature,
+    )
+    return headers
+
+
+class _Client(object):
+    """Calls the Athena API over a pool of keep-alive HTTP connections.
+
+    Throttled and failed calls are retried `max_retries` times with
+    exponential backoff. Calls are idempotent (StartQueryExecution is
+    given a client request token), so they can be retried safely."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        region: str,
+        credentials: Callable[[], Credentials],
+        timeout: Optional[float],
+        max_connections: int,
+        max_retries: int,
+    ) -> None:
+        url = urllib.parse.urlsplit(endpoint)
+        if url.scheme not in ("http", "https") or not url.netloc:
+            raise ProgrammingError("Invalid endpoint: {0}".format(endpoint))
+        self._https = url.scheme == "https"
+        self._host = url.netloc
+        self._path = url.path if url.path else "/"
+        self._region = region
+        self._credentials = credentials
+        self._timeout = timeout
+        self._max_connections = max_connections
+        self._max_retries = max_retries
+        self._ssl_context = ssl.create_default_context() if self._https else None
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        with self._lock:
+            if self._closed:
+                raise ProgrammingError("Connection is closed.")
+            if self._idle:
+                return self._idle.pop()
+        if self._https:
+            return http.client.HTTPSConnection(
+                self._host, timeout=self._timeout, context=self._ssl_context
+            )
+        return http.client.HTTPConnection(self._host, timeout=self._timeout)
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if not self._closed and len(self._idle) < self._max_connections:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    @staticmethod
+    def _backoff(attempt: int) -> None:
+        time.sleep(random.uniform(0, min(5.0, 0.05 * 2**attempt)))
+
+    def call(self, operation: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        body = json.dumps(params).encode("utf-8")
+        attempt = 0
+        while True:
+            headers = sign_request(
+                "POST",
+                self._host,
+                self._path,
+                {
+                    "Content-Type": _CONTENT_TYPE,
+                    "X-Amz-Target": _TARGET_PREFIX + operation,
+                },
+                body,
+                self._credentials(),
+                self._region,
+            )
+            conn = self._acquire()
+            try:
+                conn.request("POST", self._path, body, headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                # Also raised when the server closed an idle connection of the pool.
+                conn.close()
+                if attempt >= self._max_retries:
+                    raise OperationalError(
+                        "Failed to call {0}: {1}".format(operation, e)
+                    ) from e
+                _logger.debug("Failed to call %s, retrying.", operation, exc_info=True)
+            else:
+                if response.will_close:
+                    conn.close()
+                else:
+                    self._release(conn)
+                if response.status == 200:
+                    result: Dict[str, Any] = json.loads(data.decode("utf-8"))
+                    return result
+                code, message = self._parse_error(response.status, data)
+                retryable = code in _RETRYABLE_ERRORS or response.status >= 500
+                if not retryable or attempt >= self._max_retries:
+                    exc_class = OperationalError if retryable else DatabaseError
+                    raise exc_class("{0}: {1}".format(code, message))
+                _logger.debug("%s of %s, retrying.", code, operation)
+            self._backoff(attempt)
+            attempt += 1
+
+    @staticmethod
+    def _parse_error(status: int, data: bytes) -> Tuple[str, str]:
+        try:
+            error = json.loads(data.decode("utf-8"))
+        except ValueError:
+            return "HTTP {0}".format(status), data.decode("utf-8", "replace")
+        code = str(error.get("__type", "HTTP {0}".format(status))).split("#")[-1]
+        message = error.get("message", error.get("Message", ""))
+        return code, message
+
+
+class _JavaString(str):
+    """A value read with `toString()`, as `java.sql.Date`, `Timestamp` and `Array`."""
+
+    __slots__ = ()
+
+    def toString(self) -> str:
+        return str.__str__(self)
+
+
+def _get_column_type(type_name: str) -> Tuple[str, Optional[int]]:
+    match = _PATTERN_TYPE_NAME.match(type_name)
+    base = match.group(1).lower() if match else type_name.lower()
+    return _COLUMN_TYPES.get(base, _DEFAULT_COLUMN_TYPE)
+
+
+class _ResultSetMetaData(object):
+    """The parts of `java.sql.ResultSetMetaData` used by the cursor,
+    from the `ColumnInfo` of GetQueryResults."""
+
+    def __init__(self, columns: List[Dict[str, Any]]) -> None:
+        name_mappings, _ = get_jdbc_type_mappings()
+        self._columns = columns
+        self._types = [_get_column_type(c.get("Type", "")) for c in columns]
+        self._type_codes = [name_mappings[name] for name, _ in self._types]
+
+    @property
+    def names(self) -> List[Optional[str]]:
+        return [c.get("Name", None) for c in self._columns]
+
+    def getColumnCount(self) -> int:
+        return len(self._columns)
+
+    def getColumnName(self, column: int) -> str:
+        return str(self._columns[column - 1].get("Name", ""))
+
+    def getColumnType(self, column: int) -> Any:
+        return self._type_codes[column - 1]
+
+    def getColumnDisplaySize(self, column: int) -> int:
+        display_size = self._types[column - 1][1]
+        if display_size is None:
+            return self.getPrecision(column)
+        return display_size
+
+    def getPrecision(self, column: int) -> int:
+        return int(self._columns[column - 1].get("Precision", 0))
+
+    def getScale(self, column: int) -> int:
+        return int(self._columns[column - 1].get("Scale", 0))
+
+    def isNullable(self, column: int) -> int:
+        # As the JDBC driver, columns of unknown nullability are nullable.
+        return 0 if self._columns[column - 1].get("Nullable") == "NOT_NULL" else 1
+
+
+class _ResultSet(object):
+    """The parts of `java.sql.ResultSet` used by the cursor and the converters,
+    reading the pages of GetQueryResults. Values are the strings of the API,
+    converted by the getters as by the JDBC driver."""
+
+    def __init__(
+        self,
+        connection: "HTTPConnection",
+        query_id: str,
+        page: Dict[str, Any],
+        header: bool,
+        max_rows: int,
+    ) -> None:
+        self._connection = connection
+        self._query_id = query_id
+        result_set = page.get("ResultSet", {})
+        self._meta_data = _ResultSetMetaData(
+            result_set.get("ResultSetMetadata", {}).get("ColumnInfo", [])
+        )
+        self._max_rows = max_rows
+        self._fetch_size = _MAX_RESULTS
+        self._count = 0
+        self._rows: List[List[Optional[str]]] = []
+        self._index = -1
+        self._row: List[Optional[str]] = []
+        self._next_token: Optional[str] = None
+        self._was_null = False
+        self._closed = False
+        self._set_page(page)
+        # The first row of the results of a SELECT query holds the column names.
+        if header and self._rows and self._rows[0] == self._meta_data.names:
+            del self._rows[0]
+
+    def _set_page(self, page: Dict[str, Any]) -> None:
+        self._rows = [
+            [d.get("VarCharValue", None) for d in row.get("Data", [])]
+            for row in page.get("ResultSet", {}).get("Rows", [])
+        ]
+        self._index = -1
+        self._next_token = page.get("NextToken", None)
+
+    def _fetch_page(self) -> None:
+        max_results = self._fetch_size
+        if self._max_rows:
+            max_results = min(max_results, self._max_rows - self._count)
+        self._set_page(
+            self._connection._call(
+                "GetQueryResults",
+                {
+                    "QueryExecutionId": self._query_id,
+                    "NextToken": self._next_token,
+                    "MaxResults": max(1, max_results),
+                },
+            )
+        )
+
+    def next(self) -> bool:
+        if self._closed or (self._max_rows and self._count >= self._max_rows):
+            return False
+        self._index += 1
+        while self._index >= len(self._rows):
+            if not self._next_token:
+                return False
+            self._fetch_page()
+            self._index = 0
+        self._row = self._rows[self._index]
+        self._count += 1
+        return True
+
+    def _get(self, column: int) -> Optional[str]:
+        value = self._row[column - 1]
+        self._was_null = value is None
+        return value
+
+    def wasNull(self) -> bool:
+        return self._was_null
+
+    def getString(self, column: int) -> Optional[str]:
+        return self._get(column)
+
+    getObject = getString
+
+    def getLong(self, column: int) -> int:
+        value = self._get(column)
+        return int(value) if value is not None else 0
+
+    def getDouble(self, column: int) -> float:
+        value = self._get(column)
+        return float(value) if value is not None else 0.0
+
+    def getBoolean(self, column: int) -> bool:
+        return self._get(column) == "true"
+
+    def getDate(self, column: int) -> Optional[_JavaString]:
+        value = self._get(column)
+        return _JavaString(value) if value is not None else None
+
+    getTimestamp = getDate
+
+    def getArray(self, column: int) -> Optional[_JavaString]:
+        value = self._get(column)
+        if value is None:
+            return None
+        # The JDBC driver returns the elements without the brackets.
+        if value.startswith("[") and value.endswith("]"):
+            value = value[1:-1]
+        return _JavaString(value)
+
+    def setFetchSize(self, rows: int) -> None:
+        self._fetch_size = min(max(1, rows), _MAX_RESULTS)
+
+    def getMetaData(self) -> _ResultSetMetaData:
+        return self._meta_data
+
+    def isClosed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        self._closed = True
+        self._rows = []
+
+
+class _Statement(object):
+    """The parts of `java.sql.Statement` used by the cursor.
+
+    `cancel` may be called from another thread while `execute` is waiting
+    for the query, which then raises `DatabaseError`."""
+
+    def __init__(self, connection: "HTTPConnection") -> None:
+        self._connection = connection
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._query_id: Optional[str] = None
+        self._result_set: Optional[_ResultSet] = None
+        self._update_count: int = -1
+        self._max_rows: int = 0
+        self._closed = False
+
+    def setMaxRows(self, max_rows: int) -> None:
+        self._max_rows = max_rows
+
+    def setQueryTimeout(self, seconds: int) -> None:
+        """Does nothing, the cursor cancels the queries that time out."""
+        pass
+
+    def execute(self, sql: str) -> bool:
+        if self._result_set is not None:
+            self._result_set.close()
+        self._result_set = None
+        self._update_count = -1
+        with self._lock:
+            self._query_id = None
+            self._cancelled.clear()
+        query_id = self._connection._start_query(sql)
+        with self._lock:
+            self._query_id = query_id
+        if self._cancelled.is_set():
+            self._connection._stop_query(query_id)
+        execution = self._connection._wait_query(query_id, self._cancelled)
+
+        max_results = _MAX_RESULTS
+        if self._max_rows:
+            # One more row for the column names.
+            max_results = min(max_results, self._max_rows + 1)
+        page = self._connection._call(
+            "GetQueryResults",
+            {"QueryExecutionId": query_id, "MaxResults": max_results},
+        )
+        columns = page.get("ResultSet", {}).get("ResultSetMetadata", {})
+        if not columns.get("ColumnInfo", None):
+            self._update_count = int(page.get("UpdateCount", 0))
+            return False
+        self._result_set = _ResultSet(
+            self._connection,
+            query_id,
+            page,
+            execution.get("StatementType", None) == "DML",
+            self._max_rows,
+        )
+        return True
+
+    def getResultSet(self) -> Optional[_ResultSet]:
+        return self._result_set
+
+    def getUpdateCount(self) -> int:
+        return self._update_count
+
+    def cancel(self) -> None:
+        with self._lock:
+            query_id = self._query_id
+            if query_id is None:
+                # `execute` stops the query once started.
+                self._cancelled.set()
+                return
+        try:
+            self._connection._stop_query(query_id)
+        finally:
+            self._cancelled.set()
+
+    def isClosed(self) -> bool:
+        return self._closed
+
+    def close(self) -> None:
+        if self._result_set is not None:
+            self._result_set.close()
+        self._result_set = None
+        self._closed = True
+
+
+class HTTPConnection(object):
+    """A connection of the HTTP backend, see `pyathenajdbc.http_backend`.
+
+    Takes the `AwsRegion`, `Schema`, `Workgroup`, `Catalog` and `S3OutputLocation`
+    driver arguments, `EndpointOverride` for another endpoint, and the credentials
+    described in `get_credentials_provider`. Queries are polled every `poll_interval`
+    seconds, doubled up to `max_poll_interval`."""
+
+    _ENV_S3_STAGING_DIR: str = "AWS_ATHENA_S3_STAGING_DIR"
+    _ENV_S3_OUTPUT_LOCATION: str = "AWS_ATHENA_S3_OUTPUT_LOCATION"
+    _ENV_WORK_GROUP: str = "AWS_ATHENA_WORK_GROUP"
+
+    def __init__(
+        self,
+        converter: Optional[JDBCTypeConverter] = None,
+        formatter: Optional[Formatter] = None,
+        row_factory: Optional[RowFactory] = None,
+        listeners: Optional[List[QueryListener]] = None,
+        profile: bool = False,
+        timeout: Optional[float] = 60.0,
+        max_connections: int = 10,
+        max_retries: int = 3,
+        poll_interval: float = 0.05,
+        max_poll_interval: float = 1.0,
+        **driver_kwargs
+    ) -> None:
+        for option in _JVM_OPTIONS:
+            if driver_kwargs.get(option) is not None:
+                raise NotSupportedError(
+                    "`{0}` is not supported by the HTTP backend.".format(option)
+                )
+            driver_kwargs.pop(option, None)
+        for option in driver_kwargs.keys():
+            if option not in _DRIVER_OPTIONS:
+                _logger.warning("%s is ignored by the HTTP backend.", option)
+        self._driver_kwargs = driver_kwargs
+        self.region_name = self._driver_kwargs.get(
+            "AwsRegion", os.getenv("AWS_DEFAULT_REGION", None)
+        )
+        if not self.region_name:
+            raise ProgrammingError("AwsRegion is required.")
+        self.schema_name = self._driver_kwargs.get("Schema", "default")
+        self.work_group = self._driver_kwargs.get(
+            "Workgroup", os.getenv(self._ENV_WORK_GROUP, None)
+        )
+        self.catalog_name = self._driver_kwargs.get("Catalog", _DEFAULT_CATALOG)
+        self.s3_output_location = self._driver_kwargs.get(
+            "S3OutputLocation",
+            os.getenv(
+                self._ENV_S3_OUTPUT_LOCATION, os.getenv(self._ENV_S3_STAGING_DIR, None)
+            ),
+        )
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._client: Optional[_Client] = _Client(
+            self._driver_kwargs.get(
+                "EndpointOverride",
+                "https://athena.{0}.amazonaws.com".format(self.region_name),
+            ),
+            self.region_name,
+            get_credentials_provider(
+                self._driver_kwargs.get("User", None),
+                self._driver_kwargs.get("Password", None),
+                self._driver_kwargs.get("SessionToken", None),
+                self._driver_kwargs.get("Profile", None),
+            ),
+            timeout,
+            max_connections,
+            max_retries,
+        )
+        self._converter = converter if converter else DefaultJDBCTypeConverter()
+        self._formatter = formatter if formatter else DefaultParameterFormatter()
+        self._row_factory = row_factory
+        self.listeners: List[QueryListener] = list(listeners) if listeners else []
+        self.profiler: Optional[Profiler] = Profiler() if profile else None
+
+    def _call(self, operation: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if self._client is None:
+            raise ProgrammingError("Connection is closed.")
+        return self._client.call(operation, params)
+
+    def _start_query(self, sql: str) -> str:
+        request: Dict[str, Any] = {
+            "QueryString": sql,
+            "ClientRequestToken": str(uuid.uuid4()),
+            "QueryExecutionContext": {
+                "Database": self.schema_name,
+                "Catalog": self.catalog_name,
+            },
+        }
+        if self.work_group:
+            request["WorkGroup"] = self.work_group
+        if self.s3_output_location:
+            request["ResultConfiguration"] = {"OutputLocation": self.s3_output_location}
+        query_id: str = self._call("StartQueryExecution", request)["QueryExecutionId"]
+        _logger.debug("Query %s started.", query_id)
+        return query_id
+
+    def _stop_query(self, query_id: str) -> None:
+        self._call("StopQueryExecution", {"QueryExecutionId": query_id})
+
+    def _wait_query(self, query_id: str, cancelled: threading.Event) -> Dict[str, Any]:
+        """Returns the QueryExecution of the query once it succeeded."""
+        interval = self.poll_interval
+        while True:
+            execution: Dict[str, Any] = self._call(
+                "GetQueryExecution", {"QueryExecutionId": query_id}
+            )["QueryExecution"]
+            status = execution.get("Status", {})
+            state = status.get("State", None)
+            if state == "SUCCEEDED":
+                return execution
+            elif state == "FAILED":
+                raise DatabaseError(status.get("StateChangeReason", "Query failed."))
+            elif state == "CANCELLED":
+                raise DatabaseError("Query was cancelled.")
+            if cancelled.wait(interval):
+                raise DatabaseError("Query was cancelled.")
+            interval = min(interval * 2, self.max_poll_interval)
+
+    def createStatement(self) -> _Statement:
+        """The `java.sql.Connection` method the cursor creates its statement with."""
+        if self.is_closed:
+            raise ProgrammingError("Connection is closed.")
+        return _Statement(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def cursor(self, **kwargs) -> Cursor:
+        if self.is_closed:
+            raise ProgrammingError("Connection is closed.")
+        kwargs.setdefault("row_factory", self._row_factory)
+        kwargs.setdefault("listeners", self.listeners)
+        kwargs.setdefault("profiler", self.profiler)
+        return Cursor(self, self._converter, self._formatter, **kwargs)
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    @property
+    def is_closed(self) -> bool:
+        return self._client is None
+
+    def _paginate(
+        self, operation: str, params: Dict[str, Any], key: str
+    ) -> List[Dict[str, Any]]:
+        items: List[Dict[str, Any]] = []
+        request = dict(params)
+        while True:
+            response = self._call(operation, request)
+            items.extend(response.get(key, []))
+            next_token = response.get("NextToken", None)
+            if not next_token:
+                return items
+            request["NextToken"] = next_token
+
+    def get_schema_names(self) -> List[str]:
+        """Returns the schema names from ListDatabases."""
+        databases = self._paginate(
+            "ListDatabases", {"CatalogName": self.catalog_name}, "DatabaseList"
+        )
+        return [d["Name"] for d in databases]
+
+    def get_table_names(self, schema: Optional[str] = None) -> List[str]:
+        """Returns the table names in the schema from ListTableMetadata."""
+        return [t["Name"] for t in self._get_table_metadata(schema, None)]
+
+    def _get_table_metadata(
+        self, schema: Optional[str], table_name: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        params = {
+            "CatalogName": self.catalog_name,
+            "DatabaseName": schema if schema else self.schema_name,
+        }
+        if table_name:
+            params["TableName"] = table_name
+            return [self._call("GetTableMetadata", params)["TableMetadata"]]
+        return self._paginate("ListTableMetadata", params, "TableMetadataList")
+
+    def get_columns(
+        self, schema: Optional[str] = None, table_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Returns the columns of the table, or of all tables in the schema
+        if `table_name` is not specified, from ListTableMetadata.
+
+        `jdbc_type` is the `java.sql.Types` name the JDBC driver gives the type."""
+        columns = []
+        for table in self._get_table_metadata(schema, table_name):
+            table_columns = table.get("Columns", []) + table.get("PartitionKeys", [])
+            for i, column in enumerate(table_columns):
+                columns.append(
+                    {
+                        "table_name": table["Name"],
+                        "column_name": column["Name"],
+                        "type_name": column.get("Type", None),
+                        "jdbc_type": _get_column_type(column.get("Type", ""))[0],
+                        "nullable": True,
+                        "default": None,
+                        "ordinal_position": i + 1,
+                        "comment": column.get("Comment", None) or None,
+                    }
+                )
+        return columns
+
+    def commit(self) -> None:
+        """Athena JDBC connection is only supported for auto-commit mode."""
+        pass
+
+    def rollback(self) -> None:
+        raise NotSupportedError(
+            "Athena JDBC connection is only supported for auto-commit mode."
+        )
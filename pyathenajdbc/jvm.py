@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+"""Memory telemetry of the embedded JVM, fetch backpressure and JVM memory sizing."""
+import logging
+import re
+import time
+from typing import Callable, List, NamedTuple, Optional, Union
+
+from pyathenajdbc.error import ProgrammingError
+from pyathenajdbc.util import attach_thread_to_jvm
+
+_logger = logging.getLogger(__name__)  # type: ignore
+
+_UNITS = {"": 1, "k": 1024, "m": 1024**2, "g": 1024**3, "t": 1024**4}
+
+# Below this heap size, the serial collector avoids the threads and memory
+# overhead of G1 in a JVM embedded in a Python process.
+_SERIAL_GC_MAX_HEAP: int = 1024**3
+
+
+class MemoryUsage(NamedTuple):
+    """Memory usage in bytes. `max` is -1 if undefined."""
+
+    used: int
+    committed: int
+    max: int
+
+    @property
+    def ratio(self) -> float:
+        """Used over max, or over committed if max is undefined."""
+        limit = self.max if self.max > 0 else self.committed
+        return self.used / limit if limit > 0 else 0.0
+
+
+class GCStats(NamedTuple):
+    """Collections run by a garbage collector and their cumulative time in seconds."""
+
+    name: str
+    collection_count: int
+    collection_time: float
+
+
+class JVMStats(NamedTuple):
+    heap: MemoryUsage
+    non_heap: MemoryUsage
+    gcs: List[GCStats]
+
+    @property
+    def gc_count(self) -> int:
+        return sum(gc.collection_count for gc in self.gcs if gc.collection_count > 0)
+
+    @property
+    def gc_time(self) -> float:
+        return sum(gc.collection_time for gc in self.gcs if gc.collection_time > 0)
+
+
+def _to_memory_usage(usage) -> MemoryUsage:
+    return MemoryUsage(
+        int(usage.getUsed()), int(usage.getCommitted()), int(usage.getMax())
+    )
+
+
+def _check_jvm_started() -> None:
+    import jpype
+
+    if not jpype.isJVMStarted():
+        raise ProgrammingError("JVM is not started.")
+
+
+@attach_thread_to_jvm
+def _get_heap_usage() -> MemoryUsage:
+    import jpype
+
+    bean = jpype.java.lang.management.ManagementFactory.getMemoryMXBean()
+    return _to_memory_usage(bean.getHeapMemoryUsage())
+
+
+def heap_usage() -> MemoryUsage:
+    """Returns the heap usage of the JVM from its `MemoryMXBean`."""
+    _check_jvm_started()
+    usage: MemoryUsage = _get_heap_usage()
+    return usage
+
+
+@attach_thread_to_jvm
+def _get_jvm_stats() -> JVMStats:
+    import jpype
+
+    factory = jpype.java.lang.management.ManagementFactory
+    memory = factory.getMemoryMXBean()
+    return JVMStats(
+        heap=_to_memory_usage(memory.getHeapMemoryUsage()),
+        non_heap=_to_memory_usage(memory.getNonHeapMemoryUsage()),
+        gcs=[
+            GCStats(
+                str(gc.getName()),
+                int(gc.getCollectionCount()),
+                int(gc.getCollectionTime()) / 1000,
+            )
+            for gc in factory.getGarbageCollectorMXBeans()
+        ],
+    )
+
+
+def jvm_stats() -> JVMStats:
+    """Returns the heap and non-heap usage of the JVM from its `MemoryMXBean`,
+    and the collection counts and times of its `GarbageCollectorMXBean`s."""
+    _check_jvm_started()
+    stats: JVMStats = _get_jvm_stats()
+    return stats
+
+
+class BackpressurePolicy(object):
+    """Slows down fetching when the heap usage of the JVM passes `threshold`.
+
+    It is checked each time the driver is about to fetch the next page of the
+    result set. Above `threshold`, the fetch size is halved down to
+    `min_fetch_size`, and with `max_pause` the next page is not fetched until
+    the usage falls below `resume_threshold` or `max_pause` seconds have passed.
+    Below `resume_threshold`, the fetch size is doubled back up to `arraysize`.
+
+    The driver may still prefetch pages in its own threads; the pause only delays
+    reading the next page from Python, so the rows held by the cursor and the
+    driver buffers can be collected meanwhile."""
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        resume_threshold: Optional[float] = None,
+        min_fetch_size: int = 100,
+        max_pause: float = 0.0,
+        poll_interval: float = 0.05,
+        usage: Optional[Callable[[], float]] = None,
+    ) -> None:
+        if not 0 < threshold <= 1:
+            raise ProgrammingError("threshold must be in (0, 1].")
+        self.threshold = threshold
+        self.resume_threshold = (
+            resume_threshold if resume_threshold is not None else threshold * 0.75
+        )
+        self.min_fetch_size = min_fetch_size
+        self.max_pause = max_pause
+        self.poll_interval = poll_interval
+        self._usage = usage if usage else lambda: _get_heap_usage().ratio
+        self.shrinks: int = 0
+        self.pauses: int = 0
+        self.pause_elapsed: float = 0.0
+
+    def _pause(self) -> None:
+        self.pauses += 1
+        start = time.perf_counter()
+        deadline = start + self.max_pause
+        while time.perf_counter() < deadline:
+            time.sleep(self.poll_interval)
+            if self._usage() < self.resume_threshold:
+                break
+        self.pause_elapsed += time.perf_counter() - start
+
+    def apply(self, fetch_size: int, max_fetch_size: int) -> int:
+        """Returns the fetch size of the next page."""
+        usage = self._usage()
+        if usage >= self.threshold:
+            _logger.debug("Heap usage %.2f is above the threshold.", usage)
+            if fetch_size > self.min_fetch_size:
+                fetch_size = max(self.min_fetch_size, fetch_size // 2)
+                self.shrinks += 1
+            if self.max_pause > 0:
+                self._pause()
+        elif usage < self.resume_threshold and fetch_size < max_fetch_size:
+            fetch_size = min(max_fetch_size, fetch_size * 2)
+        return fetch_size
+
+
+def parse_size(size: Union[int, str]) -> int:
+    """Returns the bytes of a size in bytes or a string like `512m` or `2g`."""
+    if isinstance(size, int):
+        value = size
+    else:
+        match = re.match(r"^\s*(\d+)\s*([kmgt]?)b?\s*$", str(size), re.IGNORECASE)
+        if not match:
+            raise ProgrammingError("Invalid memory size: {0}".format(size))
+        value = int(match.group(1)) * _UNITS[match.group(2).lower()]
+    if value <= 0:
+        raise ProgrammingError("Invalid memory size: {0}".format(size))
+    return value
+
+
+def memory_options(
+    memory_budget: Union[int, str], jvm_options: Optional[List[str]] = None
+) -> List[str]:
+    """Returns the JVM options that keep the JVM within `memory_budget`.
+
+    Three quarters of the budget are given to the heap and the rest to the
+    metaspace, direct buffers and the JVM itself. The serial collector is used
+    below 1 GiB of heap, G1 otherwise. Options already in `jvm_options` are kept,
+    and the initial heap and the collector follow an `-Xmx` given there."""
+    budget = parse_size(memory_budget)
+    heap = max(64 * 1024**2, budget * 3 // 4) // 1024**2
+    rest = max(32, budget // 1024**2 - heap)
+    given = jvm_options if jvm_options else []
+    given_heap = [opt[4:] for opt in given if opt.startswith("-Xmx")]
+    if given_heap:
+        # An -Xms above the -Xmx in effect would fail to start the JVM.
+        heap = max(1, parse_size(given_heap[-1]) // 1024**2)
+    options = [
+        "-Xmx{0}m".format(heap),
+        "-Xms{0}m".format(min(heap, max(16, heap // 4))),
+        "-XX:MaxMetaspaceSize={0}m".format(max(32, min(256, rest // 2))),
+        "-XX:MaxDirectMemorySize={0}m".format(max(16, rest // 4)),
+    ]
+    if heap * 1024**2 < _SERIAL_GC_MAX_HEAP:
+        gc_options = ["-XX:+UseSerialGC"]
+    else:
+        gc_options = ["-XX:+UseG1GC", "-XX:MaxGCPauseMillis=200"]
+
+    given_gc = any(re.match(r"^-XX:[+-]Use\w+GC$", opt) for opt in given)
+    if not given_gc:
+        options.extend(gc_options)
+    return [
+        opt
+        for opt in options
+        if not any(g.startswith(re.split(r"[0-9=]", opt, 1)[0]) for g in given)
+    ]
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""Run queries in worker processes, each with its own JVM and connection.
+
+Row conversion is pure Python and holds the GIL, so heavy extracts do not scale
+with threads. The workers convert rows to Arrow record batches and return them
+in the Arrow IPC stream format, which the parent reads without copying.
+
+Worker processes are started with the `spawn` method, so the calling module
+has to be importable (guarded by ``if __name__ == "__main__":``)."""
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing.util import Finalize
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence
+
+from pyathenajdbc.error import Error, OperationalError, ProgrammingError
+from pyathenajdbc.util import DEFAULT_BATCH_SIZE
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+_logger = logging.getLogger(__name__)  # type: ignore
+
+_CANCEL_POLL_INTERVAL: float = 0.1
+
+# State of a worker process.
+_connect_kwargs: Dict[str, Any] = dict()
+_connection: Optional[Any] = None
+_cancel_generation: Optional[Any] = None
+_running: Optional[Any] = None
+
+
+def _init_worker(connect_kwargs: Dict[str, Any], cancel_generation: Any) -> None:
+    global _connect_kwargs, _cancel_generation
+    _connect_kwargs = connect_kwargs
+    _cancel_generation = cancel_generation
+    watcher = threading.Thread(target=_watch_cancel, name="pyathenajdbc-cancel")
+    watcher.daemon = True
+    watcher.start()
+
+
+def _is_cancelled(generation: int) -> bool:
+    return _cancel_generation is not None and _cancel_generation.value > generation
+
+
+def _watch_cancel() -> None:
+    # Statement.cancel is called from this thread while the worker's main thread
+    # is blocked in execute or fetch.
+    cancelled = None
+    while True:
+        time.sleep(_CANCEL_POLL_INTERVAL)
+        running = _running
+        if running is None or running is cancelled:
+            continue
+        cursor, generation = running
+        if _is_cancelled(generation):
+            cancelled = running
+            try:
+                cursor.cancel()
+            except Exception:
+                _logger.warning("Failed to cancel the query.", exc_info=True)
+
+
+def _get_connection() -> Any:
+    global _connection
+    if _connection is None:
+        from pyathenajdbc.connection import Connection
+
+        _connection = Connection(**_connect_kwargs)
+        # Close the connection when the worker exits.
+        Finalize(None, _connection.close, exitpriority=10)
+    return _connection
+
+
+def _execute(
+    operation: str,
+    parameters: Optional[Dict[str, Any]],
+    generation: int,
+    batch_size: int,
+) -> bytes:
+    import pyarrow as pa
+
+    from pyathenajdbc.util import iter_record_batches, to_arrow_schema
+
+    global _running
+    if _is_cancelled(generation):
+        raise OperationalError("The query was cancelled.")
+    try:
+        with _get_connection().cursor() as cursor:
+            running = (cursor, generation)
+            _running = running
+            try:
+                cursor.execute(operation, parameters)
+                schema = to_arrow_schema(cursor.description)
+                sink = pa.BufferOutputStream()
+                writer = pa.ipc.new_stream(sink, schema)
+                if cursor.description:
+                    for batch in iter_record_batches(cursor, schema, batch_size):
+                        if _is_cancelled(generation):
+                            raise OperationalError("The query was cancelled.")
+                        writer.write_batch(batch)
+                writer.close()
+            finally:
+                _running = None
+            if _is_cancelled(generation):
+                raise OperationalError("The query was cancelled.")
+    except Error as e:
+        if _is_cancelled(generation):
+            raise OperationalError("The query was cancelled.") from None
+        # The arguments of exceptions raised by the driver can be Java objects,
+        # which can not be pickled.
+        raise e.__class__(*[str(a) for a in e.args]) from None
+    buf: bytes = sink.getvalue().to_pybytes()
+    return buf
+
+
+def _read_table(data: bytes) -> "pa.Table":
+    import pyarrow as pa
+
+    table: "pa.Table" = pa.ipc.open_stream(pa.py_buffer(data)).read_all()
+    return table
+
+
+class ProcessPoolCursor(object):
+    """Executes queries concurrently in a pool of worker processes.
+
+    `execute` returns a `concurrent.futures.Future` of a `pyarrow.Table`.
+    Errors raised in a worker are raised by `Future.result`.
+    `cancel` cancels the running queries and the queries not started yet.
+
+        with ProcessPoolCursor(processes=8, Schema="default") as cursor:
+            futures = [cursor.execute(sql) for sql in sqls]
+            tables = [f.result() for f in futures]
+
+    The keyword arguments are passed to `Connection` in each worker
+    and have to be picklable."""
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        **connect_kwargs: Any
+    ) -> None:
+        context = multiprocessing.get_context("spawn")
+        self._batch_size = batch_size
+        self._cancel_generation = context.Value("i", 0)
+        self._pool: Optional[Any] = context.Pool(
+            processes=processes if processes else os.cpu_count(),
+            initializer=_init_worker,
+            initargs=(connect_kwargs, self._cancel_generation),
+        )
+
+    @property
+    def is_closed(self) -> bool:
+        return self._pool is None
+
+    def execute(
+        self, operation: str, parameters: Optional[Dict[str, Any]] = None
+    ) -> "Future[pa.Table]":
+        if self._pool is None:
+            raise ProgrammingError("ProcessPoolCursor is closed.")
+        future: "Future[pa.Table]" = Future()
+
+        def _set_result(data: bytes) -> None:
+            try:
+                future.set_result(_read_table(data))
+            except Exception as e:
+                future.set_exception(e)
+
+        self._pool.apply_async(
+            _execute,
+            (operation, parameters, self._cancel_generation.value, self._batch_size),
+            callback=_set_result,
+            error_callback=future.set_exception,
+        )
+        return future
+
+    def cancel(self) -> None:
+        """Cancels the queries executed so far, queued or running."""
+        with self._cancel_generation.get_lock():
+            self._cancel_generation.value += 1
+
+    def close(self) -> None:
+        """Waits for the queries to finish and stops the worker processes."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.cancel()
+        self.close()
+
+
+def run_queries(
+    operations: Sequence[str],
+    processes: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    **connect_kwargs: Any
+) -> List["pa.Table"]:
+    """Runs the queries in worker processes and returns their results in order.
+
+    If a query fails, or the caller is interrupted, the other queries are
+    cancelled and the error is raised."""
+    processes = processes if processes else os.cpu_count() or 1
+    with ProcessPoolCursor(
+        processes=max(1, min(processes, len(operations))),
+        batch_size=batch_size,
+        **connect_kwargs
+    ) as cursor:
+        futures = [cursor.execute(operation) for operation in operations]
+        return [future.result() for future in futures]
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""Profile the fetch hot path: JNI calls, converters and row building.
+
+A `Profiler` is attached to a connection with `connect(profile=True)`, or to a
+connection or cursor for the duration of a `with profile(...)` block. Queries
+executed while it is attached get a result set proxy that counts and times every
+call into Java, and a row builder whose converters are timed per JDBC type and
+per column. Nothing is instrumented otherwise."""
+import contextlib
+import logging
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+_logger = logging.getLogger(__name__)  # type: ignore
+
+
+class CallStats(object):
+
+    __slots__ = ("calls", "elapsed")
+
+    def __init__(self) -> None:
+        self.calls: int = 0
+        self.elapsed: float = 0.0
+
+    def __repr__(self) -> str:
+        return "CallStats(calls={0}, elapsed={1:.6f})".format(self.calls, self.elapsed)
+
+
+def _get_stats(stats: Dict[str, CallStats], key: str) -> CallStats:
+    stat = stats.get(key, None)
+    if stat is None:
+        stat = CallStats()
+        stats[key] = stat
+    return stat
+
+
+class _ProfiledResultSet(object):
+    """Proxy of a java.sql.ResultSet that records each method call as one JNI call."""
+
+    def __init__(self, result_set: Any, profiler: "Profiler") -> None:
+        self._result_set = result_set
+        self._profiler = profiler
+
+    def __getattr__(self, name: str) -> Any:
+        method = getattr(self._result_set, name)
+        if not callable(method):
+            return method
+        stat = _get_stats(self._profiler.jni_calls, name)
+
+        def _call(*args: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return method(*args)
+            finally:
+                stat.calls += 1
+                stat.elapsed += time.perf_counter() - start
+
+        # Later lookups of the same method skip __getattr__.
+        setattr(self, name, _call)
+        return _call
+
+
+class Profiler(object):
+    """Call counts and cumulative times of the fetch hot path.
+
+    Times are in seconds. Converter times include the JNI calls the converter
+    makes (e.g. `getString` and `wasNull`)."""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.rows: int = 0
+        self.row_elapsed: float = 0.0
+        self.jni_calls: Dict[str, CallStats] = dict()
+        self.types: Dict[str, CallStats] = dict()
+        self.columns: Dict[str, CallStats] = dict()
+
+    @property
+    def total_jni_calls(self) -> int:
+        return sum(s.calls for s in self.jni_calls.values())
+
+    @property
+    def jni_calls_per_row(self) -> float:
+        return self.total_jni_calls / self.rows if self.rows else 0.0
+
+    def wrap_result_set(self, result_set: Any) -> Any:
+        return _ProfiledResultSet(result_set, self)
+
+    def wrap_converter(
+        self,
+        type_name: str,
+        column_name: str,
+        converter: Callable[[Any, int], Optional[Any]],
+    ) -> Callable[[Any, int], Optional[Any]]:
+        type_stat = _get_stats(self.types, type_name)
+        column_stat = _get_stats(self.columns, column_name)
+
+        def _convert(result_set: Any, index: int) -> Optional[Any]:
+            start = time.perf_counter()
+            try:
+                return converter(result_set, index)
+            finally:
+                elapsed = time.perf_counter() - start
+                type_stat.calls += 1
+                type_stat.elapsed += elapsed
+                column_stat.calls += 1
+                column_stat.elapsed += elapsed
+
+        return _convert
+
+    def wrap_row_builder(self, builder: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        def _build(result_set: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return builder(result_set)
+            finally:
+                self.rows += 1
+                self.row_elapsed += time.perf_counter() - start
+
+        return _build
+
+    def as_dict(self) -> Dict[str, Any]:
+        def _to_dict(stats: Dict[str, CallStats]) -> Dict[str, Dict[str, Any]]:
+            return {
+                k: {"calls": v.calls, "elapsed": v.elapsed} for k, v in stats.items()
+            }
+
+        return {
+            "rows": self.rows,
+            "row_elapsed": self.row_elapsed,
+            "jni_calls_per_row": self.jni_calls_per_row,
+            "jni_calls": _to_dict(self.jni_calls),
+            "types": _to_dict(self.types),
+            "columns": _to_dict(self.columns),
+        }
+
+    @staticmethod
+    def _format_stats(title: str, stats: Dict[str, CallStats]) -> List[str]:
+        lines = [
+            "{0:<32} {1:>10} {2:>12} {3:>12}".format(
+                title, "calls", "total (ms)", "per call (us)"
+            )
+        ]
+        for name, stat in sorted(
+            stats.items(), key=lambda item: item[1].elapsed, reverse=True
+        ):
+            lines.append(
+                "{0:<32} {1:>10d} {2:>12.3f} {3:>12.3f}".format(
+                    name,
+                    stat.calls,
+                    stat.elapsed * 1000,
+                    stat.elapsed / stat.calls * 1000000 if stat.calls else 0.0,
+                )
+            )
+        return lines
+
+    def report(self) -> str:
+        lines = [
+            "rows: {0}, row building: {1:.3f} ms, JNI calls per row: {2:.2f}".format(
+                self.rows, self.row_elapsed * 1000, self.jni_calls_per_row
+            ),
+            "",
+        ]
+        lines.extend(self._format_stats("JNI call", self.jni_calls))
+        lines.append("")
+        lines.extend(self._format_stats("JDBC type", self.types))
+        lines.append("")
+        lines.extend(self._format_stats("column", self.columns))
+        return "\n".join(lines)
+
+
+@contextlib.contextmanager
+def profile(target: Any, profiler: Optional[Profiler] = None) -> Iterator[Profiler]:
+    """Attaches a profiler to a connection or a cursor within the block.
+
+    For a connection, cursors created within the block are profiled.
+    Only queries executed within the block are instrumented."""
+    if profiler is None:
+        profiler = Profiler()
+    previous = target.profiler
+    target.profiler = profiler
+    try:
+        yield profiler
+    finally:
+        target.profiler = previous
+
+
+def _column_key(index: int, name: Any) -> str:
+    return "{0}: {1}".format(index, name)
+
+
+def instrument_converters(
+    profiler: Profiler,
+    converters: List[Callable[[Any, int], Optional[Any]]],
+    columns: List[Tuple[int, Any, Any]],
+) -> List[Callable[[Any, int], Optional[Any]]]:
+    """Wraps the converter of each `(1-based index, name, JDBC type name)` column."""
+    return [
+        profiler.wrap_converter(str(type_name), _column_key(index, name), converter)
+        for converter, (index, name, type_name) in zip(converters, columns)
+    ]
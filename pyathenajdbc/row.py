@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+import keyword
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+    cast,
+    overload,
+)
+
+from pyathenajdbc.error import ProgrammingError
+from pyathenajdbc.util import synchronized
+
+if TYPE_CHECKING:
+    from pyathenajdbc.cursor import Cursor
+
+_UNSET: Any = object()
+
+
+class LazyRow(Sequence[Any]):
+    """A row whose cells are read from the result set and converted on first access.
+
+    The cells can only be read while the row is the current row of the cursor.
+    Cells accessed before the cursor moves on stay available; `materialize()`
+    reads all remaining cells and returns a tuple."""
+
+    __slots__ = ("_cursor", "_generation", "_values")
+
+    def __init__(self, cursor: "Cursor", generation: int, num_columns: int) -> None:
+        self._cursor = cursor
+        self._generation = generation
+        self._values: List[Any] = [_UNSET] * num_columns
+
+    def _get(self, index: int) -> Any:
+        val = self._values[index]
+        if val is _UNSET:
+            val = self._cursor._read_cell(self._generation, index)
+            self._values[index] = val
+        return val
+
+    @property
+    def is_current(self) -> bool:
+        return self._cursor._row_generation == self._generation
+
+    def materialize(self) -> Tuple[Any, ...]:
+        return tuple([self._get(i) for i in range(len(self._values))])
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @overload
+    def __getitem__(self, index: int) -> Any:
+        ...  # pragma: no cover
+
+    @overload
+    def __getitem__(self, index: slice) -> Tuple[Any, ...]:
+        ...  # pragma: no cover
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return tuple(
+                [self._get(i) for i in range(*index.indices(len(self._values)))]
+            )
+        if index < 0:
+            index += len(self._values)
+        if not 0 <= index < len(self._values):
+            raise IndexError("LazyRow index out of range")
+        return self._get(index)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, LazyRow):
+            other = other.materialize()
+        if not isinstance(other, tuple):
+            return NotImplemented
+        return self.materialize() == other
+
+    def __repr__(self) -> str:
+        return "LazyRow({0})".format(
+            ", ".join("..." if v is _UNSET else repr(v) for v in self._values)
+        )
+
+
+def get_column_indexes(
+    names: Sequence[str], columns: Sequence[Union[str, int]]
+) -> List[int]:
+    """Returns the 0-based indexes of `columns`, given by name or by 0-based index."""
+    positions: Dict[str, int] = dict()
+    for i, name in enumerate(names):
+        positions.setdefault(name, i)
+    indexes = []
+    for column in columns:
+        if isinstance(column, int) and not isinstance(column, bool):
+            if not 0 <= column < len(names):
+                raise ProgrammingError("Column index out of range: {0}".format(column))
+            indexes.append(column)
+        elif column in positions:
+            indexes.append(positions[column])
+        else:
+            raise ProgrammingError("Column not found: {0}".format(column))
+    return indexes
+
+
+RowFactory = Callable[[Sequence[str]], Callable[..., Any]]
+
+
+def _tuple_row(*values: Any) -> Tuple[Any, ...]:
+    return values
+
+
+def tuple_row(names: Sequence[str]) -> Callable[..., Tuple[Any, ...]]:
+    """Rows are plain tuples (the default)."""
+    return _tuple_row
+
+
+class NamedRow(object):
+    """Base class of the rows returned by `named_row`.
+
+    Values are accessed by attribute, by index or by column name."""
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    _names: Tuple[str, ...] = ()
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __iter__(self) -> Iterator[Any]:
+        for field in self._fields:
+            yield getattr(self, field)
+
+    def __getitem__(self, index: Union[int, slice, str]) -> Any:
+        if isinstance(index, str):
+            try:
+                return getattr(self, self._fields[self._names.index(index)])
+            except ValueError:
+                raise KeyError(index)
+        if isinstance(index, slice):
+            return tuple(self)[index]
+        return getattr(self, self._fields[index])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, NamedRow):
+            return tuple(self) == tuple(other)
+        if isinstance(other, tuple):
+            return tuple(self) == other
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(tuple(self))
+
+    def __repr__(self) -> str:
+        return "Row({0})".format(
+            ", ".join("{0}={1!r}".format(f, v) for f, v in zip(self._fields, self))
+        )
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return _make_named_row, (self._names, tuple(self))
+
+    def _asdict(self) -> Dict[str, Any]:
+        return dict(zip(self._names, self))
+
+
+def _to_field_names(names: Sequence[str]) -> Tuple[str, ...]:
+    fields: List[str] = []
+    for i, name in enumerate(names):
+        if (
+            not name.isidentifier()
+            or keyword.iskeyword(name)
+            or name.startswith("_")
+            or name in fields
+        ):
+            name = "_{0}".format(i)
+        fields.append(name)
+    return tuple(fields)
+
+
+_named_row_classes: Dict[Tuple[str, ...], Type[NamedRow]] = dict()
+
+
+@synchronized
+def named_row_class(names: Sequence[str]) -> Type[NamedRow]:
+    """Returns the `__slots__` row class of the column names, generated once per names.
+
+    Column names that are not valid identifiers, keywords, start with an underscore
+    or are duplicated are renamed to `_<index>` as attributes."""
+    key = tuple(names)
+    cls = _named_row_classes.get(key, None)
+    if cls is None:
+        fields = _to_field_names(key)
+        source = "def __init__(self{0}):\n{1}".format(
+            "".join(", {0}".format(f) for f in fields),
+            "".join("    self.{0} = {0}\n".format(f) for f in fields) or "    pass\n",
+        )
+        namespace: Dict[str, Any] = dict()
+        exec(source, namespace)
+        cls = type(
+            "Row",
+            (NamedRow,),
+            {
+                "__slots__": fields,
+                "__init__": namespace["__init__"],
+                "_fields": fields,
+                "_names": key,
+            },
+        )
+        _named_row_classes[key] = cls
+    return cls
+
+
+def _make_named_row(names: Tuple[str, ...], values: Tuple[Any, ...]) -> NamedRow:
+    row: NamedRow = named_row_class(names)(*values)
+    return row
+
+
+def named_row(names: Sequence[str]) -> Type[NamedRow]:
+    """Rows are `NamedRow` objects with one attribute per column."""
+    return cast(Type[NamedRow], named_row_class(names))
+
+
+def dict_row(names: Sequence[str]) -> Callable[..., Dict[str, Any]]:
+    """Rows are dicts keyed by column name. All rows of a result set share one key tuple."""
+    keys = tuple(names)
+
+    def _dict_row(*values: Any) -> Dict[str, Any]:
+        return dict(zip(keys, values))
+
+    return _dict_row
+
+
+def compile_row_builder(
+    converters: Sequence[Callable[[Any, int], Optional[Any]]],
+    indexes: Sequence[int],
+    make_row: Optional[Callable[..., Any]] = None,
+) -> Callable[[Any], Any]:
+    """Generates a function that reads one row from a result set.
+
+    `converters[i]` converts the column at the 1-based `indexes[i]`. The cells are
+    passed to `make_row` as positional arguments, or packed into a tuple if it is
+    `None`, without an intermediate list."""
+    namespace: Dict[str, Any] = {"make_row": make_row}
+    cells = []
+    for i, (converter, index) in enumerate(zip(converters, indexes)):
+        namespace["c{0}".format(i)] = converter
+        cells.append("c{0}(result_set, {1:d})".format(i, index))
+    if make_row is None:
+        body = "({0})".format("".join(c + ", " for c in cells))
+    else:
+        body = "make_row({0})".format(", ".join(cells))
+    exec("def build(result_set):\n    return {0}\n".format(body), namespace)
+    build: Callable[[Any], Any] = namespace["build"]
+    return build
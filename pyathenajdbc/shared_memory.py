@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""Hand a fetched result over to other processes through shared memory.
+
+The result is written once, column by column, in the Arrow IPC format into a
+`multiprocessing.shared_memory` segment. Readers in other processes attach
+to the segment by name and map the columns without copying or unpickling.
+
+The exporting process owns the segment and unlinks it when the readers are done.
+Readers only close their mapping. Requires Python 3.8 or later."""
+import json
+import logging
+import sys
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    cast,
+)
+
+from pyathenajdbc.error import NotSupportedError, ProgrammingError
+from pyathenajdbc.util import DEFAULT_BATCH_SIZE, iter_record_batches, to_arrow_schema
+
+if TYPE_CHECKING:
+    from multiprocessing.shared_memory import SharedMemory
+
+    import pyarrow as pa
+
+    from pyathenajdbc.cursor import Cursor
+
+_logger = logging.getLogger(__name__)  # type: ignore
+
+_DESCRIPTION_METADATA_KEY: bytes = b"pyathenajdbc.description"
+
+# Segments created by this process, which are registered to its resource tracker.
+_owned_names: Set[str] = set()
+
+
+class SharedMemoryHandle(NamedTuple):
+    """Picklable reference to an exported result, passed to the readers."""
+
+    name: str
+    size: int
+
+
+def _shared_memory_class() -> Any:
+    try:
+        from multiprocessing.shared_memory import SharedMemory
+    except ImportError:
+        raise NotSupportedError("Shared memory requires Python 3.8 or later.")
+    return SharedMemory
+
+
+def _attach(name: str) -> "SharedMemory":
+    shared_memory_class = _shared_memory_class()
+    if sys.version_info >= (3, 13):
+        return cast("SharedMemory", shared_memory_class(name=name, track=False))
+    shm = cast("SharedMemory", shared_memory_class(name=name))
+    if name in _owned_names:
+        return shm
+    try:
+        # The resource tracker would unlink the segment when this process exits,
+        # although it is owned by the exporting process.
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore
+    except (ImportError, AttributeError):
+        pass
+    return shm
+
+
+def _close(shm: "SharedMemory") -> None:
+    try:
+        shm.close()
+    except BufferError:
+        raise ProgrammingError(
+            "The shared memory is still referenced by Arrow tables or arrays."
+        )
+
+
+class SharedMemoryResult(object):
+    """A result exported into a shared memory segment owned by this process.
+
+    `handle` is passed to other processes, which open it with `SharedMemoryReader`.
+    `unlink` frees the segment, the readers have to close it before."""
+
+    def __init__(self, shm: "SharedMemory", size: int, num_rows: int) -> None:
+        self._shm: Optional["SharedMemory"] = shm
+        self._handle = SharedMemoryHandle(shm.name, size)
+        self._num_rows = num_rows
+
+    @property
+    def handle(self) -> SharedMemoryHandle:
+        return self._handle
+
+    @property
+    def num_rows(self) -> int:
+        return self._num_rows
+
+    @property
+    def is_closed(self) -> bool:
+        return self._shm is None
+
+    def unlink(self) -> None:
+        if self._shm is not None:
+            _close(self._shm)
+            self._shm.unlink()
+            _owned_names.discard(self._shm.name)
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.unlink()
+
+
+def export_table(
+    table: "pa.Table", description: Optional[Sequence[Sequence[Any]]] = None
+) -> SharedMemoryResult:
+    """Writes an Arrow table into a new shared memory segment."""
+    import pyarrow as pa
+
+    if description is not None:
+        table = table.replace_schema_metadata(
+            {_DESCRIPTION_METADATA_KEY: json.dumps(description).encode("utf-8")}
+        )
+
+    def _write(sink: Any) -> None:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    # Measure the stream first, so that it is written directly into the segment.
+    mock = pa.MockOutputStream()
+    _write(mock)
+    size = mock.size()
+    shm = _shared_memory_class()(create=True, size=max(size, 1))
+    _owned_names.add(shm.name)
+    try:
+        _write(pa.FixedSizeBufferWriter(pa.py_buffer(shm.buf)))
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        _owned_names.discard(shm.name)
+        raise
+    return SharedMemoryResult(shm, size, table.num_rows)
+
+
+def export_result(
+    cursor: "Cursor", batch_size: int = DEFAULT_BATCH_SIZE
+) -> SharedMemoryResult:
+    """Fetches the remaining rows of the cursor into a shared memory segment.
+
+    The columns are typed per `cursor.description`, which is also exported."""
+    import pyarrow as pa
+
+    description = cursor.description
+    if not description:
+        raise ProgrammingError("No result set.")
+    schema = to_arrow_schema(description)
+    table = pa.Table.from_batches(
+        list(iter_record_batches(cursor, schema, batch_size)), schema=schema
+    )
+    return export_table(table, description)
+
+
+class SharedMemoryReader(object):
+    """Attaches to an exported result and maps it as an Arrow table without copying.
+
+    The table, and anything derived from it without copying, is only valid
+    until `close`."""
+
+    def __init__(self, handle: SharedMemoryHandle) -> None:
+        self._shm: Optional["SharedMemory"] = _attach(handle.name)
+        self._size = handle.size
+        self._table: Optional["pa.Table"] = self._read_table(self._shm)
+
+    def _read_table(self, shm: "SharedMemory") -> "pa.Table":
+        import pyarrow as pa
+
+        buf = pa.py_buffer(shm.buf)
+        if self._size < buf.size:
+            buf = buf.slice(0, self._size)
+        return pa.ipc.open_stream(buf).read_all()
+
+    @property
+    def table(self) -> "pa.Table":
+        if self._table is None:
+            raise ProgrammingError("SharedMemoryReader is closed.")
+        return self._table
+
+    @property
+    def description(self) -> Optional[List[Tuple[Any, ...]]]:
+        metadata = self.table.schema.metadata
+        if not metadata or _DESCRIPTION_METADATA_KEY not in metadata:
+            return None
+        return [tuple(d) for d in json.loads(metadata[_DESCRIPTION_METADATA_KEY])]
+
+    def to_pandas(self, **kwargs: Any) -> Any:
+        """Copies the result into a DataFrame, which stays valid after `close`."""
+        return self.table.to_pandas(**kwargs)
+
+    @property
+    def is_closed(self) -> bool:
+        return self._shm is None
+
+    def close(self) -> None:
+        if self._shm is not None:
+            # The table holds a view of the segment, which must be released first.
+            self._table = None
+            try:
+                _close(self._shm)
+            except ProgrammingError:
+                # Other tables or arrays still reference the segment, keep it readable.
+                self._table = self._read_table(self._shm)
+                raise
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            self.close()
+        except ProgrammingError:
+            if exc_type is None:
+                raise
+            # The traceback may still reference the table, keep the original error.
+            _logger.warning("Failed to close the shared memory.", exc_info=True)
@@ -0,0 +1,637 @@
+# -*- coding: utf-8 -*-
+"""Sidecar mode.
+
+A single long-lived process hosts the JVM and the JDBC connections, and thin
+clients talk to it over a Unix domain socket. Clients never import JPype, so they
+start instantly and can be forked freely (e.g. gunicorn or multiprocessing workers).
+
+Start the server::
+
+    $ python -m pyathenajdbc.sidecar --socket /tmp/pyathenajdbc.sock
+
+and connect with ``pyathenajdbc.connect(sidecar="/tmp/pyathenajdbc.sock", ...)``.
+"""
+import argparse
+import collections
+import hmac
+import itertools
+import logging
+import os
+import secrets
+import signal
+import socket
+import socketserver
+import struct
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from pyathenajdbc import codec
+from pyathenajdbc import error as errors
+from pyathenajdbc.error import DatabaseError, NotSupportedError, ProgrammingError
+from pyathenajdbc.formatter import DefaultParameterFormatter, Formatter
+
+_logger = logging.getLogger(__name__)  # type: ignore
+
+_FRAME_HEADER = struct.Struct("<BI")
+
+_MSG_CONNECT: int = 0x01
+_MSG_CURSOR: int = 0x02
+_MSG_EXECUTE: int = 0x03
+_MSG_FETCH: int = 0x04
+_MSG_CANCEL: int = 0x05
+_MSG_CLOSE_CURSOR: int = 0x06
+_MSG_CLOSE: int = 0x07
+
+_MSG_OK: int = 0x80
+_MSG_ROWS: int = 0x81
+_MSG_ERROR: int = 0x82
+
+# Connection arguments that belong to the sidecar server, not to the client.
+_SERVER_OPTIONS: Tuple[str, ...] = (
+    "jvm_path",
+    "jvm_options",
+    "converter",
+    "driver_path",
+    "log4j_conf",
+)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise EOFError("Socket closed.")
+        buf += chunk
+    return bytes(buf)
+
+
+def _send_frame(sock: socket.socket, msg_type: int, payload: bytes) -> None:
+    sock.sendall(_FRAME_HEADER.pack(msg_type, len(payload)) + payload)
+
+
+def _recv_frame(sock: socket.socket) -> Tuple[int, bytes]:
+    msg_type, length = _FRAME_HEADER.unpack(_recv_exactly(sock, _FRAME_HEADER.size))
+    return msg_type, _recv_exactly(sock, length)
+
+
+def _require_socket(sock: Optional[socket.socket]) -> socket.socket:
+    if sock is None:
+        raise ProgrammingError("Connection is closed.")
+    return sock
+
+
+class _ConnectionPool(object):
+    """Idle JDBC connections keyed by their driver arguments."""
+
+    def __init__(self, connect_options: Dict[str, Any], max_idle: int) -> None:
+        self._connect_options = connect_options
+        self._max_idle = max_idle
+        self._idle: Dict[Tuple[Tuple[str, str], ...], List[Any]] = dict()
+        self._lock = threading.Lock()
+
+    def acquire(self, driver_kwargs: Dict[str, Any]) -> Any:
+        from pyathenajdbc.connection import Connection
+
+        key = tuple(sorted(driver_kwargs.items()))
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                conn = idle.pop()
+                if not conn.is_closed:
+                    return key, conn
+        return key, Connection(**self._connect_options, **driver_kwargs)
+
+    def release(self, key: Tuple[Tuple[str, str], ...], conn: Any) -> None:
+        if conn.is_closed:
+            return
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self._max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            for idle in self._idle.values():
+                for conn in idle:
+                    conn.close()
+            self._idle.clear()
+
+
+class _SidecarHandler(socketserver.BaseRequestHandler):
+
+    server: "SidecarServer"
+
+    def setup(self) -> None:
+        self._pool_key: Optional[Tuple[Tuple[str, str], ...]] = None
+        self._connection: Optional[Any] = None
+        self._cursors: Dict[int, Any] = dict()
+        # Identifies the session in the cancel requests sent through other sessions.
+        self._token: str = ""
+
+    def handle(self) -> None:
+        while True:
+            try:
+                msg_type, payload = _recv_frame(self.request)
+            except (EOFError, OSError):
+                break
+            try:
+                resp_type, resp = self._dispatch(msg_type, codec.decode(payload))
+            except Exception as e:
+                if not isinstance(e, errors.Error):
+                    _logger.exception("Failed to handle request.")
+                resp_type = _MSG_ERROR
+                resp = codec.encode(
+                    [type(e).__name__, str(e.args[0]) if e.args else str(e)]
+                )
+            try:
+                _send_frame(self.request, resp_type, resp)
+            except OSError:
+                break
+            if msg_type in (_MSG_CLOSE, _MSG_CANCEL):
+                break
+
+    def finish(self) -> None:
+        for cursor_id in list(self._cursors.keys()):
+            self._close_cursor(cursor_id)
+        if self._pool_key is not None and self._connection is not None:
+            self.server.pool.release(self._pool_key, self._connection)
+            self._connection = None
+        import jpype
+
+        if jpype.isJVMStarted() and jpype.java.lang.Thread.isAttached():
+            jpype.java.lang.Thread.detach()
+
+    def _dispatch(self, msg_type: int, args: Any) -> Tuple[int, bytes]:
+        if msg_type == _MSG_CONNECT:
+            invalid = [k for k in args if k in _SERVER_OPTIONS]
+            if invalid:
+                raise ProgrammingError(
+                    "{0} must be configured on the sidecar server.".format(invalid)
+                )
+            self._pool_key, self._connection = self.server.pool.acquire(args)
+            self._token = secrets.token_hex(16)
+            return _MSG_OK, codec.encode(self._token)
+        elif msg_type == _MSG_CANCEL:
+            cursor_id, token = args
+            # Only the session that opened the cursor may cancel it.
+            owner, cursor = self.server.cursors.get(cursor_id, ("", None))
+            if cursor is None or not hmac.compare_digest(owner, str(token)):
+                raise ProgrammingError("Cursor is closed.")
+            cursor.cancel()
+            return _MSG_OK, codec.encode(None)
+
+        if self._connection is None:
+            raise ProgrammingError("Connection is closed.")
+        if msg_type == _MSG_CURSOR:
+            cursor_id = next(self.server.cursor_ids)
+            cursor = self._connection.cursor()
+            self._cursors[cursor_id] = cursor
+            self.server.cursors[cursor_id] = (self._token, cursor)
+            return _MSG_OK, codec.encode(cursor_id)
+        elif msg_type == _MSG_EXECUTE:
+            cursor_id, operation, arraysize = args
+            cursor = self._get_cursor(cursor_id)
+            cursor.arraysize = arraysize
+            cursor.execute(operation)
+            return _MSG_OK, codec.encode(cursor.description)
+        elif msg_type == _MSG_FETCH:
+            cursor_id, size = args
+            cursor = self._get_cursor(cursor_id)
+            return _MSG_ROWS, codec.encode_rows(cursor.fetchmany(size))
+        elif msg_type == _MSG_CLOSE_CURSOR:
+            self._close_cursor(args[0])
+            return _MSG_OK, codec.encode(None)
+        elif msg_type == _MSG_CLOSE:
+            return _MSG_OK, codec.encode(None)
+        raise NotSupportedError("Unknown message type: {0}".format(msg_type))
+
+    def _get_cursor(self, cursor_id: int) -> Any:
+        cursor = self._cursors.get(cursor_id)
+        if cursor is None:
+            raise ProgrammingError("Cursor is closed.")
+        return cursor
+
+    def _close_cursor(self, cursor_id: int) -> None:
+        cursor = self._cursors.pop(cursor_id, None)
+        self.server.cursors.pop(cursor_id, None)
+        if cursor is not None:
+            cursor.close()
+
+
+class SidecarServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        path: str,
+        jvm_path: Optional[str] = None,
+        jvm_options: Optional[List[str]] = None,
+        driver_path: Optional[str] = None,
+        log4j_conf: Optional[str] = None,
+        max_idle_connections: int = 8,
+    ) -> None:
+        if os.path.exists(path):
+            os.unlink(path)
+        super(SidecarServer, self).__init__(path, _SidecarHandler)
+        self.path = path
+        from pyathenajdbc.connection import Connection
+
+        # Start the JVM up front so that no client pays for it.
+        Connection.prewarm(jvm_path, jvm_options, driver_path, log4j_conf)
+        self.pool = _ConnectionPool(
+            {
+                "jvm_path": jvm_path,
+                "jvm_options": jvm_options,
+                "driver_path": driver_path,
+                "log4j_conf": log4j_conf,
+            },
+            max_idle_connections,
+        )
+        # The cursors of all the sessions with the token of their session.
+        self.cursors: Dict[int, Tuple[str, Any]] = dict()
+        self.cursor_ids = itertools.count(1)
+
+    def server_close(self) -> None:
+        super(SidecarServer, self).server_close()
+        self.pool.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class SidecarConnection(object):
+    def __init__(
+        self,
+        path: str,
+        formatter: Optional[Formatter] = None,
+        timeout: Optional[float] = None,
+        **driver_kwargs
+    ) -> None:
+        for option in _SERVER_OPTIONS:
+            if driver_kwargs.get(option) is not None:
+                raise NotSupportedError(
+                    "`{0}` must be configured on the sidecar server.".format(option)
+                )
+            driver_kwargs.pop(option, None)
+        self.path = path
+        self._timeout = timeout
+        self._driver_kwargs = driver_kwargs
+        self.region_name = self._driver_kwargs.get(
+            "AwsRegion", os.getenv("AWS_DEFAULT_REGION", None)
+        )
+        self.schema_name = self._driver_kwargs.get("Schema", "default")
+        self.work_group = self._driver_kwargs.get("Workgroup", None)
+        self._formatter = formatter if formatter else DefaultParameterFormatter()
+        self._lock = threading.RLock()
+        self._sock: Optional[socket.socket] = None
+        self._token: Optional[str] = None
+        self._pid: Optional[int] = None
+        self._closed = False
+        self._connect()
+
+    def _open_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self._timeout)
+        try:
+            sock.connect(self.path)
+        except OSError as e:
+            sock.close()
+            raise DatabaseError(
+                "Failed to connect to sidecar {0}: {1}".format(self.path, e)
+            ) from e
+        return sock
+
+    def _connect(self) -> None:
+        self._sock = self._open_socket()
+        self._pid = os.getpid()
+        self._token = self._request(_MSG_CONNECT, self._driver_kwargs)
+
+    def _request(self, msg_type: int, args: Any) -> Any:
+        with self._lock:
+            if self._pid != os.getpid():
+                # The socket was inherited through fork(),
+                # the child process needs its own session.
+                if self._sock:
+                    self._sock.close()
+                self._connect()
+            return self._roundtrip(_require_socket(self._sock), msg_type, args)
+
+    @staticmethod
+    def _roundtrip(sock: socket.socket, msg_type: int, args: Any) -> Any:
+        try:
+            _send_frame(sock, msg_type, codec.encode(args))
+            resp_type, payload = _recv_frame(sock)
+        except (EOFError, OSError) as e:
+            raise DatabaseError("Lost connection to sidecar: {0}".format(e)) from e
+        if resp_type == _MSG_ERROR:
+            name, message = codec.decode(payload)
+            exc_class = getattr(errors, name, DatabaseError)
+            if not (isinstance(exc_class, type) and issubclass(exc_class, Exception)):
+                exc_class = DatabaseError
+            raise exc_class(message)
+        elif resp_type == _MSG_ROWS:
+            return codec.decode_rows(payload)
+        return codec.decode(payload)
+
+    def _cancel(self, cursor_id: int) -> None:
+        # The session socket is blocked while a query is executing,
+        # so the cancel request is sent through a short-lived session.
+        sock = self._open_socket()
+        try:
+            self._roundtrip(sock, _MSG_CANCEL, [cursor_id, self._token])
+        finally:
+            sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def cursor(self) -> "SidecarCursor":
+        if self.is_closed:
+            raise ProgrammingError("Connection is closed.")
+        cursor_id = self._request(_MSG_CURSOR, None)
+        return SidecarCursor(self, cursor_id, self._formatter)
+
+    def close(self) -> None:
+        with self._lock:
+            if self.is_closed:
+                return
+            try:
+                if self._pid == os.getpid():
+                    self._request(_MSG_CLOSE, None)
+            except DatabaseError:
+                _logger.debug("Failed to close sidecar session.", exc_info=True)
+            finally:
+                _require_socket(self._sock).close()
+                self._sock = None
+                self._closed = True
+
+    @property
+    def is_closed(self) -> bool:
+        return self._closed
+
+    def commit(self) -> None:
+        """Athena JDBC connection is only supported for auto-commit mode."""
+        pass
+
+    def rollback(self) -> None:
+        raise NotSupportedError(
+            "Athena JDBC connection is only supported for auto-commit mode."
+        )
+
+
+class SidecarCursor(object):
+
+    DEFAULT_FETCH_SIZE: int = 1000
+
+    def __init__(
+        self,
+        connection: SidecarConnection,
+        cursor_id: int,
+        formatter: Formatter,
+    ) -> None:
+        self._connection: Optional[SidecarConnection] = connection
+        self._cursor_id = cursor_id
+        self._formatter = formatter
+        self._pid = os.getpid()
+
+        self._rownumber: Optional[int] = None
+        self._arraysize: int = self.DEFAULT_FETCH_SIZE
+        self._description: Optional[List[Tuple[Any, ...]]] = None
+        self._buffer: Deque[Tuple[Any, ...]] = collections.deque()
+        self._exhausted: bool = True
+
+    @property
+    def connection(self) -> Optional[SidecarConnection]:
+        return self._connection
+
+    @property
+    def arraysize(self) -> int:
+        return self._arraysize
+
+    @arraysize.setter
+    def arraysize(self, value: int):
+        if value <= 0 or value > self.DEFAULT_FETCH_SIZE:
+            raise ProgrammingError(
+                "MaxResults is more than maximum allowed length {0}.".format(
+                    self.DEFAULT_FETCH_SIZE
+                )
+            )
+        self._arraysize = value
+
+    @property
+    def rownumber(self) -> Optional[int]:
+        return self._rownumber
+
+    @property
+    def rowcount(self) -> int:
+        """By default, return -1 to indicate that this is not supported."""
+        return -1
+
+    @property
+    def has_result_set(self) -> bool:
+        return self._description is not None
+
+    @property
+    def description(self) -> Optional[List[Tuple[Any, ...]]]:
+        return self._description
+
+    @property
+    def is_closed(self) -> bool:
+        return self._connection is None
+
+    def _request(self, msg_type: int, args: Any) -> Any:
+        if self._connection is None:
+            raise ProgrammingError("Connection is closed.")
+        if self._pid != os.getpid():
+            raise ProgrammingError("Cursor can not be used after fork().")
+        return self._connection._request(msg_type, args)
+
+    def close(self) -> None:
+        if self._connection is not None:
+            if self._pid == os.getpid() and not self._connection.is_closed:
+                self._request(_MSG_CLOSE_CURSOR, [self._cursor_id])
+            self._connection = None
+        self._description = None
+        self._buffer.clear()
+
+    def _reset_state(self) -> None:
+        self._description = None
+        self._buffer.clear()
+        self._exhausted = True
+        self._rownumber = 0
+
+    def execute(self, operation: str, parameters: Optional[Dict[str, Any]] = None):
+        if self.is_closed:
+            raise ProgrammingError("Connection is closed.")
+        query = self._formatter.format(operation, parameters)
+        _logger.debug(query)
+        self._reset_state()
+        description = self._request(
+            _MSG_EXECUTE, [self._cursor_id, query, self._arraysize]
+        )
+        if description:
+            self._description = [tuple(d) for d in description]
+            self._exhausted = False
+        return self
+
+    def executemany(
+        self, operation: str, seq_of_parameters: List[Optional[Dict[str, Any]]]
+    ):
+        for parameters in seq_of_parameters:
+            self.execute(operation, parameters)
+        # Operations that have result sets are not allowed with executemany.
+        self._reset_state()
+
+    def cancel(self) -> None:
+        if self._connection is None:
+            raise ProgrammingError("Connection is closed.")
+        self._connection._cancel(self._cursor_id)
+
+    def _fetch_batch(self) -> None:
+        rows = self._request(_MSG_FETCH, [self._cursor_id, self._arraysize])
+        if len(rows) < self._arraysize:
+            self._exhausted = True
+        self._buffer.extend(rows)
+
+    def _fetch(self) -> Optional[Tuple[Any, ...]]:
+        if self.is_closed:
+            raise ProgrammingError("Connection is closed.")
+        if not self.has_result_set:
+            raise ProgrammingError("No result set.")
+        if not self._buffer and not self._exhausted:
+            self._fetch_batch()
+        if not self._buffer:
+            return None
+        if self._rownumber is None:
+            self._rownumber = 0
+        self._rownumber += 1
+        return self._buffer.popleft()
+
+    def fetchone(self):
+        return self._fetch()
+
+    def fetchmany(self, size: Optional[int] = None):
+        if not size or size <= 0:
+            size = self._arraysize
+        rows = []
+        for i in range(size):
+            row = self._fetch()
+            if row:
+                rows.append(row)
+            else:
+                break
+        return rows
+
+    def fetchall(self):
+        rows = []
+        while True:
+            row = self._fetch()
+            if row:
+                rows.append(row)
+            else:
+                break
+        return rows
+
+    def setinputsizes(self, sizes):
+        """Does nothing by default"""
+        pass
+
+    def setoutputsize(self, size, column=None):
+        """Does nothing by default"""
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        else:
+            return row
+
+    next = __next__
+
+    def __iter__(self):
+        return self
+
+
+def start_server(
+    path: str, timeout: float = 60.0, args: Optional[List[str]] = None
+) -> subprocess.Popen:  # type: ignore
+    """Launch a sidecar server in a child process and wait until it accepts
+    connections. `args` are passed through as command line options."""
+    command = [sys.executable, "-m", "pyathenajdbc.sidecar", "--socket", path]
+    if args:
+        command.extend(args)
+    process = subprocess.Popen(command)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise DatabaseError(
+                "Sidecar server exited with code {0}.".format(process.returncode)
+            )
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(path)
+            return process
+        except OSError:
+            time.sleep(0.1)
+        finally:
+            sock.close()
+    process.terminate()
+    raise DatabaseError("Sidecar server did not start within {0}s.".format(timeout))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m pyathenajdbc.sidecar",
+        description="Run a JVM sidecar that serves PyAthenaJDBC connections.",
+    )
+    parser.add_argument("--socket", required=True, help="Unix domain socket path.")
+    parser.add_argument("--jvm-path", default=None)
+    parser.add_argument(
+        "--jvm-option", action="append", default=None, dest="jvm_options"
+    )
+    parser.add_argument("--driver-path", default=None)
+    parser.add_argument("--log4j-conf", default=None)
+    parser.add_argument("--max-idle-connections", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    server = SidecarServer(
+        args.socket,
+        jvm_path=args.jvm_path,
+        jvm_options=args.jvm_options,
+        driver_path=args.driver_path,
+        log4j_conf=args.log4j_conf,
+        max_idle_connections=args.max_idle_connections,
+    )
+
+    def _shutdown(signum, frame):
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    _logger.info("Sidecar listening on %s", args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""Row buffer that spills to a temporary file past a memory threshold.
+
+Rows are kept in memory until their estimated size exceeds the threshold.
+Further rows are encoded in batches with `pyathenajdbc.codec` and appended to
+an anonymous temporary file, which is removed when the buffer is closed or
+garbage collected."""
+import logging
+import sys
+import tempfile
+from bisect import bisect_right
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    overload,
+)
+
+from pyathenajdbc.codec import decode_rows, encode_rows
+from pyathenajdbc.error import ProgrammingError
+
+_logger = logging.getLogger(__name__)  # type: ignore
+
+
+def _estimate_size(row: Tuple[Any, ...]) -> int:
+    return sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row)
+
+
+class SpillBuffer(Sequence[Any]):
+    """A read-only sequence of rows, partly held in a temporary file.
+
+    `len()`, indexing, slicing and iteration work as with a list. Spilled rows
+    are read back one batch at a time; the last batch read is cached.
+    Rows are appended as tuples and, with `make_row`, returned as
+    `make_row(*row)` (see `pyathenajdbc.row`)."""
+
+    def __init__(
+        self,
+        threshold: int,
+        batch_size: int = 1000,
+        directory: Optional[str] = None,
+        make_row: Optional[Callable[..., Any]] = None,
+    ) -> None:
+        if threshold < 0:
+            raise ProgrammingError("The spill threshold must not be negative.")
+        if batch_size <= 0:
+            raise ProgrammingError("The spill batch size must be a positive integer.")
+        self._threshold = threshold
+        self._batch_size = batch_size
+        self._directory = directory
+        self._make_row = make_row
+        self._memory_size: int = 0
+        self._rows: List[Any] = []
+        self._pending: List[Tuple[Any, ...]] = []
+        self._file: Optional[IO[bytes]] = None
+        # Offset in the file, length in bytes and index of the first row of each batch.
+        self._offsets: List[int] = []
+        self._lengths: List[int] = []
+        self._starts: List[int] = []
+        self._num_spilled: int = 0
+        self._cache: Tuple[int, List[Any]] = (-1, [])
+
+    @property
+    def spilled(self) -> bool:
+        return self._file is not None
+
+    @property
+    def spilled_bytes(self) -> int:
+        return sum(self._lengths)
+
+    @property
+    def rows(self) -> List[Any]:
+        """The rows held in memory."""
+        return self._rows
+
+    def append(self, row: Tuple[Any, ...]) -> None:
+        if self._file is None:
+            self._rows.append(self._make_row(*row) if self._make_row else row)
+            self._memory_size += _estimate_size(row)
+            if self._memory_size > self._threshold:
+                self._file = tempfile.TemporaryFile(
+                    prefix="pyathenajdbc-", dir=self._directory
+                )
+                _logger.debug(
+                    "Spilling rows after %d rows (%d bytes).",
+                    len(self._rows),
+                    self._memory_size,
+                )
+        else:
+            self._pending.append(row)
+            if len(self._pending) >= self._batch_size:
+                self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        if self._file is None:
+            raise ProgrammingError("Spill buffer is closed.")
+        data = encode_rows(self._pending)
+        self._file.seek(0, 2)
+        self._offsets.append(self._file.tell())
+        self._lengths.append(len(data))
+        self._starts.append(len(self._rows) + self._num_spilled)
+        self._file.write(data)
+        self._num_spilled += len(self._pending)
+        self._pending = []
+
+    def _read_batch(self, batch: int) -> List[Any]:
+        if self._cache[0] == batch:
+            return self._cache[1]
+        if self._file is None:
+            raise ProgrammingError("Spill buffer is closed.")
+        self._file.seek(self._offsets[batch])
+        rows: List[Any] = decode_rows(self._file.read(self._lengths[batch]))
+        if self._make_row:
+            make_row = self._make_row
+            rows = [make_row(*row) for row in rows]
+        self._cache = (batch, rows)
+        return rows
+
+    def _get_pending(self, index: int) -> Any:
+        row = self._pending[index]
+        return self._make_row(*row) if self._make_row else row
+
+    def _get(self, index: int) -> Any:
+        if index < len(self._rows):
+            return self._rows[index]
+        if index >= len(self._rows) + self._num_spilled:
+            return self._get_pending(index - len(self._rows) - self._num_spilled)
+        batch = bisect_right(self._starts, index) - 1
+        return self._read_batch(batch)[index - self._starts[batch]]
+
+    def __len__(self) -> int:
+        return len(self._rows) + self._num_spilled + len(self._pending)
+
+    @overload
+    def __getitem__(self, index: int) -> Any:
+        ...  # pragma: no cover
+
+    @overload
+    def __getitem__(self, index: slice) -> List[Any]:
+        ...  # pragma: no cover
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Any, List[Any]]:
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self)))]
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("SpillBuffer index out of range")
+        return self._get(index)
+
+    def __iter__(self) -> Iterator[Any]:
+        for row in self._rows:
+            yield row
+        for batch in range(len(self._offsets)):
+            for row in self._read_batch(batch):
+                yield row
+        for i in range(len(self._pending)):
+            yield self._get_pending(i)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return "<SpillBuffer rows={0} spilled={1}>".format(
+            len(self), self._num_spilled + len(self._pending)
+        )
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._rows = []
+        self._pending = []
+        self._offsets, self._lengths, self._starts = [], [], []
+        self._num_spilled = 0
+        self._cache = (-1, [])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
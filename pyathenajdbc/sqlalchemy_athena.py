@@ -1,15 +1,20 @@
 # -*- coding: utf-8 -*-
+import logging
 import re
+import threading
+import time
 
 from sqlalchemy import exc, util
 from sqlalchemy.engine import Engine, reflection
-from sqlalchemy.engine.default import DefaultDialect
+from sqlalchemy.engine.default import DefaultDialect, DefaultExecutionContext
 from sqlalchemy.sql.compiler import (
     DDLCompiler,
     GenericTypeCompiler,
     IdentifierPreparer,
     SQLCompiler,
 )
+from sqlalchemy.sql.ddl import DDLElement
+from sqlalchemy.sql.schema import Table
 from sqlalchemy.sql.sqltypes import (
     BIGINT,
     BINARY,
@@ -25,6 +30,8 @@ from sqlalchemy.sql.sqltypes import (
 
 import pyathenajdbc
 
+_logger = logging.getLogger(__name__)  # type: ignore
+
 
 class UniversalSet(object):
     """UniversalSet
@@ -174,6 +181,7 @@ class AthenaDDLCompiler(DDLCompiler):
     def visit_create_table(self, create):
         table = create.element
         preparer = self.preparer
+        partitions = self._get_partition_columns(table)
 
         text = "\nCREATE EXTERNAL "
         text += "TABLE " + preparer.format_table(table) + " "
@@ -182,6 +190,8 @@ class AthenaDDLCompiler(DDLCompiler):
         separator = "\n"
         for create_column in create.columns:
             column = create_column.element
+            if column.name in partitions:
+                continue
             try:
                 processed = self.process(create_column)
                 if processed is not None:
@@ -207,32 +217,195 @@ class AthenaDDLCompiler(DDLCompiler):
         text += "\n)\n%s\n\n" % self.post_create_table(table)
         return text
 
+    @staticmethod
+    def _get_column_names(columns):
+        if not columns:
+            return []
+        if isinstance(columns, str):
+            columns = [columns]
+        return [c if isinstance(c, str) else c.name for c in columns]
+
+    def _get_partition_columns(self, table):
+        partitions = self._get_column_names(
+            table.dialect_options["awsathena"].get("partition")
+        )
+        for name in partitions:
+            if name not in table.c:
+                raise exc.CompileError(
+                    "Partition column `{0}` does not exist in table `{1}`.".format(
+                        name, table.name
+                    )
+                )
+        return partitions
+
+    def _get_format(self, format_):
+        format_ = format_.lower() if format_ else "parquet"
+        if format_ not in _TABLE_FORMATS:
+            raise exc.CompileError("Format `{0}` is not supported.".format(format_))
+        return format_
+
     def post_create_table(self, table):
         raw_connection = table.bind.raw_connection()
-        # TODO Supports orc, avro, json, csv or tsv format
-        text = "STORED AS PARQUET\n"
+        options = table.dialect_options["awsathena"]
+        text = ""
+
+        partitions = self._get_partition_columns(table)
+        if partitions:
+            text += "PARTITIONED BY (\n{0}\n)\n".format(
+                ", \n".join(
+                    "\t{0} {1}".format(
+                        self.preparer.format_column(table.c[name]),
+                        self.dialect.type_compiler.process(
+                            table.c[name].type, type_expression=table.c[name]
+                        ),
+                    )
+                    for name in partitions
+                )
+            )
 
-        location = (
-            raw_connection._driver_kwargs["S3Location"]
-            if "S3Location" in raw_connection._driver_kwargs
-            else raw_connection._driver_kwargs.get("S3OutputLocation")
-        )
-        if not location:
+        clusters = self._get_column_names(options.get("cluster"))
+        bucket_count = options.get("bucket_count")
+        if bool(clusters) != bool(bucket_count):
             raise exc.CompileError(
-                "`S3Location` or `S3OutputLocation` parameter is required"
-                " in the connection string."
+                "`awsathena_cluster` and `awsathena_bucket_count` must be specified"
+                " together."
             )
-        schema = table.schema if table.schema else raw_connection.schema_name
-        text += "LOCATION '{0}{1}/{2}/'\n".format(location, schema, table.name)
+        if clusters:
+            text += "CLUSTERED BY ({0}) INTO {1} BUCKETS\n".format(
+                ", ".join(self.preparer.quote(c) for c in clusters), int(bucket_count)
+            )
+
+        format_ = self._get_format(options.get("format"))
+        text += _TABLE_FORMATS[format_]
+
+        location = options.get("location")
+        if not location:
+            location = (
+                raw_connection._driver_kwargs["S3Location"]
+                if "S3Location" in raw_connection._driver_kwargs
+                else raw_connection._driver_kwargs.get("S3OutputLocation")
+            )
+            if not location:
+                raise exc.CompileError(
+                    "`S3Location` or `S3OutputLocation` parameter is required"
+                    " in the connection string."
+                )
+            schema = table.schema if table.schema else raw_connection.schema_name
+            location = "{0}{1}/{2}/".format(location, schema, table.name)
+        text += "LOCATION '{0}'\n".format(location)
 
-        compression = raw_connection._driver_kwargs.get("compression")
+        compression = options.get("compression")
+        if not compression:
+            compression = raw_connection._driver_kwargs.get("compression")
         if compression:
-            text += "TBLPROPERTIES ('parquet.compress'='{0}')\n".format(
-                compression.upper()
+            text += "TBLPROPERTIES ('{0}'='{1}')\n".format(
+                _TABLE_COMPRESSION_PROPERTIES[format_], compression.upper()
             )
 
         return text
 
+    def visit_create_table_as(self, create, **kw):
+        preparer = self.dialect.identifier_preparer
+        table_name = preparer.quote(create.name)
+        if create.schema:
+            table_name = preparer.quote_schema(create.schema) + "." + table_name
+
+        format_ = self._get_format(create.format)
+        options = ["format = '{0}'".format(_CTAS_FORMATS[format_])]
+        if format_ == "csv":
+            options.append("field_delimiter = ','")
+        if create.compression:
+            options.append(
+                "write_compression = '{0}'".format(create.compression.upper())
+            )
+        if create.location:
+            options.append(
+                "external_location = '{0}'".format(create.location.replace("'", "''"))
+            )
+        partitions = self._get_column_names(create.partitioned_by)
+        if partitions:
+            options.append(
+                "partitioned_by = ARRAY[{0}]".format(
+                    ", ".join("'{0}'".format(c.replace("'", "''")) for c in partitions)
+                )
+            )
+        buckets = self._get_column_names(create.bucketed_by)
+        if bool(buckets) != bool(create.bucket_count):
+            raise exc.CompileError(
+                "`bucketed_by` and `bucket_count` must be specified together."
+            )
+        if buckets:
+            options.append(
+                "bucketed_by = ARRAY[{0}]".format(
+                    ", ".join("'{0}'".format(c.replace("'", "''")) for c in buckets)
+                )
+            )
+            options.append("bucket_count = {0}".format(int(create.bucket_count)))
+
+        return "CREATE TABLE {0}\nWITH (\n\t{1}\n)\nAS {2}".format(
+            table_name,
+            ", \n\t".join(options),
+            self.sql_compiler.process(create.selectable, literal_binds=True),
+        )
+
+
+class CreateTableAs(DDLElement):
+    """CREATE TABLE AS SELECT (CTAS) statement.
+
+    Partition columns have to be the last columns of the select list.
+
+    https://docs.aws.amazon.com/athena/latest/ug/create-table-as.html"""
+
+    __visit_name__ = "create_table_as"
+
+    def __init__(
+        self,
+        name,
+        selectable,
+        schema=None,
+        partitioned_by=None,
+        bucketed_by=None,
+        bucket_count=None,
+        format=None,
+        compression=None,
+        location=None,
+    ):
+        self.name = name
+        self.selectable = selectable
+        self.schema = schema
+        self.partitioned_by = partitioned_by
+        self.bucketed_by = bucketed_by
+        self.bucket_count = bucket_count
+        self.format = format
+        self.compression = compression
+        self.location = location
+
+
+_TABLE_FORMATS = {
+    "parquet": "STORED AS PARQUET\n",
+    "orc": "STORED AS ORC\n",
+    "avro": "STORED AS AVRO\n",
+    "json": "ROW FORMAT SERDE 'org.openx.data.jsonserde.JsonSerDe'\n"
+    "STORED AS TEXTFILE\n",
+    "csv": "ROW FORMAT DELIMITED FIELDS TERMINATED BY ','\nSTORED AS TEXTFILE\n",
+}
+
+_TABLE_COMPRESSION_PROPERTIES = {
+    "parquet": "parquet.compress",
+    "orc": "orc.compress",
+    "avro": "avro.compress",
+    "json": "write.compression",
+    "csv": "write.compression",
+}
+
+_CTAS_FORMATS = {
+    "parquet": "PARQUET",
+    "orc": "ORC",
+    "avro": "AVRO",
+    "json": "JSON",
+    "csv": "TEXTFILE",
+}
+
 
 _TYPE_MAPPINGS = {
     "boolean": BOOLEAN,
@@ -252,8 +425,103 @@ _TYPE_MAPPINGS = {
     "map": STRINGTYPE,
     "date": DATE,
     "timestamp": TIMESTAMP,
+    # Hive DDL type names
+    "int": INTEGER,
+    "string": STRINGTYPE,
+    "struct": STRINGTYPE,
+    "binary": BINARY,
 }
 
+# java.sql.Types names, used if the type name is not known.
+_JDBC_TYPE_MAPPINGS = {
+    "BOOLEAN": BOOLEAN,
+    "REAL": FLOAT,
+    "FLOAT": FLOAT,
+    "DOUBLE": FLOAT,
+    "TINYINT": INTEGER,
+    "SMALLINT": INTEGER,
+    "INTEGER": INTEGER,
+    "BIGINT": BIGINT,
+    "DECIMAL": DECIMAL,
+    "NUMERIC": DECIMAL,
+    "CHAR": STRINGTYPE,
+    "NCHAR": STRINGTYPE,
+    "VARCHAR": STRINGTYPE,
+    "NVARCHAR": STRINGTYPE,
+    "LONGVARCHAR": STRINGTYPE,
+    "LONGNVARCHAR": STRINGTYPE,
+    "ARRAY": STRINGTYPE,
+    "STRUCT": STRINGTYPE,
+    "JAVA_OBJECT": STRINGTYPE,
+    "BINARY": BINARY,
+    "VARBINARY": BINARY,
+    "LONGVARBINARY": BINARY,
+    "DATE": DATE,
+    "TIMESTAMP": TIMESTAMP,
+}
+
+
+class _MetadataCache(object):
+    """Process-wide cache of the columns of every table in a schema.
+
+    Entries are keyed by (region, schema, workgroup) and are shared by all engines
+    and connections, unlike `reflection.cache` which lives for one Inspector."""
+
+    def __init__(self):
+        self._entries = dict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, tables = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            return tables
+
+    def put(self, key, tables, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, tables)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_metadata_cache = _MetadataCache()
+
+
+def clear_metadata_cache():
+    """Discards the cached table and column metadata of all schemas."""
+    _metadata_cache.clear()
+
+
+class AthenaExecutionContext(DefaultExecutionContext):
+
+    _pattern_ddl = re.compile(r"^\s*(CREATE|DROP|ALTER|MSCK)\s", re.IGNORECASE)
+
+    def create_server_side_cursor(self):
+        # The cursor reads the result set incrementally, `arraysize` rows per page,
+        # so stream_results only has to keep the JDBC fetch size
+        # within the buffer requested with `max_row_buffer`.
+        cursor = self._dbapi_connection.cursor()
+        max_row_buffer = self.execution_options.get("max_row_buffer")
+        if max_row_buffer:
+            cursor.arraysize = max(
+                1, min(int(max_row_buffer), cursor.DEFAULT_FETCH_SIZE)
+            )
+        return cursor
+
+    def post_exec(self):
+        if self.isddl or (
+            isinstance(self.statement, str) and self._pattern_ddl.match(self.statement)
+        ):
+            # Tables created or dropped through SQLAlchemy are visible immediately.
+            clear_metadata_cache()
+
 
 class AthenaDialect(DefaultDialect):
 
@@ -263,12 +531,15 @@ class AthenaDialect(DefaultDialect):
     statement_compiler = AthenaStatementCompiler
     ddl_compiler = AthenaDDLCompiler
     type_compiler = AthenaTypeCompiler
+    execution_ctx_cls = AthenaExecutionContext
     default_paramstyle = pyathenajdbc.paramstyle
     supports_alter = False
     supports_pk_autoincrement = False
     supports_default_values = False
     supports_empty_insert = False
     supports_multivalues_insert = True
+    supports_server_side_cursors = True
+    supports_statement_cache = True
     supports_native_decimal = True
     supports_native_boolean = True
     supports_unicode_statements = True
@@ -277,7 +548,27 @@ class AthenaDialect(DefaultDialect):
     description_encoding = None
     postfetch_lastrowid = False
 
-    _pattern_column_type = re.compile(r"^([a-zA-Z]+)($|\(.+\)$)")
+    construct_arguments = [
+        (
+            Table,
+            {
+                "location": None,
+                "format": None,
+                "compression": None,
+                "partition": None,
+                "cluster": None,
+                "bucket_count": None,
+            },
+        ),
+    ]
+
+    _pattern_column_type = re.compile(r"^([a-zA-Z]+)($|[(<].+[)>]$)")
+
+    DEFAULT_METADATA_CACHE_TTL = 0
+
+    def __init__(self, metadata_cache_ttl=DEFAULT_METADATA_CACHE_TTL, **kwargs):
+        super(AthenaDialect, self).__init__(**kwargs)
+        self.metadata_cache_ttl = metadata_cache_ttl
 
     @classmethod
     def dbapi(cls):
@@ -306,6 +597,16 @@ class AthenaDialect(DefaultDialect):
 
     @reflection.cache
     def get_schema_names(self, connection, **kw):
+        raw_connection = self._raw_connection(connection)
+        if hasattr(raw_connection, "get_schema_names"):
+            try:
+                return [
+                    schema
+                    for schema in raw_connection.get_schema_names()
+                    if schema != "information_schema"
+                ]
+            except pyathenajdbc.Error:
+                _logger.debug("Failed to get schemas from metadata.", exc_info=True)
         query = """
                 SELECT schema_name
                 FROM information_schema.schemata
@@ -313,58 +614,104 @@ class AthenaDialect(DefaultDialect):
                 """
         return [row.schema_name for row in connection.execute(query).fetchall()]
 
-    @reflection.cache
-    def get_table_names(self, connection, schema=None, **kw):
+    def _get_schema_metadata(self, connection, schema, cached=True):
+        """Returns the columns of every table in the schema, keyed by table name.
+
+        All columns are fetched at once with a single metadata call
+        (or a single information_schema query) and, if `metadata_cache_ttl` is set,
+        cached for that many seconds across connections. With `cached=False`,
+        the metadata is fetched again and replaces the cached entry."""
         raw_connection = self._raw_connection(connection)
         schema = schema if schema else raw_connection.schema_name
-        query = """
-                SELECT table_name
-                FROM information_schema.tables
-                WHERE table_schema = '{0}'
-                """.format(
-            schema
-        )
-        return [row.table_name for row in connection.execute(query).fetchall()]
+        key = (raw_connection.region_name, schema, raw_connection.work_group)
+        if cached and self.metadata_cache_ttl and self.metadata_cache_ttl > 0:
+            tables = _metadata_cache.get(key)
+            if tables is not None:
+                return tables
+
+        columns = None
+        if hasattr(raw_connection, "get_columns"):
+            try:
+                columns = [
+                    (
+                        c["table_name"],
+                        {
+                            "name": c["column_name"],
+                            "type": self._get_column_sqltype(
+                                c["type_name"], c["jdbc_type"]
+                            ),
+                            "nullable": c["nullable"],
+                            "default": c["default"],
+                            "ordinal_position": c["ordinal_position"],
+                            "comment": c["comment"],
+                        },
+                    )
+                    for c in raw_connection.get_columns(schema)
+                ]
+            except pyathenajdbc.Error:
+                _logger.debug("Failed to get columns from metadata.", exc_info=True)
+        if columns is None:
+            query = """
+                    SELECT
+                      table_name,
+                      column_name,
+                      data_type,
+                      is_nullable,
+                      column_default,
+                      ordinal_position,
+                      comment
+                    FROM information_schema.columns
+                    WHERE table_schema = '{schema}'
+                    """.format(
+                schema=schema
+            )
+            columns = [
+                (
+                    row.table_name,
+                    {
+                        "name": row.column_name,
+                        "type": _TYPE_MAPPINGS.get(
+                            self._get_column_type(row.data_type), NULLTYPE
+                        ),
+                        "nullable": True if row.is_nullable == "YES" else False,
+                        "default": row.column_default,
+                        "ordinal_position": row.ordinal_position,
+                        "comment": row.comment,
+                    },
+                )
+                for row in connection.execute(query).fetchall()
+            ]
+
+        tables = dict()
+        for table_name, column in columns:
+            tables.setdefault(table_name, []).append(column)
+        for table_columns in tables.values():
+            table_columns.sort(key=lambda c: c["ordinal_position"])
+        if self.metadata_cache_ttl and self.metadata_cache_ttl > 0:
+            _metadata_cache.put(key, tables, self.metadata_cache_ttl)
+        return tables
+
+    @reflection.cache
+    def get_table_names(self, connection, schema=None, **kw):
+        return list(self._get_schema_metadata(connection, schema).keys())
 
     def has_table(self, connection, table_name, schema=None):
-        table_names = self.get_table_names(connection, schema)
-        if table_name in table_names:
-            return True
-        return False
+        # Not answered from the cache, as tables may have been created or dropped
+        # by other processes since.
+        return table_name in self._get_schema_metadata(connection, schema, cached=False)
 
     @reflection.cache
     def get_columns(self, connection, table_name, schema=None, **kw):
-        raw_connection = self._raw_connection(connection)
-        schema = schema if schema else raw_connection.schema_name
-        query = """
-                SELECT
-                  table_schema,
-                  table_name,
-                  column_name,
-                  data_type,
-                  is_nullable,
-                  column_default,
-                  ordinal_position,
-                  comment
-                FROM information_schema.columns
-                WHERE table_schema = '{schema}'
-                AND table_name = '{table}'
-                """.format(
-            schema=schema, table=table_name
-        )
-        return [
-            {
-                "name": row.column_name,
-                "type": _TYPE_MAPPINGS.get(
-                    self._get_column_type(row.data_type), NULLTYPE
-                ),
-                "nullable": True if row.is_nullable == "YES" else False,
-                "default": row.column_default,
-                "ordinal_position": row.ordinal_position,
-                "comment": row.comment,
-            }
-            for row in connection.execute(query).fetchall()
-        ]
+        tables = self._get_schema_metadata(connection, schema)
+        # Copy the cached entries, reflection event listeners may modify them.
+        return [dict(c) for c in tables.get(table_name, [])]
+
+    def _get_column_sqltype(self, type_name, jdbc_type):
+        if type_name:
+            type_ = _TYPE_MAPPINGS.get(self._get_column_type(type_name.lower()))
+            if type_ is not None:
+                return type_
+        return _JDBC_TYPE_MAPPINGS.get(jdbc_type, NULLTYPE)
 
     def _get_column_type(self, type_):
         return self._pattern_column_type.sub(r"\1", type_)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import logging
+import weakref
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from pyathenajdbc.events import QueryListener
+
+if TYPE_CHECKING:
+    from pyathenajdbc.cursor import Cursor
+
+_logger = logging.getLogger(__name__)  # type: ignore
+
+
+class _SpanState(object):
+
+    __slots__ = ("span", "rows", "bytes", "fetch_elapsed", "batches")
+
+    def __init__(self, span: Any) -> None:
+        self.span = span
+        self.rows: int = 0
+        self.bytes: int = 0
+        self.fetch_elapsed: float = 0.0
+        self.batches: int = 0
+
+
+class OpenTelemetryListener(QueryListener):
+    """Records one OpenTelemetry span per query, from `execute` until the result set
+    is exhausted, the next query is executed or the cursor is closed.
+
+    The span is started in the current context, so it becomes a child of the span
+    active in the caller. It requires the `opentelemetry-api` package::
+
+        from pyathenajdbc.tracing import OpenTelemetryListener
+
+        conn = connect(listeners=[OpenTelemetryListener()])
+    """
+
+    def __init__(
+        self,
+        tracer_provider: Optional[Any] = None,
+        span_name: str = "athena.query",
+        record_statement: bool = True,
+    ) -> None:
+        from opentelemetry import trace
+
+        from pyathenajdbc import __version__
+
+        self._trace = trace
+        self._tracer = trace.get_tracer(
+            __name__, __version__, tracer_provider=tracer_provider
+        )
+        self._span_name = span_name
+        self._record_statement = record_statement
+        self._spans: "weakref.WeakKeyDictionary[Cursor, _SpanState]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _end(self, cursor: "Cursor") -> None:
+        state = self._spans.pop(cursor, None)
+        if state is None:
+            return
+        state.span.set_attributes(
+            {
+                "db.athena.fetch.rows": state.rows,
+                "db.athena.fetch.bytes": state.bytes,
+                "db.athena.fetch.batches": state.batches,
+                "db.athena.fetch.elapsed": state.fetch_elapsed,
+            }
+        )
+        state.span.end()
+
+    def before_execute(
+        self, cursor: "Cursor", operation: str, parameters: Optional[Dict[str, Any]]
+    ) -> None:
+        self._end(cursor)
+        attributes: Dict[str, Any] = {"db.system": "athena"}
+        connection = cursor.connection
+        if connection is not None:
+            try:
+                attributes["db.name"] = str(connection.getSchema())
+            except Exception:
+                _logger.debug("Failed to get the schema.", exc_info=True)
+        span = self._tracer.start_span(
+            self._span_name,
+            kind=self._trace.SpanKind.CLIENT,
+            attributes=attributes,
+        )
+        self._spans[cursor] = _SpanState(span)
+
+    def after_execute(
+        self,
+        cursor: "Cursor",
+        query: str,
+        format_elapsed: float,
+        execute_elapsed: float,
+    ) -> None:
+        state = self._spans.get(cursor)
+        if state is None:
+            return
+        attributes: Dict[str, Any] = {
+            "db.athena.format.elapsed": format_elapsed,
+            "db.athena.execute.elapsed": execute_elapsed,
+        }
+        if self._record_statement:
+            attributes["db.statement"] = query
+        state.span.set_attributes(attributes)
+        state.span.add_event("executed")
+        if not cursor.has_result_set:
+            self._end(cursor)
+
+    def on_fetch_batch(
+        self,
+        cursor: "Cursor",
+        rows: int,
+        bytes: int,
+        elapsed: float,
+        finished: bool,
+    ) -> None:
+        state = self._spans.get(cursor)
+        if state is None:
+            return
+        if state.batches == 0:
+            state.span.add_event("first_batch", {"db.athena.fetch.elapsed": elapsed})
+        state.rows += rows
+        state.bytes += bytes
+        state.fetch_elapsed += elapsed
+        state.batches += 1
+        if finished:
+            self._end(cursor)
+
+    def on_close(self, cursor: "Cursor") -> None:
+        self._end(cursor)
+
+    def on_error(
+        self, cursor: "Cursor", query: Optional[str], error: BaseException
+    ) -> None:
+        state = self._spans.get(cursor)
+        if state is None:
+            return
+        state.span.record_exception(error)
+        state.span.set_status(
+            self._trace.Status(self._trace.StatusCode.ERROR, str(error))
+        )
+        self._end(cursor)
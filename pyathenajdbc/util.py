@@ -1,23 +1,152 @@
 # -*- coding: utf-8 -*-
 import functools
+import os
+import re
 import threading
-from typing import TYPE_CHECKING, Any, Callable
+import uuid
+from concurrent.futures.thread import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from urllib.parse import urlparse
+
+from pyathenajdbc.error import NotSupportedError, OperationalError, ProgrammingError
 
 if TYPE_CHECKING:
+    import pyarrow as pa
     from pandas import DataFrame
+    from pyarrow.fs import FileSystem
 
     from pyathenajdbc.cursor import Cursor
 
+DEFAULT_BATCH_SIZE: int = 10000
+
+_MIN_ROWS_PER_FILE: int = 100000
+_ADD_PARTITIONS_BATCH_SIZE: int = 100
+# The partition of null values, and the characters Hive escapes in partition paths.
+_HIVE_DEFAULT_PARTITION: str = "__HIVE_DEFAULT_PARTITION__"
+_HIVE_ESCAPED_CHARS: str = "".join(chr(c) for c in range(0x20)) + "\"#%'*/:=?\\\x7f{[]^"
+
 
-def as_pandas(cursor: "Cursor", coerce_float: bool = False) -> "DataFrame":
+def as_pandas(
+    cursor: "Cursor",
+    coerce_float: bool = False,
+    columns: Optional[List[str]] = None,
+) -> "DataFrame":
+    """Fetches the remaining rows into a DataFrame.
+
+    With `columns`, only those columns are read from the result set and converted."""
     from pandas import DataFrame
 
     description = cursor.description
     if not description:
         return DataFrame()
-    names = [metadata[0] for metadata in description]
-    return DataFrame.from_records(
-        cursor.fetchall(), columns=names, coerce_float=coerce_float
+    if columns is None:
+        names = [metadata[0] for metadata in description]
+        rows = cursor.fetchall()
+    else:
+        names = list(columns)
+        rows = cursor.fetchall(columns=names)
+    return DataFrame.from_records(rows, columns=names, coerce_float=coerce_float)
+
+
+def to_arrow_type(
+    type_code: Any, precision: Optional[int] = None, scale: Optional[int] = None
+) -> "pa.DataType":
+    """Returns the Arrow type of a `description` type code (java.sql.Types name).
+
+    Types without an Arrow equivalent (ARRAY, JAVA_OBJECT, ...) are strings,
+    the same as their converted values."""
+    import pyarrow as pa
+
+    if type_code in ("DECIMAL", "NUMERIC"):
+        if precision and 0 < precision <= 38:
+            return pa.decimal128(precision, scale if scale else 0)
+        return pa.string()
+    mappings = {
+        "NULL": pa.null(),
+        "BOOLEAN": pa.bool_(),
+        "TINYINT": pa.int8(),
+        "SMALLINT": pa.int16(),
+        "INTEGER": pa.int32(),
+        "BIGINT": pa.int64(),
+        "REAL": pa.float32(),
+        "FLOAT": pa.float64(),
+        "DOUBLE": pa.float64(),
+        "DATE": pa.date32(),
+        "TIMESTAMP": pa.timestamp("us"),
+        "BINARY": pa.binary(),
+        "VARBINARY": pa.binary(),
+        "LONGVARBINARY": pa.binary(),
+    }
+    return mappings.get(type_code, pa.string())
+
+
+def to_arrow_schema(description: Optional[List[Tuple[Any, ...]]]) -> "pa.Schema":
+    import pyarrow as pa
+
+    if not description:
+        return pa.schema([])
+    return pa.schema(
+        [
+            pa.field(d[0], to_arrow_type(d[1], d[4], d[5]), nullable=d[6] != 0)
+            for d in description
+        ]
+    )
+
+
+def to_record_batch(rows: Sequence[Any], schema: "pa.Schema") -> "pa.RecordBatch":
+    """Converts rows returned by `fetchmany` to a column-oriented Arrow batch."""
+    import pyarrow as pa
+
+    if rows and isinstance(rows[0], dict):
+        # Rows of the `dict_row` factory.
+        rows = [tuple(row.values()) for row in rows]
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    arrays = []
+    for field, values in zip(schema, columns):
+        if pa.types.is_string(field.type):
+            values = [v if v is None or isinstance(v, str) else str(v) for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def iter_record_batches(
+    cursor: "Cursor",
+    schema: Optional["pa.Schema"] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator["pa.RecordBatch"]:
+    if schema is None:
+        schema = to_arrow_schema(cursor.description)
+    rows: List[Tuple[Any, ...]] = []
+    while True:
+        fetched = cursor.fetchmany(cursor.arraysize)
+        rows.extend(fetched)
+        if len(rows) >= batch_size or (not fetched and rows):
+            yield to_record_batch(rows, schema)
+            rows = []
+        if not fetched:
+            break
+
+
+def as_arrow(cursor: "Cursor", batch_size: int = DEFAULT_BATCH_SIZE) -> "pa.Table":
+    import pyarrow as pa
+
+    schema = to_arrow_schema(cursor.description)
+    if not cursor.description:
+        return schema.empty_table()
+    return pa.Table.from_batches(
+        list(iter_record_batches(cursor, schema, batch_size)), schema=schema
     )
 
 
@@ -40,8 +169,400 @@ def attach_thread_to_jvm(wrapped: Callable[..., Any]) -> Any:
     def _wrapper(*args, **kwargs):
         import jpype
 
-        if not jpype.java.lang.Thread.isAttached():
+        # The HTTP backend runs without a JVM.
+        if jpype.isJVMStarted() and not jpype.java.lang.Thread.isAttached():
             jpype.java.lang.Thread.attach()
         return wrapped(*args, **kwargs)
 
     return _wrapper
+
+
+# Athena (Hive DDL) column types of the Arrow types written by `to_parquet`.
+def _to_athena_type(type_: "pa.DataType") -> str:
+    import pyarrow as pa
+
+    if pa.types.is_boolean(type_):
+        return "boolean"
+    elif pa.types.is_int8(type_):
+        return "tinyint"
+    elif pa.types.is_int16(type_):
+        return "smallint"
+    elif pa.types.is_int32(type_):
+        return "int"
+    elif pa.types.is_int64(type_):
+        return "bigint"
+    elif pa.types.is_float32(type_):
+        return "float"
+    elif pa.types.is_float64(type_):
+        return "double"
+    elif pa.types.is_decimal(type_):
+        return "decimal({0}, {1})".format(type_.precision, type_.scale)
+    elif pa.types.is_string(type_) or pa.types.is_large_string(type_):
+        return "string"
+    elif pa.types.is_binary(type_) or pa.types.is_large_binary(type_):
+        return "binary"
+    elif pa.types.is_date(type_):
+        return "date"
+    elif pa.types.is_timestamp(type_):
+        return "timestamp"
+    raise NotSupportedError("Unsupported column type: {0}".format(type_))
+
+
+_PATTERN_DECIMAL = re.compile(r"^DECIMAL\s*\(\s*(\d+)\s*,\s*(\d+)\s*\)$", re.IGNORECASE)
+
+
+def _to_arrow_type(type_name: str) -> "pa.DataType":
+    import pyarrow as pa
+
+    name = type_name.strip().upper()
+    match = _PATTERN_DECIMAL.match(name)
+    if match:
+        return pa.decimal128(int(match.group(1)), int(match.group(2)))
+    mappings = {
+        "BOOLEAN": pa.bool_(),
+        "TINYINT": pa.int8(),
+        "SMALLINT": pa.int16(),
+        "INT": pa.int32(),
+        "INTEGER": pa.int32(),
+        "BIGINT": pa.int64(),
+        "FLOAT": pa.float32(),
+        "REAL": pa.float32(),
+        "DOUBLE": pa.float64(),
+        "CHAR": pa.string(),
+        "VARCHAR": pa.string(),
+        "STRING": pa.string(),
+        "BINARY": pa.binary(),
+        "DATE": pa.date32(),
+        "TIMESTAMP": pa.timestamp("ns"),
+    }
+    type_ = mappings.get(name.split("(")[0].strip())
+    if type_ is None:
+        raise NotSupportedError("Unsupported column type: {0}".format(type_name))
+    return type_
+
+
+def _get_filesystem(
+    location: str, filesystem: Optional["FileSystem"] = None
+) -> Tuple["FileSystem", str]:
+    if filesystem is None:
+        from pyarrow.fs import FileSystem
+
+        resolved: Tuple["FileSystem", str] = FileSystem.from_uri(location)
+        return resolved
+    parsed = urlparse(location)
+    if parsed.scheme:
+        return filesystem, parsed.netloc + parsed.path
+    return filesystem, location
+
+
+def _get_table_location(conn: Any, schema: str, name: str) -> str:
+    driver_kwargs = getattr(conn, "_driver_kwargs", {})
+    location = driver_kwargs.get("S3Location", driver_kwargs.get("S3OutputLocation"))
+    if not location:
+        raise ProgrammingError(
+            "`location` is required if the connection has no `S3Location`"
+            " or `S3OutputLocation` parameter."
+        )
+    return "{0}{1}/{2}/".format(location, schema, name)
+
+
+def _prepare_frame(
+    df: "DataFrame", index: bool, index_label: Optional[Union[str, List[str]]]
+) -> "DataFrame":
+    if index:
+        df = df.copy(deep=False)
+        if index_label:
+            df.index.names = (
+                [index_label] if isinstance(index_label, str) else index_label
+            )
+        df = df.reset_index()
+    df.columns = [str(c) for c in df.columns]
+    return df
+
+
+def _write_parquet_file(
+    table: "pa.Table",
+    filesystem: "FileSystem",
+    path: str,
+    compression: Optional[str],
+) -> None:
+    import pyarrow.parquet as pq
+
+    with filesystem.open_output_stream(path) as f:
+        pq.write_table(
+            table,
+            f,
+            compression=compression if compression else "none",
+            coerce_timestamps="ms",
+            allow_truncated_timestamps=True,
+        )
+
+
+def _partition_value(value: Any) -> str:
+    """Returns the partition value formatted as by Hive."""
+    import numpy as np
+    import pandas as pd
+
+    if value is None or value is pd.NaT:
+        return _HIVE_DEFAULT_PARTITION
+    if isinstance(value, (float, np.generic)) and pd.isna(value):
+        return _HIVE_DEFAULT_PARTITION
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+def _partition_path(values: Dict[str, str]) -> str:
+    """Returns the `<col>=<value>/...` path of the partition, escaped as by Hive."""
+    return "/".join(
+        "{0}={1}".format(
+            k,
+            "".join(
+                "%{0:02X}".format(ord(c)) if c in _HIVE_ESCAPED_CHARS else c for c in v
+            ),
+        )
+        for k, v in values.items()
+    )
+
+
+def to_parquet(
+    df: "DataFrame",
+    location: str,
+    partitions: Optional[List[str]] = None,
+    compression: Optional[str] = None,
+    chunksize: Optional[int] = None,
+    max_workers: int = (os.cpu_count() or 1) * 5,
+    filesystem: Optional["FileSystem"] = None,
+    arrow_schema: Optional["pa.Schema"] = None,
+) -> List[Dict[str, str]]:
+    """Writes the DataFrame as Parquet files under `location` in parallel.
+
+    Rows are split by the Hive style `partitions` (`<location>/<col>=<value>/`,
+    `__HIVE_DEFAULT_PARTITION__` for nulls) and into files of at most `chunksize`
+    rows. Files are written by a thread pool, pyarrow releases the GIL while
+    encoding and uploading. The object store is
+    resolved from the location (e.g. `s3://`) unless a `pyarrow.fs.FileSystem`
+    is given, fsspec filesystems can be wrapped with `pyarrow.fs.PyFileSystem`.
+
+    Returns the partition values of the written partitions."""
+    import pyarrow as pa
+
+    filesystem, base_path = _get_filesystem(location, filesystem)
+    base_path = base_path.rstrip("/")
+    partitions = partitions if partitions else []
+    if arrow_schema is None:
+        arrow_schema = pa.Schema.from_pandas(df, preserve_index=False)
+    schema = pa.schema([f for f in arrow_schema if f.name not in partitions])
+
+    groups: List[Tuple[Dict[str, str], "DataFrame"]] = [(dict(), df)]
+    if partitions:
+        groups = []
+        # groupby drops null keys, and its dropna argument requires pandas 1.1.
+        by = [
+            df[p].astype(object).where(df[p].notna(), _HIVE_DEFAULT_PARTITION)
+            for p in partitions
+        ]
+        for keys, group in df.groupby(by, sort=False):
+            keys = keys if isinstance(keys, tuple) else (keys,)
+            groups.append(
+                (
+                    dict(zip(partitions, [_partition_value(k) for k in keys])),
+                    group.drop(columns=partitions),
+                )
+            )
+
+    futures = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for values, group in groups:
+            path = (
+                "/".join([base_path, _partition_path(values)]) if values else base_path
+            )
+            filesystem.create_dir(path, recursive=True)
+            size = chunksize if chunksize else max(len(group), 1)
+            for start in range(0, max(len(group), 1), size):
+                end = start + size
+                table = pa.Table.from_pandas(
+                    group.iloc[start:end],
+                    schema=schema,
+                    preserve_index=False,
+                )
+                futures.append(
+                    executor.submit(
+                        _write_parquet_file,
+                        table,
+                        filesystem,
+                        "{0}/{1}.parquet".format(path, uuid.uuid4().hex),
+                        compression,
+                    )
+                )
+        for future in futures:
+            future.result()
+    return [values for values, _ in groups if values]
+
+
+def to_sql(
+    df: "DataFrame",
+    name: str,
+    conn: Any,
+    location: Optional[str] = None,
+    schema: Optional[str] = None,
+    index: bool = False,
+    index_label: Optional[str] = None,
+    partitions: Optional[List[str]] = None,
+    chunksize: Optional[int] = None,
+    if_exists: str = "fail",
+    compression: Optional[str] = None,
+    max_workers: int = (os.cpu_count() or 1) * 5,
+    filesystem: Optional["FileSystem"] = None,
+) -> None:
+    """Loads the DataFrame into an Athena table by writing Parquet files.
+
+    The files are written with `to_parquet` to `location`, by default
+    `<S3Location>/<schema>/<name>/` like the SQLAlchemy dialect, then the external
+    table is created and the written partitions are added to it.
+    The compression defaults to the `compression` connection option."""
+    import pyarrow as pa
+    from pyarrow.fs import FileType
+
+    if if_exists not in ("fail", "replace", "append"):
+        raise ProgrammingError("Unknown if_exists: {0}".format(if_exists))
+    schema = schema if schema else conn.schema_name
+    location = location if location else _get_table_location(conn, schema, name)
+    if not location.endswith("/"):
+        location += "/"
+    if compression is None:
+        compression = getattr(conn, "_driver_kwargs", {}).get("compression")
+    partitions = partitions if partitions else []
+    table_name = "`{0}`.`{1}`".format(schema, name)
+
+    df = _prepare_frame(df, index, index_label)
+    arrow_schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT table_name
+            FROM information_schema.tables
+            WHERE table_schema = '{0}' AND table_name = '{1}'
+            """.format(
+                schema, name
+            )
+        )
+        if cursor.fetchall():
+            if if_exists == "fail":
+                raise OperationalError("Table {0} already exists.".format(table_name))
+            elif if_exists == "replace":
+                cursor.execute("DROP TABLE {0}".format(table_name))
+                fs, path = _get_filesystem(location, filesystem)
+                if fs.get_file_info(path).type != FileType.NotFound:
+                    fs.delete_dir_contents(path)
+
+        written = to_parquet(
+            df,
+            location,
+            partitions=partitions,
+            compression=compression,
+            chunksize=chunksize,
+            max_workers=max_workers,
+            filesystem=filesystem,
+            arrow_schema=arrow_schema,
+        )
+
+        columns = ",\n".join(
+            "`{0}` {1}".format(f.name, _to_athena_type(f.type))
+            for f in arrow_schema
+            if f.name not in partitions
+        )
+        ddl = "CREATE EXTERNAL TABLE IF NOT EXISTS {0} (\n{1}\n)\n".format(
+            table_name, columns
+        )
+        if partitions:
+            ddl += "PARTITIONED BY (\n{0}\n)\n".format(
+                ",\n".join(
+                    "`{0}` {1}".format(p, _to_athena_type(arrow_schema.field(p).type))
+                    for p in partitions
+                )
+            )
+        ddl += "STORED AS PARQUET\nLOCATION '{0}'\n".format(location)
+        if compression:
+            ddl += "TBLPROPERTIES ('parquet.compress'='{0}')\n".format(
+                compression.upper()
+            )
+        cursor.execute(ddl)
+
+        for start in range(0, len(written), _ADD_PARTITIONS_BATCH_SIZE):
+            end = start + _ADD_PARTITIONS_BATCH_SIZE
+            cursor.execute(
+                "ALTER TABLE {0} ADD IF NOT EXISTS\n{1}".format(
+                    table_name,
+                    "\n".join(
+                        "PARTITION ({0}) LOCATION '{1}{2}/'".format(
+                            ", ".join(
+                                "`{0}` = '{1}'".format(k, v.replace("'", "''"))
+                                for k, v in values.items()
+                            ),
+                            location,
+                            _partition_path(values),
+                        )
+                        for values in written[start:end]
+                    ),
+                )
+            )
+
+
+def to_parquet_method(
+    pd_table: Any,
+    conn: Any,
+    keys: List[str],
+    data_iter: Iterator[Tuple[Any, ...]],
+    max_workers: int = (os.cpu_count() or 1) * 5,
+    filesystem: Optional["FileSystem"] = None,
+) -> int:
+    """`DataFrame.to_sql(method=...)` writing Parquet files instead of INSERTs.
+
+    pandas creates the table with the SQLAlchemy dialect, whose location is
+    `<S3Location>/<schema>/<table>/`, and calls this method once per `chunksize`
+    rows. Each chunk is written to that location with `to_parquet`, compressed per
+    the `compression` connection option and split into one file per worker.
+    pandas creates tables without partitions, use `to_sql` for partitioned tables.
+
+        df.to_sql("table", engine, index=False, method=to_parquet_method)
+
+    Returns the number of rows of the chunk."""
+    import pandas as pd
+    import pyarrow as pa
+    from pyarrow.fs import FileType
+
+    raw_connection = conn.connection
+    schema = pd_table.schema if pd_table.schema else raw_connection.schema_name
+    location = _get_table_location(raw_connection, schema, pd_table.name)
+    if pd_table.if_exists == "replace":
+        fs, path = _get_filesystem(location, filesystem)
+        if fs.get_file_info(path).type != FileType.NotFound:
+            fs.delete_dir_contents(path)
+        # The table has been replaced, the following chunks are appended to it.
+        pd_table.if_exists = "append"
+
+    type_compiler = conn.dialect.type_compiler
+    arrow_schema = pa.schema(
+        [
+            (c.name, _to_arrow_type(type_compiler.process(c.type)))
+            for c in pd_table.table.columns
+        ]
+    )
+    df = pd.DataFrame(list(data_iter), columns=keys, dtype=object)
+    to_parquet(
+        df,
+        location,
+        compression=raw_connection._driver_kwargs.get("compression"),
+        chunksize=max(_MIN_ROWS_PER_FILE, -(-len(df) // max_workers)),
+        max_workers=max_workers,
+        filesystem=filesystem,
+        arrow_schema=arrow_schema,
+    )
+    return len(df)
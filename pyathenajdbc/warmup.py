@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""Create an AppCDS (class data sharing) archive for the Athena JDBC driver.
+
+The archive is written next to the JDBC driver and is picked up automatically
+by ``Connection._start_jvm``, which shortens JVM startup and driver class loading::
+
+    $ python -m pyathenajdbc.warmup
+    $ python -m pyathenajdbc.warmup --benchmark
+"""
+import argparse
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from typing import List, Optional, Tuple
+
+from pyathenajdbc import ATHENA_DRIVER_CLASS_NAME, ATHENA_JAR
+from pyathenajdbc.error import OperationalError
+
+_logger = logging.getLogger(__name__)  # type: ignore
+
+_BASE_PATH: str = os.path.dirname(os.path.abspath(__file__))
+
+# Packages of the driver that are loaded when connecting and running a query.
+_WORKLOAD_CLASS_PREFIXES: Tuple[str, ...] = (
+    "com/simba/athena/jdbc/",
+    "com/simba/athena/jdbc42/",
+    "com/simba/athena/athena/",
+    "com/simba/athena/dsi/",
+    "com/simba/athena/support/",
+    "com/simba/athena/exceptions/",
+)
+
+
+def _default_driver_path(driver_path: Optional[str]) -> str:
+    return driver_path if driver_path else os.path.join(_BASE_PATH, ATHENA_JAR)
+
+
+def _load_driver_classes(driver_path: str) -> int:
+    import jpype
+
+    class_ = jpype.java.lang.Class
+    loader = jpype.java.lang.ClassLoader.getSystemClassLoader()
+    loaded = 0
+    with zipfile.ZipFile(driver_path) as jar:
+        for name in jar.namelist():
+            if not name.endswith(".class") or not name.startswith(
+                _WORKLOAD_CLASS_PREFIXES
+            ):
+                continue
+            try:
+                class_.forName(name[:-6].replace("/", "."), False, loader)
+                loaded += 1
+            except Exception:
+                _logger.debug("Failed to load class: %s", name, exc_info=True)
+    return loaded
+
+
+def _run_workload(
+    jvm_path: Optional[str],
+    jvm_options: List[str],
+    driver_path: str,
+    query: bool,
+    class_path_file: Optional[str],
+) -> None:
+    import jpype
+
+    from pyathenajdbc.connection import Connection
+    from pyathenajdbc.converter import DefaultJDBCTypeConverter
+
+    Connection._start_jvm(jvm_path, jvm_options, driver_path, None)
+    jpype.JClass(ATHENA_DRIVER_CLASS_NAME)
+    DefaultJDBCTypeConverter()
+    loaded = _load_driver_classes(driver_path)
+    _logger.info("Loaded %d driver classes.", loaded)
+    if query:
+        with Connection(driver_path=driver_path) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+    if class_path_file:
+        with open(class_path_file, "w") as f:
+            f.write(jpype.java.lang.System.getProperty("java.class.path"))
+    jpype.shutdownJVM()
+
+
+def _measure_startup(
+    jvm_path: Optional[str], jvm_options: List[str], driver_path: str
+) -> None:
+    start = time.perf_counter()
+    import jpype
+
+    from pyathenajdbc.connection import Connection
+    from pyathenajdbc.converter import DefaultJDBCTypeConverter
+
+    Connection._start_jvm(jvm_path, jvm_options, driver_path, None)
+    jpype.JClass(ATHENA_DRIVER_CLASS_NAME)
+    DefaultJDBCTypeConverter()
+    print("{0:f}".format(time.perf_counter() - start))
+
+
+def _run_child(args: List[str], timeout: Optional[float] = None) -> str:
+    command = [sys.executable, "-m", "pyathenajdbc.warmup"] + args
+    _logger.debug("Running: %s", command)
+    result = subprocess.run(
+        command,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        timeout=timeout,
+    )
+    if result.returncode != 0:
+        raise OperationalError("Command failed: {0}".format(" ".join(command)))
+    return result.stdout
+
+
+def _child_args(
+    mode: str,
+    jvm_path: Optional[str],
+    jvm_options: List[str],
+    driver_path: str,
+) -> List[str]:
+    args = [mode, "--driver-path", driver_path]
+    if jvm_path:
+        args.extend(["--jvm-path", jvm_path])
+    for opt in jvm_options:
+        args.append("--jvm-option={0}".format(opt))
+    return args
+
+
+def _find_java(jvm_path: Optional[str]) -> str:
+    import jpype
+
+    path = os.path.dirname(jvm_path if jvm_path else jpype.getDefaultJVMPath())
+    while path and path != os.path.dirname(path):
+        java = os.path.join(path, "bin", "java")
+        if os.path.exists(java):
+            return java
+        path = os.path.dirname(path)
+    raise OperationalError("The java command was not found.")
+
+
+def generate(
+    jvm_path: Optional[str] = None,
+    jvm_options: Optional[List[str]] = None,
+    driver_path: Optional[str] = None,
+    query: bool = False,
+    timeout: Optional[float] = 600,
+) -> str:
+    """Run the class loading workload in a child JVM and write the archive.
+
+    JDK 13 or later dumps a dynamic archive at exit (`-XX:ArchiveClassesAtExit`).
+    On JDK 10 to 12 the loaded class list is dumped instead and a static archive
+    is created from it with `java -Xshare:dump`."""
+    from pyathenajdbc.connection import Connection
+
+    driver_path = _default_driver_path(driver_path)
+    jvm_options = list(jvm_options) if jvm_options else []
+    archive = Connection._get_shared_archive_path(driver_path)
+    if os.path.exists(archive):
+        os.remove(archive)
+
+    workload = _child_args("--workload", jvm_path, jvm_options, driver_path)
+    if query:
+        workload.append("--query")
+    _run_child(
+        workload + ["--jvm-option=-XX:ArchiveClassesAtExit={0}".format(archive)],
+        timeout,
+    )
+    if os.path.exists(archive):
+        return archive
+
+    _logger.info("Dynamic archive is not supported, creating a static archive.")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        class_list = os.path.join(tmpdir, "classlist")
+        class_path_file = os.path.join(tmpdir, "classpath")
+        _run_child(
+            workload
+            + [
+                "--jvm-option=-XX:DumpLoadedClassList={0}".format(class_list),
+                "--class-path-file",
+                class_path_file,
+            ],
+            timeout,
+        )
+        if not os.path.exists(class_list):
+            raise OperationalError("This JVM does not support AppCDS.")
+        with open(class_path_file, "r") as f:
+            class_path = f.read()
+        subprocess.run(
+            [
+                _find_java(jvm_path),
+                "-Xshare:dump",
+                "-XX:SharedClassListFile={0}".format(class_list),
+                "-XX:SharedArchiveFile={0}".format(archive),
+                "-Djava.class.path={0}".format(class_path),
+            ]
+            + jvm_options,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            timeout=timeout,
+        )
+    if not os.path.exists(archive):
+        raise OperationalError("Failed to create the archive: {0}".format(archive))
+    return archive
+
+
+def benchmark(
+    jvm_path: Optional[str] = None,
+    jvm_options: Optional[List[str]] = None,
+    driver_path: Optional[str] = None,
+    repeat: int = 5,
+) -> Tuple[List[float], List[float]]:
+    """Measure JVM startup plus driver loading without and with the archive.
+
+    Each measurement runs in a fresh process. The baseline still uses the
+    JDK's default CDS archive, so the difference is the gain of the driver archive.
+    """
+    from pyathenajdbc.connection import Connection
+
+    driver_path = _default_driver_path(driver_path)
+    jvm_options = list(jvm_options) if jvm_options else []
+    if not Connection._find_shared_archive(driver_path, jvm_options):
+        raise OperationalError(
+            "Archive not found, run `python -m pyathenajdbc.warmup` first."
+        )
+    cold_args = _child_args(
+        "--startup", jvm_path, jvm_options + ["-Xshare:auto"], driver_path
+    )
+    warm_args = _child_args("--startup", jvm_path, jvm_options, driver_path)
+    cold, warm = [], []
+    for _ in range(repeat):
+        cold.append(float(_run_child(cold_args).strip().splitlines()[-1]))
+        warm.append(float(_run_child(warm_args).strip().splitlines()[-1]))
+    return cold, warm
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m pyathenajdbc.warmup",
+        description="Create an AppCDS archive for the Athena JDBC driver.",
+    )
+    parser.add_argument("--jvm-path", default=None)
+    parser.add_argument("--jvm-option", action="append", default=[], dest="jvm_options")
+    parser.add_argument("--driver-path", default=None)
+    parser.add_argument(
+        "--query",
+        action="store_true",
+        help="Also connect and run `SELECT 1` (requires AWS credentials).",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Compare startup time without and with the archive.",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workload", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--startup", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--class-path-file", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    driver_path = _default_driver_path(args.driver_path)
+    if args.workload:
+        _run_workload(
+            args.jvm_path,
+            args.jvm_options,
+            driver_path,
+            args.query,
+            args.class_path_file,
+        )
+    elif args.startup:
+        _measure_startup(args.jvm_path, args.jvm_options, driver_path)
+    elif args.benchmark:
+        cold, warm = benchmark(
+            args.jvm_path, args.jvm_options, driver_path, args.repeat
+        )
+        cold_mean, warm_mean = statistics.mean(cold), statistics.mean(warm)
+        print("JVM startup + driver loading ({0} runs)".format(args.repeat))
+        print(
+            "  without archive: mean {0:.3f}s min {1:.3f}s".format(cold_mean, min(cold))
+        )
+        print(
+            "  with archive:    mean {0:.3f}s min {1:.3f}s".format(warm_mean, min(warm))
+        )
+        print("  gain:            {0:.1%}".format(1 - warm_mean / cold_mean))
+    else:
+        archive = generate(
+            args.jvm_path, args.jvm_options, driver_path, query=args.query
+        )
+        print("Created: {0}".format(archive))
+
+
+if __name__ == "__main__":
+    main()
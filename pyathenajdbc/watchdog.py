@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""Cancellation of queries that time out or whose cursor is abandoned.
+
+One daemon thread per process cancels the statements of the queries that run
+past their `execute(timeout=...)`. Cursors closed or garbage-collected while a
+query is running cancel it. The cancellations are counted in `metrics`."""
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pyathenajdbc.util import attach_thread_to_jvm
+
+_logger = logging.getLogger(__name__)  # type: ignore
+
+
+class CancelMetrics(object):
+    """Counts of the queries cancelled, by reason."""
+
+    TIMEOUT: str = "timeout"
+    CLOSE: str = "close"
+    COLLECT: str = "collect"
+    CANCEL: str = "cancel"
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts: Dict[str, int] = {
+                self.TIMEOUT: 0,
+                self.CLOSE: 0,
+                self.COLLECT: 0,
+                self.CANCEL: 0,
+            }
+
+    def increment(self, reason: str) -> None:
+        with self._lock:
+            self._counts[reason] = self._counts.get(reason, 0) + 1
+
+    @property
+    def timed_out(self) -> int:
+        return self._counts[self.TIMEOUT]
+
+    @property
+    def cancelled_on_close(self) -> int:
+        return self._counts[self.CLOSE]
+
+    @property
+    def cancelled_on_collect(self) -> int:
+        return self._counts[self.COLLECT]
+
+    @property
+    def cancelled(self) -> int:
+        return self._counts[self.CANCEL]
+
+    @property
+    def total(self) -> int:
+        return sum(self._counts.values())
+
+    def as_dict(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+metrics: CancelMetrics = CancelMetrics()
+
+
+class StatementState(object):
+    """The statement of a cursor and whether a query is running on it.
+
+    It is shared with the watchdog and the finalizer of the cursor,
+    so that they do not hold a reference to the cursor itself."""
+
+    __slots__ = ("statement", "executing", "cancel_reason", "_lock", "__weakref__")
+
+    def __init__(self, statement: Any) -> None:
+        self.statement = statement
+        self.executing: bool = False
+        self.cancel_reason: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            self.executing = True
+            self.cancel_reason = None
+
+    def finish(self) -> None:
+        with self._lock:
+            self.executing = False
+
+    @attach_thread_to_jvm
+    def cancel(self, reason: str) -> bool:
+        """Cancels the running query, if any. Returns whether it was cancelled."""
+        with self._lock:
+            if not self.executing or self.cancel_reason is not None:
+                return False
+            self.cancel_reason = reason
+        _logger.info("Cancelling the query (%s).", reason)
+        try:
+            self.statement.cancel()
+        except Exception:
+            _logger.exception("Failed to cancel the query.")
+            return False
+        metrics.increment(reason)
+        return True
+
+
+def finalize_statement(state: StatementState) -> None:
+    """Cancels the running query and closes the statement of a collected cursor."""
+    import jpype
+
+    if isinstance(state.statement, jpype.JObject) and not jpype.isJVMStarted():
+        return
+    state.cancel(CancelMetrics.COLLECT)
+    try:
+        _close_statement(state.statement)
+    except Exception:
+        _logger.debug("Failed to close the statement.", exc_info=True)
+
+
+@attach_thread_to_jvm
+def _close_statement(statement: Any) -> None:
+    if not statement.isClosed():
+        statement.close()
+
+
+class Watchdog(object):
+    """Runs callbacks at their deadline in a daemon thread, started on first use."""
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self._heap: List[Tuple[float, int, Callable[[], Any]]] = []
+        self._counter = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, delay: float, callback: Callable[[], Any]) -> int:
+        """Calls `callback` after `delay` seconds unless unscheduled.
+        Returns the handle to unschedule it."""
+        handle = next(self._counter)
+        with self._condition:
+            heapq.heappush(self._heap, (time.monotonic() + delay, handle, callback))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="pyathenajdbc-watchdog"
+                )
+                self._thread.daemon = True
+                self._thread.start()
+            self._condition.notify()
+        return handle
+
+    def unschedule(self, handle: int) -> None:
+        with self._condition:
+            # Drops the callback now, so it does not hold the statement until the deadline.
+            heap = [entry for entry in self._heap if entry[1] != handle]
+            if len(heap) != len(self._heap):
+                heapq.heapify(heap)
+                self._heap = heap
+
+    @staticmethod
+    def _attach_as_daemon() -> None:
+        import jpype
+
+        # A non-daemon thread attached to the JVM would block its shutdown at exit.
+        if jpype.isJVMStarted() and not jpype.java.lang.Thread.isAttached():
+            jpype.java.lang.Thread.attachAsDaemon()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    timeout = (
+                        self._heap[0][0] - time.monotonic() if self._heap else None
+                    )
+                    self._condition.wait(timeout)
+                _, _, callback = heapq.heappop(self._heap)
+            try:
+                self._attach_as_daemon()
+                callback()
+            except Exception:
+                _logger.exception("Watchdog callback failed.")
+
+
+_watchdog: Optional[Watchdog] = None
+_watchdog_lock = threading.Lock()
+
+
+def get_watchdog() -> Watchdog:
+    global _watchdog
+    with _watchdog_lock:
+        if _watchdog is None:
+            _watchdog = Watchdog()
+        return _watchdog
@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 import contextlib
+import csv
+import os
+import tempfile
 import time
 import unittest
 from concurrent import futures
@@ -10,7 +13,18 @@ from random import randint
 
 from pyathenajdbc import BINARY, BOOLEAN, DATE, DATETIME, NUMBER, STRING, connect
 from pyathenajdbc.cursor import Cursor
-from pyathenajdbc.error import DatabaseError, NotSupportedError, ProgrammingError
+from pyathenajdbc.error import (
+    DatabaseError,
+    NotSupportedError,
+    OperationalError,
+    ProgrammingError,
+)
+from pyathenajdbc.events import QueryListener
+from pyathenajdbc.jvm import BackpressurePolicy
+from pyathenajdbc.profiler import profile
+from pyathenajdbc.row import LazyRow, NamedRow, dict_row, named_row, tuple_row
+from pyathenajdbc.spill import SpillBuffer
+from pyathenajdbc.watchdog import metrics
 from tests import SCHEMA, WORK_GROUP, WithConnect
 from tests.util import with_cursor
 
@@ -49,6 +63,21 @@ class TestCursor(unittest.TestCase, WithConnect):
         self.assertEqual(list(cursor), [(1,)])
         self.assertRaises(StopIteration, cursor.__next__)
 
+    @with_cursor()
+    def test_iterator_mixed_with_fetch(self, cursor):
+        cursor.arraysize = 10
+        cursor.execute("SELECT a FROM many_rows ORDER BY a LIMIT 25")
+        self.assertEqual(next(cursor), (0,))
+        self.assertEqual(cursor.rownumber, 1)
+        self.assertEqual(cursor.fetchone(), (1,))
+        self.assertEqual(cursor.fetchmany(3), [(2,), (3,), (4,)])
+        self.assertEqual(next(cursor), (5,))
+        self.assertRaises(ProgrammingError, lambda: cursor.fetchone(columns=["a"]))
+        self.assertEqual(cursor.fetchall(), [(i,) for i in range(6, 25)])
+        self.assertEqual(cursor.rownumber, 25)
+        cursor.execute("SELECT a FROM many_rows ORDER BY a LIMIT 25")
+        self.assertEqual(list(cursor), [(i,) for i in range(25)])
+
     @with_cursor()
     def test_description_initial(self, cursor):
         self.assertEqual(cursor.description, None)
@@ -79,6 +108,35 @@ class TestCursor(unittest.TestCase, WithConnect):
         self.assertEqual(len(cursor.fetchmany(10)), 10)
         self.assertEqual(len(cursor.fetchmany(10)), 5)
 
+    @with_cursor()
+    def test_max_rows(self, cursor):
+        cursor.execute("SELECT a FROM many_rows ORDER BY a", max_rows=15)
+        self.assertEqual(len(cursor.fetchmany(10)), 10)
+        self.assertEqual(len(cursor.fetchmany(10)), 5)
+        self.assertEqual(cursor.fetchmany(10), [])
+        self.assertIsNone(cursor.fetchone())
+        self.assertEqual(cursor.description[0][0], "a")
+        cursor.execute("SELECT a FROM many_rows ORDER BY a LIMIT 3", max_rows=15)
+        self.assertEqual(cursor.fetchall(), [(0,), (1,), (2,)])
+        cursor.execute("SELECT a FROM many_rows")
+        self.assertEqual(len(cursor.fetchall()), 10000)
+        self.assertRaises(
+            ProgrammingError,
+            lambda: cursor.execute("SELECT * FROM one_row", max_rows=0),
+        )
+
+    @with_cursor()
+    def test_head(self, cursor):
+        self.assertEqual(
+            cursor.head("SELECT a FROM many_rows ORDER BY a", n=3), [(0,), (1,), (2,)]
+        )
+        self.assertEqual(
+            cursor.head(
+                "SELECT * FROM one_row_complex", n=1, columns=["col_int", "col_string"]
+            ),
+            [(2147483647, "a string")],
+        )
+
     @with_cursor()
     def test_arraysize(self, cursor):
         cursor.arraysize = 5
@@ -433,3 +491,326 @@ class TestCursor(unittest.TestCase, WithConnect):
         self.assertRaises(ProgrammingError, cursor.fetchall)
         self.assertRaises(ProgrammingError, cursor.fetchmany)
         self.assertRaises(ProgrammingError, cursor.fetchone)
+
+    @with_cursor()
+    def test_to_parquet(self, cursor):
+        import pyarrow.parquet as pq
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cursor.execute("SELECT a FROM many_rows ORDER BY a")
+            path = os.path.join(tmpdir, "many_rows.parquet")
+            result = cursor.to_parquet(path, row_group_size=3000)
+            self.assertEqual(result.rows, 10000)
+            self.assertEqual(result.paths, [path])
+            self.assertEqual(result.bytes, os.path.getsize(path))
+            self.assertEqual(pq.ParquetFile(path).num_row_groups, 4)
+            self.assertEqual(
+                pq.read_table(path).column("a").to_pylist(), list(range(10000))
+            )
+
+            cursor.execute("SELECT a FROM many_rows ORDER BY a")
+            result = cursor.to_parquet(
+                os.path.join(tmpdir, "shards"), max_rows_per_file=4000
+            )
+            self.assertEqual(result.rows, 10000)
+            self.assertEqual(
+                [pq.read_metadata(p).num_rows for p in result.paths],
+                [4000, 4000, 2000],
+            )
+
+            # Batches are handed to the concurrent writers in turn.
+            cursor.execute("SELECT a FROM many_rows ORDER BY a")
+            result = cursor.to_parquet(
+                os.path.join(tmpdir, "writers"),
+                row_group_size=1000,
+                max_rows_per_file=3000,
+                writers=2,
+            )
+            self.assertEqual(result.rows, 10000)
+            self.assertEqual(
+                [pq.read_metadata(p).num_rows for p in result.paths],
+                [3000, 3000, 2000, 2000],
+            )
+            self.assertEqual(
+                sorted(pq.read_table(result.paths[0]).column("a").to_pylist())[:2],
+                [0, 1],
+            )
+            self.assertEqual(
+                pq.read_table(result.paths[1]).column("a").to_pylist()[:2],
+                [1000, 1001],
+            )
+            self.assertEqual(
+                sorted(
+                    a
+                    for p in result.paths
+                    for a in pq.read_table(p).column("a").to_pylist()
+                ),
+                list(range(10000)),
+            )
+
+    @with_cursor()
+    def test_to_csv(self, cursor):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cursor.execute("SELECT a FROM many_rows ORDER BY a")
+            cursor.fetchmany(10)
+            path = os.path.join(tmpdir, "many_rows.csv")
+            result = cursor.to_csv(path, batch_size=3000)
+            self.assertEqual(result.rows, 9990)
+            with open(path, newline="") as f:
+                rows = list(csv.reader(f))
+            self.assertEqual(rows[0], ["a"])
+            self.assertEqual(rows[1:], [[str(i)] for i in range(10, 10000)])
+
+            cursor.execute("SELECT * FROM one_row")
+            result = cursor.to_csv(os.path.join(tmpdir, "shards"), max_rows_per_file=1)
+            self.assertEqual((result.rows, len(result.paths)), (1, 1))
+
+    def test_spill_buffer(self):
+        rows = [(i, "a" * i, Decimal(i), date(2017, 1, 2)) for i in range(100)]
+        with SpillBuffer(1000, batch_size=7) as buffer:
+            for row in rows:
+                buffer.append(row)
+            buffer.flush()
+            self.assertTrue(buffer.spilled)
+            self.assertLess(len(buffer.rows), 100)
+            self.assertEqual(len(buffer), 100)
+            self.assertEqual(list(buffer), rows)
+            self.assertEqual(buffer, rows)
+            self.assertEqual(buffer[-1], rows[-1])
+            self.assertEqual(buffer[10:60:3], rows[10:60:3])
+            self.assertRaises(IndexError, lambda: buffer[100])
+
+    def test_fetch_spill(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor(spill_threshold=10000) as cursor:
+                cursor.execute("SELECT a FROM many_rows ORDER BY a")
+                rows = cursor.fetchall()
+                self.assertIsInstance(rows, SpillBuffer)
+                self.assertTrue(rows.spilled)
+                self.assertEqual(len(rows), 10000)
+                self.assertEqual(rows[9999], (9999,))
+                self.assertEqual(list(rows), [(i,) for i in range(10000)])
+
+                cursor.execute("SELECT * FROM one_row")
+                self.assertEqual(cursor.fetchall(), [(1,)])
+
+    def test_fetch_spill_mixed_with_iterator(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor(spill_threshold=5) as cursor:
+                cursor.arraysize = 10
+                cursor.execute("SELECT a FROM many_rows ORDER BY a LIMIT 50")
+                self.assertEqual(next(cursor), (0,))
+                rows = cursor.fetchmany(20)
+                self.assertTrue(rows.spilled)
+                self.assertEqual(list(rows), [(i,) for i in range(1, 21)])
+                self.assertEqual(next(cursor), (21,))
+                self.assertEqual(list(cursor.fetchall()), [(i,) for i in range(22, 50)])
+
+    @with_cursor()
+    def test_fetch_columns(self, cursor):
+        cursor.execute("SELECT col_int, col_string, col_boolean FROM one_row_complex")
+        self.assertEqual(cursor.fetchone(columns=["col_string"]), ("a string",))
+        cursor.execute("SELECT col_int, col_string, col_boolean FROM one_row_complex")
+        self.assertEqual(
+            cursor.fetchmany(10, columns=["col_boolean", 0]), [(True, 2147483647)]
+        )
+        cursor.execute("SELECT col_int, col_string, col_boolean FROM one_row_complex")
+        self.assertEqual(cursor.fetchall(columns=[]), [()])
+        cursor.execute("SELECT * FROM one_row")
+        self.assertRaises(ProgrammingError, lambda: cursor.fetchall(columns=["a"]))
+
+    def test_lazy_row(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor(lazy=True) as cursor:
+                cursor.execute(
+                    "SELECT col_int, col_string, col_boolean FROM one_row_complex"
+                )
+                row = cursor.fetchone()
+                self.assertIsInstance(row, LazyRow)
+                self.assertEqual(len(row), 3)
+                self.assertEqual(row[1], "a string")
+                self.assertTrue(row.is_current)
+                self.assertEqual(cursor.fetchone(), None)
+                self.assertFalse(row.is_current)
+                # Cells read while the row was current are kept.
+                self.assertEqual(row[1], "a string")
+                self.assertRaises(ProgrammingError, lambda: row[0])
+
+                cursor.execute("SELECT a FROM many_rows ORDER BY a LIMIT 3")
+                self.assertEqual([r.materialize() for r in cursor], [(0,), (1,), (2,)])
+
+    def test_row_factory(self):
+        query = (
+            'SELECT col_int, col_string AS "class", col_boolean FROM one_row_complex'
+        )
+        with contextlib.closing(self.connect(row_factory=named_row)) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(query)
+                row = cursor.fetchone()
+                self.assertIsInstance(row, NamedRow)
+                self.assertEqual(row.col_int, 2147483647)
+                self.assertEqual(row["class"], "a string")
+                self.assertEqual(row._1, "a string")
+                self.assertEqual(row[2], True)
+                self.assertEqual(row, (2147483647, "a string", True))
+                self.assertEqual(row._asdict()["col_boolean"], True)
+
+            with conn.cursor(row_factory=dict_row) as cursor:
+                cursor.execute(query)
+                rows = cursor.fetchall()
+                self.assertEqual(
+                    rows,
+                    [{"col_int": 2147483647, "class": "a string", "col_boolean": True}],
+                )
+                cursor.execute(query)
+                self.assertEqual(
+                    cursor.fetchmany(columns=["col_boolean"]), [{"col_boolean": True}]
+                )
+
+            with conn.cursor(row_factory=tuple_row, spill_threshold=0) as cursor:
+                cursor.execute("SELECT a FROM many_rows ORDER BY a")
+                self.assertEqual(list(cursor.fetchall()), [(i,) for i in range(10000)])
+
+    def test_listeners(self):
+        class _Recorder(QueryListener):
+            def __init__(self):
+                self.events = []
+
+            def before_execute(self, cursor, operation, parameters):
+                self.events.append(("before_execute", operation, parameters))
+
+            def after_execute(self, cursor, query, format_elapsed, execute_elapsed):
+                self.events.append(("after_execute", query))
+
+            def on_fetch_batch(self, cursor, rows, bytes, elapsed, finished):
+                self.events.append(("on_fetch_batch", rows, bytes > 0, finished))
+
+            def on_close(self, cursor):
+                self.events.append(("on_close",))
+
+            def on_error(self, cursor, query, error):
+                self.events.append(("on_error", query, type(error)))
+
+        recorder = _Recorder()
+        with contextlib.closing(self.connect(listeners=[recorder])) as conn:
+            with conn.cursor() as cursor:
+                cursor.arraysize = 4000
+                cursor.execute("SELECT a FROM many_rows WHERE a < %(a)d", {"a": 5000})
+                self.assertEqual(len(cursor.fetchall()), 5000)
+                self.assertRaises(
+                    DatabaseError,
+                    lambda: cursor.execute("SELECT * FROM this_really_does_not_exist"),
+                )
+        self.assertEqual(
+            recorder.events[:5],
+            [
+                (
+                    "before_execute",
+                    "SELECT a FROM many_rows WHERE a < %(a)d",
+                    {"a": 5000},
+                ),
+                ("after_execute", "SELECT a FROM many_rows WHERE a < 5000"),
+                ("on_fetch_batch", 4000, True, False),
+                ("on_fetch_batch", 1000, True, True),
+                ("before_execute", "SELECT * FROM this_really_does_not_exist", None),
+            ],
+        )
+        self.assertEqual(
+            recorder.events[5][:2],
+            ("on_error", "SELECT * FROM this_really_does_not_exist"),
+        )
+        self.assertEqual(recorder.events[6:], [("on_close",)])
+
+    def test_profile(self):
+        with contextlib.closing(self.connect(profile=True)) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT col_int, col_string FROM one_row_complex")
+                cursor.fetchall()
+            profiler = conn.profiler
+            self.assertEqual(profiler.rows, 1)
+            self.assertEqual(profiler.types["INTEGER"].calls, 1)
+            self.assertEqual(profiler.columns["2: col_string"].calls, 1)
+            self.assertEqual(profiler.jni_calls["wasNull"].calls, 2)
+            self.assertGreater(profiler.jni_calls_per_row, 4)
+            self.assertIn("JDBC type", profiler.report())
+
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor() as cursor:
+                self.assertIsNone(cursor.profiler)
+                with profile(cursor) as profiler:
+                    cursor.execute("SELECT a FROM many_rows")
+                    cursor.fetchall()
+                self.assertIsNone(cursor.profiler)
+                self.assertEqual(profiler.rows, 10000)
+                self.assertEqual(profiler.as_dict()["types"]["INTEGER"]["calls"], 10000)
+
+    @with_cursor()
+    def test_execute_timeout(self, cursor):
+        timed_out = metrics.timed_out
+        with self.assertRaises(OperationalError):
+            cursor.execute(
+                """
+                SELECT count(*) FROM many_rows a
+                CROSS JOIN many_rows b CROSS JOIN many_rows c
+                """,
+                timeout=1,
+            )
+        self.assertEqual(metrics.timed_out, timed_out + 1)
+        cursor.execute("SELECT * FROM one_row", timeout=60)
+        self.assertEqual(cursor.fetchall(), [(1,)])
+        self.assertRaises(
+            ProgrammingError, lambda: cursor.execute("SELECT * FROM one_row", timeout=0)
+        )
+
+    def test_close_running_query(self):
+        cancelled = metrics.cancelled_on_close
+        with contextlib.closing(self.connect()) as conn:
+            cursor = conn.cursor()
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                future = executor.submit(
+                    cursor.execute,
+                    """
+                    SELECT count(*) FROM many_rows a
+                    CROSS JOIN many_rows b CROSS JOIN many_rows c
+                    """,
+                )
+                time.sleep(3)
+                cursor.close()
+                self.assertRaises(DatabaseError, future.result)
+        self.assertEqual(metrics.cancelled_on_close, cancelled + 1)
+
+    def test_backpressure(self):
+        usages = iter([1.0, 1.0, 1.0])
+        policy = BackpressurePolicy(min_fetch_size=250, usage=lambda: next(usages, 0.0))
+        with contextlib.closing(self.connect(backpressure=policy)) as conn:
+            with conn.cursor() as cursor:
+                self.assertIs(cursor.backpressure, policy)
+                cursor.execute("SELECT a FROM many_rows ORDER BY a")
+                self.assertEqual([r[0] for r in cursor.fetchall()], list(range(10000)))
+                # 1000 -> 500 -> 250 -> 250, then back up to 1000.
+                self.assertEqual(policy.shrinks, 2)
+                self.assertEqual(cursor._fetch_size, 1000)
+
+    def test_meta_data(self):
+        with contextlib.closing(self.connect()) as conn:
+            self.assertIn(SCHEMA, conn.get_schema_names())
+            table_names = conn.get_table_names()
+            self.assertIn("one_row", table_names)
+            self.assertIn("one_row_complex", table_names)
+            self.assertEqual(
+                conn.get_table_names(SCHEMA.replace("_", "%")),
+                [],
+            )
+
+            columns = conn.get_columns(SCHEMA, "one_row")
+            self.assertEqual(len(columns), 1)
+            self.assertEqual(columns[0]["table_name"], "one_row")
+            self.assertEqual(columns[0]["column_name"], "number_of_rows")
+            self.assertEqual(columns[0]["jdbc_type"], "INTEGER")
+            self.assertTrue(columns[0]["nullable"])
+            self.assertEqual(columns[0]["ordinal_position"], 1)
+
+            all_columns = conn.get_columns(SCHEMA)
+            self.assertEqual(
+                [c for c in all_columns if c["table_name"] == "one_row"], columns
+            )
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import unittest
+from datetime import date
+
+from pyathenajdbc.dask import _partition_predicates, read_athena
+from pyathenajdbc.error import ProgrammingError
+from tests import SCHEMA
+
+
+class TestDask(unittest.TestCase):
+    def test_partition_predicates(self):
+        self.assertEqual(
+            _partition_predicates("a", "INTEGER", 2, (0, 9)),
+            ['("a" >= 0 AND "a" < 5) OR "a" IS NULL', '"a" >= 5 AND "a" < 10'],
+        )
+        self.assertEqual(len(_partition_predicates("a", "INTEGER", 10, (1, 3))), 3)
+        self.assertEqual(
+            _partition_predicates("d", "DATE", 2, (date(2020, 1, 1), date(2020, 1, 4))),
+            [
+                "(\"d\" >= DATE '2020-01-01' AND \"d\" < DATE '2020-01-03')"
+                + ' OR "d" IS NULL',
+                "\"d\" >= DATE '2020-01-03' AND \"d\" < DATE '2020-01-05'",
+            ],
+        )
+        self.assertEqual(_partition_predicates("a", "INTEGER", 1, (0, 9)), ["TRUE"])
+        self.assertEqual(len(_partition_predicates("s", "VARCHAR", 3, None)), 3)
+
+    def test_read_athena(self):
+        df = read_athena(
+            "SELECT * FROM many_rows",
+            partition_on="a",
+            npartitions=4,
+            connect_kwargs={"Schema": SCHEMA},
+        )
+        self.assertEqual(df.npartitions, 4)
+        self.assertEqual(str(df.dtypes["a"]), "Int32")
+        self.assertEqual(sorted(df.compute()["a"].tolist()), list(range(10000)))
+
+    def test_read_athena_hash(self):
+        df = read_athena(
+            "SELECT col_string, col_int FROM one_row_complex",
+            partition_on="col_string",
+            npartitions=3,
+            connect_kwargs={"Schema": SCHEMA},
+        )
+        self.assertEqual(df.npartitions, 3)
+        self.assertEqual(df.compute().values.tolist(), [["a string", 2147483647]])
+
+    def test_read_athena_no_such_column(self):
+        self.assertRaises(
+            ProgrammingError,
+            lambda: read_athena(
+                "SELECT * FROM many_rows",
+                partition_on="b",
+                npartitions=4,
+                connect_kwargs={"Schema": SCHEMA},
+            ),
+        )
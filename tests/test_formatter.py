@@ -5,7 +5,7 @@ from datetime import date, datetime
 from decimal import Decimal
 
 from pyathenajdbc.error import ProgrammingError
-from pyathenajdbc.formatter import DefaultParameterFormatter
+from pyathenajdbc.formatter import DefaultParameterFormatter, limit_query
 
 
 class TestDefaultParameterFormatter(unittest.TestCase):
@@ -483,3 +483,58 @@ class TestDefaultParameterFormatter(unittest.TestCase):
                 ["a string"],
             ),
         )
+
+    def test_limit_query(self):
+        self.assertEqual(
+            limit_query("SELECT * FROM test_table", 10),
+            "SELECT * FROM test_table\nLIMIT 10",
+        )
+        self.assertEqual(
+            limit_query("SELECT * FROM test_table LIMIT 100;", 10),
+            "SELECT * FROM test_table LIMIT 10",
+        )
+        self.assertEqual(
+            limit_query("select * from test_table limit 5", 10),
+            "select * from test_table limit 5",
+        )
+        self.assertEqual(
+            limit_query("WITH t AS (SELECT 1) SELECT * FROM t LIMIT ALL", 10),
+            "WITH t AS (SELECT 1) SELECT * FROM t LIMIT 10",
+        )
+        # The LIMIT of a subquery or in a comment does not limit the query.
+        self.assertEqual(
+            limit_query("SELECT * FROM (SELECT * FROM test_table LIMIT 5)", 10),
+            "SELECT * FROM (SELECT * FROM test_table LIMIT 5)\nLIMIT 10",
+        )
+        self.assertEqual(
+            limit_query("SELECT * FROM test_table -- LIMIT 5", 10),
+            "SELECT * FROM test_table -- LIMIT 5\nLIMIT 10",
+        )
+        # String literals and comments are not parsed as SQL.
+        self.assertEqual(
+            limit_query("SELECT * FROM test_table WHERE s = '--' LIMIT 100", 10),
+            "SELECT * FROM test_table WHERE s = '--' LIMIT 10",
+        )
+        self.assertEqual(
+            limit_query("SELECT * FROM test_table WHERE s = 'LIMIT 5'", 10),
+            "SELECT * FROM test_table WHERE s = 'LIMIT 5'\nLIMIT 10",
+        )
+        self.assertEqual(
+            limit_query("SELECT * FROM test_table LIMIT 10 -- preview", 5),
+            "SELECT * FROM test_table LIMIT 5 -- preview",
+        )
+        self.assertEqual(
+            limit_query("SELECT * FROM test_table LIMIT 3; -- preview", 5),
+            "SELECT * FROM test_table LIMIT 3 -- preview",
+        )
+        self.assertEqual(
+            limit_query("SELECT * FROM test_table /* ; */ LIMIT 10 /* LIMIT 1 */", 5),
+            "SELECT * FROM test_table /* ; */ LIMIT 5 /* LIMIT 1 */",
+        )
+        # Unterminated literals are left to setMaxRows.
+        query = "SELECT * FROM test_table WHERE s = 'it"
+        self.assertEqual(limit_query(query, 10), query)
+        query = "SELECT * FROM test_table FETCH FIRST 5 ROWS ONLY"
+        self.assertEqual(limit_query(query, 10), query)
+        query = "INSERT INTO test_table SELECT * FROM other_table"
+        self.assertEqual(limit_query(query, 10), query)
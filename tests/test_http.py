@@ -0,0 +1,553 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import json
+import os
+import re
+import socketserver
+import sys
+import threading
+import time
+import types
+import unittest
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+
+from pyathenajdbc import BINARY, BOOLEAN, DATE, DATETIME, NUMBER, STRING, connect
+from pyathenajdbc.error import (
+    DatabaseError,
+    NotSupportedError,
+    OperationalError,
+    ProgrammingError,
+)
+from pyathenajdbc.http_backend import (
+    Credentials,
+    _Statement,
+    get_credentials_provider,
+    sign_request,
+)
+
+_COMPLEX_COLUMNS = [
+    ("col_boolean", "boolean", 0, 0),
+    ("col_tinyint", "tinyint", 3, 0),
+    ("col_smallint", "smallint", 5, 0),
+    ("col_int", "integer", 10, 0),
+    ("col_bigint", "bigint", 19, 0),
+    ("col_float", "float", 17, 0),
+    ("col_double", "double", 17, 0),
+    ("col_string", "varchar", 2147483647, 0),
+    ("col_timestamp", "timestamp", 3, 0),
+    ("col_date", "date", 0, 0),
+    ("col_binary", "varbinary", 1073741824, 0),
+    ("col_array", "array", 0, 0),
+    ("col_map", "map", 0, 0),
+    ("col_struct", "row", 0, 0),
+    ("col_decimal", "decimal", 10, 1),
+]
+_COMPLEX_ROW = [
+    "true",
+    "127",
+    "32767",
+    "2147483647",
+    "9223372036854775807",
+    "0.5",
+    "0.25",
+    "a string",
+    "2017-01-01 00:00:00.000",
+    "2017-01-02",
+    "31 32 33",
+    "[1, 2]",
+    "{1=2, 3=4}",
+    "{a=1, b=2}",
+    "0.1",
+]
+
+# Columns and rows of the queries, the others fail.
+_TABLES = {
+    "SELECT * FROM one_row": ([("number_of_rows", "integer", 10, 0)], [["1"]]),
+    "SELECT a FROM many_rows ORDER BY a": (
+        [("a", "integer", 10, 0)],
+        [[str(i)] for i in range(2500)],
+    ),
+    "SELECT * FROM one_row_complex": (_COMPLEX_COLUMNS, [_COMPLEX_ROW]),
+    "SELECT * FROM nulls": (
+        [("a", "integer", 10, 0), ("b", "varchar", 10, 0)],
+        [[None, None], ["1", ""]],
+    ),
+}
+
+
+def _get_table(sql):
+    match = re.match(r"^(.*)\nLIMIT (\d+)$", sql, re.DOTALL)
+    if match:
+        table = _TABLES.get(match.group(1), None)
+        return (table[0], table[1][: int(match.group(2))]) if table else None
+    return _TABLES.get(sql, None)
+
+
+class _StubAthena(object):
+    """The state of the Athena API of the stub server."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = dict()
+        self.calls = []
+        self.throttle = 0
+
+    def handle(self, operation, request):
+        self.calls.append(operation)
+        if self.throttle > 0:
+            self.throttle -= 1
+            return 400, {"__type": "ThrottlingException", "message": "Rate exceeded"}
+        return getattr(self, "_" + operation)(request)
+
+    def _StartQueryExecution(self, request):
+        query_id = str(uuid.uuid4())
+        sql = request["QueryString"]
+        self.queries[query_id] = {
+            "request": request,
+            "state": "RUNNING" if sql.startswith("SELECT sleep") else "SUCCEEDED",
+        }
+        return 200, {"QueryExecutionId": query_id}
+
+    def _StopQueryExecution(self, request):
+        self.queries[request["QueryExecutionId"]]["state"] = "CANCELLED"
+        return 200, {}
+
+    def _GetQueryExecution(self, request):
+        query = self.queries[request["QueryExecutionId"]]
+        sql = query["request"]["QueryString"]
+        status = {"State": query["state"]}
+        if not _get_table(sql) and sql.startswith("SELECT") and "sleep" not in sql:
+            status = {"State": "FAILED", "StateChangeReason": "TABLE_NOT_FOUND"}
+        return 200, {
+            "QueryExecution": {
+                "QueryExecutionId": request["QueryExecutionId"],
+                "Query": sql,
+                "StatementType": "DML" if sql.startswith("SELECT") else "DDL",
+                "Status": status,
+            }
+        }
+
+    def _GetQueryResults(self, request):
+        sql = self.queries[request["QueryExecutionId"]]["request"]["QueryString"]
+        table = _get_table(sql)
+        if not table:
+            return 200, {"UpdateCount": 0, "ResultSet": {"Rows": []}}
+        columns, rows = table
+        start = int(request.get("NextToken") or 0)
+        end = start + request.get("MaxResults", 1000)
+        data = [[name for name, _, _, _ in columns]] + rows
+        response = {
+            "ResultSet": {
+                "Rows": [
+                    {
+                        "Data": [
+                            {"VarCharValue": v} if v is not None else {} for v in row
+                        ]
+                    }
+                    for row in data[start:end]
+                ],
+                "ResultSetMetadata": {
+                    "ColumnInfo": [
+                        {
+                            "Name": name,
+                            "Label": name,
+                            "Type": type_,
+                            "Precision": precision,
+                            "Scale": scale,
+                            "Nullable": "UNKNOWN",
+                        }
+                        for name, type_, precision, scale in columns
+                    ]
+                },
+            }
+        }
+        if end < len(data):
+            response["NextToken"] = str(end)
+        return 200, response
+
+    def _ListDatabases(self, request):
+        if not request.get("NextToken"):
+            return 200, {"DatabaseList": [{"Name": "default"}], "NextToken": "1"}
+        return 200, {"DatabaseList": [{"Name": "test"}]}
+
+    def _ListTableMetadata(self, request):
+        return 200, {
+            "TableMetadataList": [
+                {
+                    "Name": "one_row",
+                    "Columns": [{"Name": "number_of_rows", "Type": "int"}],
+                },
+                {
+                    "Name": "partition_table",
+                    "Columns": [
+                        {"Name": "a", "Type": "decimal(10,1)", "Comment": "a column"}
+                    ],
+                    "PartitionKeys": [{"Name": "b", "Type": "int"}],
+                },
+            ]
+        }
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super(_StubHandler, self).setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        operation = self.headers["X-Amz-Target"].split(".")[-1]
+        self.server.headers.append(dict(self.headers))
+        with self.server.athena.lock:
+            status, response = self.server.athena.handle(operation, json.loads(body))
+        data = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/x-amz-json-1.1")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubServer(socketserver.ThreadingMixIn, HTTPServer):
+
+    daemon_threads = True
+
+
+class TestHTTP(unittest.TestCase):
+    def setUp(self):
+        self.server = _StubServer(("127.0.0.1", 0), _StubHandler)
+        self.server.athena = _StubAthena()
+        self.server.connections = 0
+        self.server.headers = []
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def connect(self, **opts):
+        return connect(
+            backend="http",
+            AwsRegion="us-west-2",
+            Schema="test",
+            EndpointOverride="http://127.0.0.1:{0}".format(self.server.server_port),
+            User="AKID",
+            Password="secret",
+            poll_interval=0.01,
+            **opts
+        )
+
+    def test_sign_request(self):
+        # get-vanilla of the AWS Signature Version 4 test suite.
+        headers = sign_request(
+            "GET",
+            "example.amazonaws.com",
+            "/",
+            {},
+            b"",
+            Credentials("AKIDEXAMPLE", "wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY"),
+            "us-east-1",
+            "service",
+            datetime(2015, 8, 30, 12, 36, 0, tzinfo=timezone.utc),
+        )
+        self.assertEqual(
+            headers["Authorization"],
+            "AWS4-HMAC-SHA256 "
+            "Credential=AKIDEXAMPLE/20150830/us-east-1/service/aws4_request, "
+            "SignedHeaders=host;x-amz-date, "
+            "Signature=5fa00fa31553b73ebf1942676e86291e8372ff2a2260956d9b8aae1d763fbf31",
+        )
+        self.assertEqual(headers["X-Amz-Date"], "20150830T123600Z")
+
+    def test_credentials(self):
+        # Without botocore, only the environment variables and the shared
+        # credentials file are read.
+        environ = {"AWS_SHARED_CREDENTIALS_FILE": os.devnull}
+        with mock.patch.dict(
+            sys.modules,
+            {"botocore": None, "botocore.exceptions": None, "botocore.session": None},
+        ):
+            with mock.patch.dict(os.environ, environ, clear=True):
+                with self.assertRaisesRegex(ProgrammingError, "Install botocore"):
+                    get_credentials_provider()
+            environ.update({"AWS_ACCESS_KEY_ID": "AKID", "AWS_SECRET_ACCESS_KEY": "a"})
+            with mock.patch.dict(os.environ, environ, clear=True):
+                self.assertEqual(get_credentials_provider()(), Credentials("AKID", "a"))
+
+        # With botocore, the credentials are read again for each request,
+        # so that temporary credentials are refreshed.
+        keys = iter(range(100))
+        resolved = mock.Mock()
+        resolved.get_frozen_credentials.side_effect = lambda: mock.Mock(
+            access_key="AKID{0}".format(next(keys)), secret_key="a", token="t"
+        )
+        botocore = types.ModuleType("botocore")
+        botocore.exceptions = types.SimpleNamespace(BotoCoreError=Exception)
+        botocore.session = types.SimpleNamespace(
+            Session=mock.Mock(return_value=mock.Mock(get_credentials=lambda: resolved))
+        )
+        with mock.patch.dict(
+            sys.modules,
+            {
+                "botocore": botocore,
+                "botocore.exceptions": botocore.exceptions,
+                "botocore.session": botocore.session,
+            },
+        ):
+            conn = connect(
+                backend="http",
+                AwsRegion="us-west-2",
+                EndpointOverride="http://127.0.0.1:{0}".format(self.server.server_port),
+                Profile="test",
+                poll_interval=0.01,
+            )
+            with contextlib.closing(conn):
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT * FROM one_row")
+                    cursor.execute("SELECT * FROM one_row")
+        botocore.session.Session.assert_called_once_with(profile="test")
+        access_keys = [
+            h["Authorization"].split("Credential=")[1].split("/")[0]
+            for h in self.server.headers
+        ]
+        self.assertEqual(
+            access_keys, ["AKID{0}".format(i) for i in range(len(access_keys))]
+        )
+        self.assertTrue(
+            all(h["X-Amz-Security-Token"] == "t" for h in self.server.headers)
+        )
+
+    def test_fetch(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT * FROM one_row")
+                self.assertEqual(cursor.rownumber, 0)
+                self.assertEqual(cursor.fetchone(), (1,))
+                self.assertEqual(cursor.fetchone(), None)
+                cursor.execute("SELECT a FROM many_rows ORDER BY a")
+                self.assertEqual(len(cursor.fetchmany(10)), 10)
+                self.assertEqual(cursor.rownumber, 10)
+                self.assertEqual(cursor.fetchall(), [(i,) for i in range(10, 2500)])
+                cursor.execute("SELECT a FROM many_rows ORDER BY a")
+                self.assertEqual(list(cursor), [(i,) for i in range(2500)])
+        request = self.server.athena.queries[next(iter(self.server.athena.queries))][
+            "request"
+        ]
+        self.assertEqual(request["QueryExecutionContext"]["Database"], "test")
+        headers = self.server.headers[0]
+        self.assertTrue(
+            headers["Authorization"].startswith("AWS4-HMAC-SHA256 Credential=AKID/")
+        )
+        self.assertIn("/us-west-2/athena/aws4_request", headers["Authorization"])
+
+    def test_complex(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT * FROM one_row_complex")
+                self.assertEqual(
+                    [d[:2] for d in cursor.description],
+                    [
+                        ("col_boolean", "BOOLEAN"),
+                        ("col_tinyint", "TINYINT"),
+                        ("col_smallint", "SMALLINT"),
+                        ("col_int", "INTEGER"),
+                        ("col_bigint", "BIGINT"),
+                        ("col_float", "REAL"),
+                        ("col_double", "DOUBLE"),
+                        ("col_string", "VARCHAR"),
+                        ("col_timestamp", "TIMESTAMP"),
+                        ("col_date", "DATE"),
+                        ("col_binary", "VARBINARY"),
+                        ("col_array", "ARRAY"),
+                        ("col_map", "VARCHAR"),
+                        ("col_struct", "VARCHAR"),
+                        ("col_decimal", "DECIMAL"),
+                    ],
+                )
+                self.assertEqual(cursor.description[-1][2:], (10, None, 10, 1, 1))
+                self.assertEqual(
+                    [d[1] for d in cursor.description],
+                    [
+                        BOOLEAN,
+                        NUMBER,
+                        NUMBER,
+                        NUMBER,
+                        NUMBER,
+                        NUMBER,
+                        NUMBER,
+                        STRING,
+                        DATETIME,
+                        DATE,
+                        BINARY,
+                        STRING,
+                        STRING,
+                        STRING,
+                        NUMBER,
+                    ],
+                )
+                rows = cursor.fetchall()
+                expected = [
+                    (
+                        True,
+                        127,
+                        32767,
+                        2147483647,
+                        9223372036854775807,
+                        0.5,
+                        0.25,
+                        "a string",
+                        datetime(2017, 1, 1, 0, 0, 0),
+                        date(2017, 1, 2),
+                        b"123",
+                        "1, 2",
+                        "{1=2, 3=4}",
+                        "{a=1, b=2}",
+                        Decimal("0.1"),
+                    )
+                ]
+                self.assertEqual(rows, expected)
+                self.assertEqual(list(map(type, rows[0])), list(map(type, expected[0])))
+
+    def test_nulls(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT * FROM nulls")
+                self.assertEqual(cursor.fetchall(), [(None, None), (1, "")])
+
+    def test_query_with_parameter(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("CREATE TABLE %(param)s", {"param": "a'b"})
+                self.assertFalse(cursor.has_result_set)
+                self.assertEqual(cursor.description, None)
+        queries = list(self.server.athena.queries.values())
+        self.assertEqual(queries[0]["request"]["QueryString"], "CREATE TABLE 'a\\'b'")
+
+    def test_max_rows(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT a FROM many_rows ORDER BY a", max_rows=15)
+                self.assertEqual(cursor.fetchall(), [(i,) for i in range(15)])
+        queries = list(self.server.athena.queries.values())
+        self.assertEqual(
+            queries[0]["request"]["QueryString"],
+            "SELECT a FROM many_rows ORDER BY a\nLIMIT 15",
+        )
+
+    def test_bad_query(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor() as cursor:
+                with self.assertRaises(DatabaseError) as cm:
+                    cursor.execute("SELECT does_not_exist FROM this_does_not_exist")
+                self.assertIn("TABLE_NOT_FOUND", str(cm.exception))
+                self.assertEqual(cursor.description, None)
+
+    def test_timeout(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor() as cursor:
+                start = time.perf_counter()
+                self.assertRaises(
+                    OperationalError,
+                    lambda: cursor.execute("SELECT sleep(60)", timeout=0.5),
+                )
+                self.assertLess(time.perf_counter() - start, 5)
+        self.assertIn("StopQueryExecution", self.server.athena.calls)
+
+    def test_error_after_timeout(self):
+        def get_result_set(statement):
+            time.sleep(0.5)
+            raise RuntimeError("HIVE_BAD_DATA")
+
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor() as cursor:
+                # Errors other than the cancel of a timed out query are not timeouts.
+                with mock.patch.object(_Statement, "getResultSet", get_result_set):
+                    with self.assertRaises(DatabaseError) as cm:
+                        cursor.execute("SELECT * FROM one_row", timeout=0.1)
+                self.assertNotIsInstance(cm.exception, OperationalError)
+                self.assertEqual(str(cm.exception), "HIVE_BAD_DATA")
+
+    def test_cancel(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor() as cursor:
+
+                def cancel(c):
+                    time.sleep(0.5)
+                    c.cancel()
+
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    executor.submit(cancel, cursor)
+                    self.assertRaises(
+                        DatabaseError, lambda: cursor.execute("SELECT sleep(60)")
+                    )
+        states = [q["state"] for q in self.server.athena.queries.values()]
+        self.assertEqual(states, ["CANCELLED"])
+
+    def test_retry(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor() as cursor:
+                self.server.athena.throttle = 2
+                cursor.execute("SELECT * FROM one_row")
+                self.assertEqual(cursor.fetchall(), [(1,)])
+        with contextlib.closing(self.connect(max_retries=1)) as conn:
+            with conn.cursor() as cursor:
+                self.server.athena.throttle = 2
+                with self.assertRaises(DatabaseError) as cm:
+                    cursor.execute("SELECT * FROM one_row")
+                self.assertIn("ThrottlingException", str(cm.exception))
+
+    def test_connection_pool(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor() as cursor:
+                for _ in range(10):
+                    cursor.execute("SELECT * FROM one_row")
+                    cursor.fetchall()
+        # Every call reuses the same keep-alive connection.
+        self.assertEqual(self.server.connections, 1)
+        self.assertGreaterEqual(len(self.server.headers), 30)
+
+    def test_metadata(self):
+        with contextlib.closing(self.connect()) as conn:
+            self.assertEqual(conn.get_schema_names(), ["default", "test"])
+            self.assertEqual(conn.get_table_names(), ["one_row", "partition_table"])
+            columns = conn.get_columns()
+            self.assertEqual(
+                [(c["table_name"], c["column_name"], c["jdbc_type"]) for c in columns],
+                [
+                    ("one_row", "number_of_rows", "INTEGER"),
+                    ("partition_table", "a", "DECIMAL"),
+                    ("partition_table", "b", "INTEGER"),
+                ],
+            )
+            self.assertEqual(columns[1]["type_name"], "decimal(10,1)")
+            self.assertEqual(columns[1]["comment"], "a column")
+            self.assertEqual(columns[2]["ordinal_position"], 2)
+
+    def test_options(self):
+        self.assertRaises(
+            NotSupportedError, lambda: self.connect(jvm_options=["-Xmx1g"])
+        )
+        self.assertRaises(NotSupportedError, lambda: connect(backend="odbc"))
+
+    def test_connection_is_closed(self):
+        conn = self.connect()
+        cursor = conn.cursor()
+        conn.close()
+        self.assertTrue(conn.is_closed)
+        self.assertRaises(ProgrammingError, lambda: conn.cursor())
+        self.assertRaises(
+            DatabaseError, lambda: cursor.execute("SELECT * FROM one_row")
+        )
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from pyathenajdbc import jvm_stats, prewarm
+from pyathenajdbc.error import ProgrammingError
+from pyathenajdbc.jvm import BackpressurePolicy, memory_options, parse_size
+
+
+class TestJVM(unittest.TestCase):
+    def test_jvm_stats(self):
+        prewarm()
+        stats = jvm_stats()
+        self.assertGreater(stats.heap.used, 0)
+        self.assertGreaterEqual(stats.heap.committed, stats.heap.used)
+        self.assertTrue(0 < stats.heap.ratio < 1)
+        self.assertGreater(stats.non_heap.used, 0)
+        self.assertTrue(stats.gcs)
+        self.assertEqual(stats.gc_count, sum(gc.collection_count for gc in stats.gcs))
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size(1024), 1024)
+        self.assertEqual(parse_size("512m"), 512 * 1024**2)
+        self.assertEqual(parse_size("2G"), 2 * 1024**3)
+        self.assertEqual(parse_size("64kb"), 64 * 1024)
+        self.assertRaises(ProgrammingError, lambda: parse_size("lots"))
+        self.assertRaises(ProgrammingError, lambda: parse_size(0))
+
+    def test_memory_options(self):
+        self.assertEqual(
+            memory_options("512m"),
+            [
+                "-Xmx384m",
+                "-Xms96m",
+                "-XX:MaxMetaspaceSize=64m",
+                "-XX:MaxDirectMemorySize=32m",
+                "-XX:+UseSerialGC",
+            ],
+        )
+        options = memory_options("4g")
+        self.assertIn("-Xmx3072m", options)
+        self.assertIn("-XX:+UseG1GC", options)
+        # Explicit options win.
+        options = memory_options("4g", ["-Xmx1g", "-XX:+UseZGC"])
+        self.assertFalse([o for o in options if o.startswith("-Xmx")])
+        self.assertFalse([o for o in options if o.endswith("GC")])
+        # The initial heap and the collector follow the given -Xmx.
+        options = memory_options("4g", ["-Xmx512m"])
+        self.assertEqual(
+            [o for o in options if o.startswith(("-Xm", "-XX:+Use"))],
+            ["-Xms128m", "-XX:+UseSerialGC"],
+        )
+        self.assertIn("-Xms8m", memory_options("4g", ["-Xmx8m"]))
+
+    def test_backpressure_policy(self):
+        usages = [0.9]
+        policy = BackpressurePolicy(
+            threshold=0.8,
+            min_fetch_size=100,
+            max_pause=1.0,
+            poll_interval=0.01,
+            usage=lambda: usages.pop(0) if usages else 0.1,
+        )
+        self.assertAlmostEqual(policy.resume_threshold, 0.6)
+        self.assertEqual(policy.apply(1000, 1000), 500)
+        self.assertEqual(policy.shrinks, 1)
+        self.assertEqual(policy.pauses, 1)
+        self.assertLess(policy.pause_elapsed, 1.0)
+        self.assertEqual(policy.apply(500, 1000), 1000)
+        self.assertEqual(policy.apply(1000, 1000), 1000)
+
+        policy = BackpressurePolicy(min_fetch_size=100, usage=lambda: 1.0)
+        self.assertEqual(policy.apply(150, 1000), 100)
+        self.assertEqual(policy.apply(100, 1000), 100)
+        self.assertEqual(policy.shrinks, 1)
+        self.assertEqual(policy.pauses, 0)
+        self.assertRaises(ProgrammingError, lambda: BackpressurePolicy(threshold=0))
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import time
+import unittest
+
+from pyathenajdbc.error import DatabaseError, OperationalError, ProgrammingError
+from pyathenajdbc.parallel import ProcessPoolCursor, run_queries
+from tests import SCHEMA
+
+
+class TestParallel(unittest.TestCase):
+    def test_run_queries(self):
+        tables = run_queries(
+            [
+                "SELECT * FROM one_row",
+                "SELECT a FROM many_rows ORDER BY a",
+                "SELECT * FROM one_row WHERE number_of_rows = 0",
+            ],
+            processes=2,
+            batch_size=1000,
+            Schema=SCHEMA,
+        )
+        self.assertEqual(tables[0].to_pydict(), {"number_of_rows": [1]})
+        self.assertEqual(tables[1].column("a").to_pylist(), list(range(10000)))
+        self.assertEqual(tables[2].num_rows, 0)
+        self.assertEqual(tables[2].column_names, ["number_of_rows"])
+
+    def test_run_queries_error(self):
+        self.assertRaises(
+            DatabaseError,
+            lambda: run_queries(
+                [
+                    "SELECT * FROM one_row",
+                    "SELECT does_not_exist FROM this_really_does_not_exist",
+                ],
+                Schema=SCHEMA,
+            ),
+        )
+
+    def test_cancel(self):
+        with ProcessPoolCursor(processes=1, Schema=SCHEMA) as cursor:
+            running = cursor.execute(
+                """
+                SELECT count(*) FROM many_rows a
+                CROSS JOIN many_rows b
+                CROSS JOIN many_rows c
+                """
+            )
+            queued = cursor.execute("SELECT * FROM one_row")
+            time.sleep(10)
+            cursor.cancel()
+            self.assertRaises(OperationalError, lambda: running.result())
+            self.assertRaises(OperationalError, lambda: queued.result())
+            self.assertEqual(
+                cursor.execute("SELECT * FROM one_row").result().num_rows, 1
+            )
+        self.assertTrue(cursor.is_closed)
+        self.assertRaises(
+            ProgrammingError, lambda: cursor.execute("SELECT * FROM one_row")
+        )
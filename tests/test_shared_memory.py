@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import multiprocessing
+import sys
+import unittest
+
+import pyarrow as pa
+
+from pyathenajdbc.error import ProgrammingError
+from pyathenajdbc.shared_memory import SharedMemoryReader, export_result, export_table
+from tests import WithConnect
+from tests.util import with_cursor
+
+
+def _read_column(handle, queue):
+    with SharedMemoryReader(handle) as reader:
+        queue.put((reader.description, reader.table.column("a").to_pylist()))
+
+
+@unittest.skipIf(
+    sys.version_info < (3, 8), "Shared memory requires Python 3.8 or later."
+)
+class TestSharedMemory(unittest.TestCase, WithConnect):
+    def test_export_table(self):
+        table = pa.table({"a": list(range(100)), "b": [str(i) for i in range(100)]})
+        with export_table(table, [("a", "INTEGER", None, None, 10, 0, 1)]) as result:
+            self.assertEqual(result.num_rows, 100)
+            context = multiprocessing.get_context("spawn")
+            queue = context.Queue()
+            process = context.Process(target=_read_column, args=(result.handle, queue))
+            process.start()
+            self.assertEqual(
+                queue.get(timeout=60),
+                ([("a", "INTEGER", None, None, 10, 0, 1)], list(range(100))),
+            )
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+
+            reader = SharedMemoryReader(result.handle)
+            column = reader.table.column("b")
+            self.assertRaises(ProgrammingError, reader.close)
+            # The reader stays open after a failed close.
+            self.assertFalse(reader.is_closed)
+            self.assertEqual(reader.table.num_rows, 100)
+            self.assertEqual(column.to_pylist()[:3], ["0", "1", "2"])
+            del column
+            reader.close()
+            self.assertTrue(reader.is_closed)
+            self.assertRaises(ProgrammingError, lambda: reader.table)
+        self.assertTrue(result.is_closed)
+        self.assertRaises(FileNotFoundError, lambda: SharedMemoryReader(result.handle))
+
+    @with_cursor()
+    def test_export_result(self, cursor):
+        cursor.execute("SELECT a FROM many_rows ORDER BY a")
+        with export_result(cursor) as result:
+            with SharedMemoryReader(result.handle) as reader:
+                self.assertEqual(reader.description[0][:2], ("a", "INTEGER"))
+                self.assertEqual(reader.to_pandas()["a"].tolist(), list(range(10000)))
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import os
+import tempfile
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+
+import pandas as pd
+
+from pyathenajdbc import connect
+from pyathenajdbc.codec import decode, decode_rows, encode, encode_rows
+from pyathenajdbc.error import DatabaseError, NotSupportedError, ProgrammingError
+from pyathenajdbc.sidecar import start_server
+from tests import SCHEMA
+
+
+class TestSidecar(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.path = os.path.join(cls.tmpdir.name, "pyathenajdbc.sock")
+        cls.process = start_server(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.process.terminate()
+        cls.process.wait()
+        cls.tmpdir.cleanup()
+
+    def connect(self, **opts):
+        return connect(sidecar=self.path, Schema=SCHEMA, **opts)
+
+    def test_codec(self):
+        values = [
+            None,
+            True,
+            False,
+            1,
+            2**70,
+            0.5,
+            "王兢",
+            b"123",
+            Decimal("0.1"),
+            date(2017, 1, 2),
+            datetime(2017, 1, 1, 12, 34, 56, 789),
+            [1, "a"],
+            {"a": 1},
+        ]
+        for v in values:
+            self.assertEqual(decode(encode(v)), v)
+        # Subclasses of datetime are not encoded as dates.
+        timestamp = pd.Timestamp(2017, 1, 1, 12, 34, 56, 789)
+        self.assertEqual(
+            decode(encode(timestamp)), datetime(2017, 1, 1, 12, 34, 56, 789)
+        )
+        rows = [(1, "a", None), (2, "b", Decimal("1.5"))]
+        self.assertEqual(decode_rows(encode_rows(rows)), rows)
+        self.assertEqual(decode_rows(encode_rows([])), [])
+
+    def test_fetch(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT * FROM one_row")
+                self.assertEqual(cursor.fetchone(), (1,))
+                self.assertEqual(cursor.fetchone(), None)
+                cursor.execute("SELECT a FROM many_rows ORDER BY a")
+                self.assertEqual(len(cursor.fetchmany(10)), 10)
+                self.assertEqual(cursor.rownumber, 10)
+                self.assertEqual(cursor.fetchall(), [(i,) for i in range(10, 10000)])
+
+    def test_complex(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT col_boolean, col_timestamp, col_date, col_binary, col_decimal
+                    FROM one_row_complex
+                    """
+                )
+                self.assertEqual(cursor.description[0][:2], ("col_boolean", "BOOLEAN"))
+                self.assertEqual(
+                    cursor.fetchall(),
+                    [
+                        (
+                            True,
+                            datetime(2017, 1, 1, 0, 0, 0),
+                            date(2017, 1, 2),
+                            b"123",
+                            Decimal("0.1"),
+                        )
+                    ],
+                )
+
+    def test_query_with_parameter(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT %(param)s FROM one_row", {"param": "a'b"})
+                self.assertEqual(cursor.fetchall(), [("a'b",)])
+
+    def test_bad_query(self):
+        with contextlib.closing(self.connect()) as conn:
+            with conn.cursor() as cursor:
+                self.assertRaises(
+                    DatabaseError,
+                    lambda: cursor.execute(
+                        "SELECT does_not_exist FROM this_really_does_not_exist"
+                    ),
+                )
+                self.assertEqual(cursor.description, None)
+
+    def test_server_options(self):
+        self.assertRaises(
+            NotSupportedError, lambda: self.connect(jvm_options=["-Xmx1g"])
+        )
+
+    def test_fork(self):
+        with contextlib.closing(self.connect()) as conn:
+            pid = os.fork()
+            if pid == 0:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT * FROM one_row")
+                    os._exit(0 if cursor.fetchall() == [(1,)] else 1)
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(os.WEXITSTATUS(status), 0)
+
+    def test_cancel_other_connection(self):
+        with contextlib.closing(self.connect()) as conn:
+            with contextlib.closing(self.connect()) as other:
+                with conn.cursor() as cursor:
+                    # Only the connection that opened the cursor may cancel it.
+                    self.assertRaises(
+                        ProgrammingError, lambda: other._cancel(cursor._cursor_id)
+                    )
+                    conn._cancel(cursor._cursor_id)
+
+    def test_cursor_is_closed(self):
+        with contextlib.closing(self.connect()) as conn:
+            cursor = conn.cursor()
+            cursor.close()
+            self.assertTrue(cursor.is_closed)
+            self.assertRaises(
+                ProgrammingError, lambda: cursor.execute("SELECT * FROM one_row")
+            )
+        self.assertTrue(conn.is_closed)
+        self.assertRaises(ProgrammingError, lambda: conn.cursor())
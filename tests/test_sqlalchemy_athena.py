@@ -4,6 +4,7 @@ import unittest
 import uuid
 from datetime import date, datetime
 from decimal import Decimal
+from unittest import mock
 from urllib.parse import quote_plus
 
 import numpy as np
@@ -11,7 +12,9 @@ import pandas as pd
 import sqlalchemy
 from sqlalchemy import String
 from sqlalchemy.engine import create_engine
-from sqlalchemy.exc import NoSuchTableError
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+from sqlalchemy.exc import CompileError, NoSuchTableError
+from sqlalchemy.schema import CreateTable
 from sqlalchemy.sql import expression
 from sqlalchemy.sql.schema import Column, MetaData, Table
 from sqlalchemy.sql.sqltypes import (
@@ -26,6 +29,10 @@ from sqlalchemy.sql.sqltypes import (
     TIMESTAMP,
 )
 
+from pyathenajdbc.connection import Connection
+from pyathenajdbc.error import DatabaseError
+from pyathenajdbc.sqlalchemy_athena import CreateTableAs, clear_metadata_cache
+from pyathenajdbc.util import to_parquet_method
 from tests.conftest import ENV, SCHEMA
 from tests.util import with_engine
 
@@ -38,7 +45,7 @@ class TestSQLAlchemyAthena(unittest.TestCase):
     https://github.com/dropbox/PyHive/blob/master/pyhive/tests/test_sqlalchemy_presto.py
     """
 
-    def create_engine(self):
+    def create_engine(self, **kwargs):
         conn_str = (
             "awsathena+jdbc://athena.{AwsRegion}.amazonaws.com:443/"
             + "{Schema}?S3OutputLocation={S3OutputLocation}&S3Location={S3Location}"
@@ -50,7 +57,8 @@ class TestSQLAlchemyAthena(unittest.TestCase):
                 Schema=SCHEMA,
                 S3OutputLocation=quote_plus(ENV.s3_staging_dir),
                 S3Location=quote_plus(ENV.s3_staging_dir),
-            )
+            ),
+            **kwargs
         )
 
     @with_engine()
@@ -175,6 +183,211 @@ class TestSQLAlchemyAthena(unittest.TestCase):
         self.assertEqual(actual["ordinal_position"], 1)
         self.assertIsNone(actual["comment"])
 
+    @with_engine(metadata_cache_ttl=0)
+    def test_get_columns_information_schema(self, engine, conn):
+        with mock.patch.object(
+            Connection, "get_columns", side_effect=DatabaseError("Not supported")
+        ):
+            insp = sqlalchemy.inspect(engine)
+            fallback = insp.get_columns(table_name="one_row_complex", schema=SCHEMA)
+        insp = sqlalchemy.inspect(engine)
+        actual = insp.get_columns(table_name="one_row_complex", schema=SCHEMA)
+        self.assertEqual(
+            [(c["name"], c["type"], c["ordinal_position"]) for c in actual],
+            [(c["name"], c["type"], c["ordinal_position"]) for c in fallback],
+        )
+
+    @with_engine(metadata_cache_ttl=0)
+    def test_get_table_names_information_schema(self, engine, conn):
+        with mock.patch.object(
+            Connection, "get_columns", side_effect=DatabaseError("Not supported")
+        ):
+            insp = sqlalchemy.inspect(engine)
+            self.assertIn("many_rows", insp.get_table_names(schema=SCHEMA))
+            self.assertTrue(insp.has_table("one_row", schema=SCHEMA))
+
+    def test_metadata_cache(self):
+        clear_metadata_cache()
+        with mock.patch.object(
+            Connection, "get_columns", autospec=True, side_effect=Connection.get_columns
+        ) as get_columns:
+            for _ in range(2):
+                engine = self.create_engine(metadata_cache_ttl=60)
+                try:
+                    insp = sqlalchemy.inspect(engine)
+                    self.assertEqual(
+                        len(insp.get_columns("one_row_complex", schema=SCHEMA)), 15
+                    )
+                    self.assertIn("many_rows", insp.get_table_names(schema=SCHEMA))
+                finally:
+                    engine.dispose()
+            # All columns of the schema are fetched once and shared across engines.
+            self.assertEqual(get_columns.call_count, 1)
+
+            engine = self.create_engine(metadata_cache_ttl=60)
+            try:
+                insp = sqlalchemy.inspect(engine)
+                # has_table does not read the cache.
+                self.assertTrue(insp.has_table("one_row", schema=SCHEMA))
+                self.assertFalse(insp.has_table("does_not_exist", schema=SCHEMA))
+            finally:
+                engine.dispose()
+            self.assertEqual(get_columns.call_count, 3)
+
+            # The cache is disabled by default.
+            engine = self.create_engine()
+            try:
+                insp = sqlalchemy.inspect(engine)
+                self.assertIn("many_rows", insp.get_table_names(schema=SCHEMA))
+            finally:
+                engine.dispose()
+            self.assertEqual(get_columns.call_count, 4)
+
+    @with_engine(metadata_cache_ttl=60)
+    def test_metadata_cache_ddl(self, engine, conn):
+        table_name = "metadata_cache_{0}".format(str(uuid.uuid4()).replace("-", ""))
+        insp = sqlalchemy.inspect(engine)
+        self.assertNotIn(table_name, insp.get_table_names(schema=SCHEMA))
+        table = Table(
+            table_name,
+            MetaData(bind=engine),
+            Column("a", INTEGER),
+            schema=SCHEMA,
+        )
+        table.create()
+        insp = sqlalchemy.inspect(engine)
+        self.assertIn(table_name, insp.get_table_names(schema=SCHEMA))
+        table.drop()
+        insp = sqlalchemy.inspect(engine)
+        self.assertNotIn(table_name, insp.get_table_names(schema=SCHEMA))
+
+    @with_engine()
+    def test_create_table_partitioned(self, engine, conn):
+        table_name = "partitioned_{0}".format(str(uuid.uuid4()).replace("-", ""))
+        table = Table(
+            table_name,
+            MetaData(bind=engine),
+            Column("a", INTEGER),
+            Column("b", String(10)),
+            Column("dt", String(10)),
+            schema=SCHEMA,
+            awsathena_partition=["dt"],
+            awsathena_cluster=["a"],
+            awsathena_bucket_count=4,
+            awsathena_format="orc",
+            awsathena_compression="zlib",
+        )
+        ddl = str(CreateTable(table).compile(bind=engine))
+        self.assertIn("PARTITIONED BY (\n\tdt VARCHAR(10)\n)", ddl)
+        self.assertIn("CLUSTERED BY (a) INTO 4 BUCKETS", ddl)
+        self.assertIn("STORED AS ORC", ddl)
+        self.assertIn("TBLPROPERTIES ('orc.compress'='ZLIB')", ddl)
+        table.create()
+        try:
+            insp = sqlalchemy.inspect(engine)
+            self.assertEqual(
+                [c["name"] for c in insp.get_columns(table_name, schema=SCHEMA)],
+                ["a", "b", "dt"],
+            )
+        finally:
+            table.drop()
+
+        self.assertRaises(
+            CompileError,
+            lambda: CreateTable(
+                Table(
+                    table_name,
+                    MetaData(bind=engine),
+                    Column("a", INTEGER),
+                    schema=SCHEMA,
+                    awsathena_format="xml",
+                )
+            ).compile(bind=engine),
+        )
+
+    @with_engine()
+    def test_create_table_as(self, engine, conn):
+        table_name = "ctas_{0}".format(str(uuid.uuid4()).replace("-", ""))
+        many_rows = Table("many_rows", MetaData(bind=engine), autoload=True)
+        conn.execute(
+            CreateTableAs(
+                table_name,
+                sqlalchemy.select(
+                    [many_rows.c.a, (many_rows.c.a % 3).label("p")]
+                ).where(many_rows.c.a < 30),
+                schema=SCHEMA,
+                partitioned_by=["p"],
+                bucketed_by=["a"],
+                bucket_count=2,
+                format="parquet",
+                compression="snappy",
+            )
+        )
+        try:
+            table = Table(
+                table_name, MetaData(bind=engine), schema=SCHEMA, autoload=True
+            )
+            self.assertEqual(
+                conn.execute(
+                    sqlalchemy.select([sqlalchemy.func.count()]).where(table.c.p == 0)
+                ).scalar(),
+                10,
+            )
+        finally:
+            conn.execute("DROP TABLE {0}.{1}".format(SCHEMA, table_name))
+
+        ddl = str(
+            CreateTableAs(
+                table_name,
+                sqlalchemy.select([many_rows.c.a]),
+                location="s3://bucket/it's/",
+                partitioned_by=["it's"],
+                bucketed_by=["a'b"],
+                bucket_count=2,
+            ).compile(bind=engine)
+        )
+        self.assertIn("external_location = 's3://bucket/it''s/'", ddl)
+        self.assertIn("partitioned_by = ARRAY['it''s']", ddl)
+        self.assertIn("bucketed_by = ARRAY['a''b']", ddl)
+
+    @with_engine()
+    def test_statement_cache(self, engine, conn):
+        one_row = Table("one_row", MetaData(bind=engine), autoload=True)
+        results = [
+            conn.execute(
+                sqlalchemy.select([one_row.c.number_of_rows]).where(
+                    one_row.c.number_of_rows == sqlalchemy.bindparam("n")
+                ),
+                n=1,
+            )
+            for _ in range(2)
+        ]
+        self.assertEqual([r.fetchall() for r in results], [[(1,)], [(1,)]])
+        self.assertEqual(
+            [r.context.cache_hit for r in results], [CACHE_MISS, CACHE_HIT]
+        )
+
+    @with_engine()
+    def test_stream_results(self, engine, conn):
+        result = conn.execution_options(
+            stream_results=True, max_row_buffer=100
+        ).execute(sqlalchemy.text("SELECT a FROM many_rows ORDER BY a"))
+        self.assertEqual(result.cursor.arraysize, 100)
+        self.assertEqual(result.fetchmany(10), [(i,) for i in range(10)])
+        self.assertEqual([row[0] for row in result], [i for i in range(10, 10000)])
+
+    @with_engine()
+    def test_read_sql_chunksize(self, engine, conn):
+        chunks = list(
+            pd.read_sql(
+                sqlalchemy.text("SELECT a FROM many_rows ORDER BY a"),
+                conn.execution_options(stream_results=True),
+                chunksize=3000,
+            )
+        )
+        self.assertEqual([len(c) for c in chunks], [3000, 3000, 3000, 1000])
+        self.assertEqual(pd.concat(chunks)["a"].tolist(), [i for i in range(10000)])
+
     @with_engine()
     def test_char_length(self, engine, conn):
         one_row_complex = Table("one_row_complex", MetaData(bind=engine), autoload=True)
@@ -257,6 +470,7 @@ class TestSQLAlchemyAthena(unittest.TestCase):
         self.assertEqual(dialect._get_column_type("date"), "date")
         self.assertEqual(dialect._get_column_type("varbinary"), "varbinary")
         self.assertEqual(dialect._get_column_type("array(integer)"), "array")
+        self.assertEqual(dialect._get_column_type("array<int>"), "array")
         self.assertEqual(dialect._get_column_type("map(integer, integer)"), "map")
         self.assertEqual(dialect._get_column_type("row(a integer, b integer)"), "row")
         self.assertEqual(dialect._get_column_type("decimal(10,1)"), "decimal")
@@ -395,3 +609,67 @@ class TestSQLAlchemyAthena(unittest.TestCase):
                 )
             ],
         )
+
+    @with_engine()
+    def test_to_sql_parquet_method(self, engine, conn):
+        table_name = "to_sql_parquet_{0}".format(str(uuid.uuid4()).replace("-", ""))
+        df = pd.DataFrame(
+            {
+                "col_int": np.int32([1, 2]),
+                "col_bigint": np.int64([12345, 67890]),
+                "col_float": np.float32([1.0, 2.0]),
+                "col_double": np.float64([1.2345, 6.789]),
+                "col_string": ["a", None],
+                "col_boolean": np.bool_([True, False]),
+                "col_timestamp": [datetime(2020, 1, 1, 0, 0, 0)] * 2,
+                "col_date": [date(2020, 12, 31)] * 2,
+            }
+        )
+        df.to_sql(
+            table_name,
+            engine,
+            schema=SCHEMA,
+            index=False,
+            if_exists="replace",
+            chunksize=1,
+            method=to_parquet_method,
+        )
+        df.to_sql(
+            table_name,
+            engine,
+            schema=SCHEMA,
+            index=False,
+            if_exists="append",
+            method=to_parquet_method,
+        )
+
+        table = Table(table_name, MetaData(bind=engine), autoload=True)
+        self.assertEqual(
+            sorted(table.select().execute().fetchall(), key=lambda r: r[0]),
+            [
+                (
+                    1,
+                    12345,
+                    1.0,
+                    1.2345,
+                    "a",
+                    True,
+                    datetime(2020, 1, 1, 0, 0, 0),
+                    date(2020, 12, 31),
+                ),
+            ]
+            * 2
+            + [
+                (
+                    2,
+                    67890,
+                    2.0,
+                    6.789,
+                    None,
+                    False,
+                    datetime(2020, 1, 1, 0, 0, 0),
+                    date(2020, 12, 31),
+                ),
+            ]
+            * 2,
+        )
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import unittest
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind, StatusCode
+
+from pyathenajdbc.error import DatabaseError
+from pyathenajdbc.tracing import OpenTelemetryListener
+from tests import SCHEMA, WithConnect
+
+
+class TestTracing(unittest.TestCase, WithConnect):
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        self.tracer_provider = TracerProvider()
+        self.tracer_provider.add_span_processor(SimpleSpanProcessor(self.exporter))
+
+    def test_span(self):
+        listener = OpenTelemetryListener(self.tracer_provider)
+        with contextlib.closing(self.connect(listeners=[listener])) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT a FROM many_rows")
+                self.assertEqual(len(cursor.fetchall()), 10000)
+                cursor.execute("SELECT * FROM one_row")
+                self.assertRaises(
+                    DatabaseError,
+                    lambda: cursor.execute("SELECT * FROM this_really_does_not_exist"),
+                )
+
+        spans = self.exporter.get_finished_spans()
+        self.assertEqual(len(spans), 3)
+        span = spans[0]
+        self.assertEqual(span.name, "athena.query")
+        self.assertEqual(span.kind, SpanKind.CLIENT)
+        self.assertEqual(span.attributes["db.system"], "athena")
+        self.assertEqual(span.attributes["db.name"], SCHEMA)
+        self.assertEqual(span.attributes["db.statement"], "SELECT a FROM many_rows")
+        self.assertEqual(span.attributes["db.athena.fetch.rows"], 10000)
+        self.assertGreater(span.attributes["db.athena.execute.elapsed"], 0)
+        self.assertEqual([e.name for e in span.events], ["executed", "first_batch"])
+        # The second query was not fetched, its span ended with the next execute.
+        self.assertEqual(spans[1].attributes["db.athena.fetch.rows"], 0)
+        self.assertEqual(spans[2].status.status_code, StatusCode.ERROR)
@@ -1,14 +1,20 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import os
+import tempfile
 import unittest
-from datetime import date
+import uuid
+from datetime import date, datetime
 from decimal import Decimal
 
 import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
+from pyarrow.fs import LocalFileSystem
 
-from pyathenajdbc.util import as_pandas
-from tests import WithConnect
+from pyathenajdbc.error import OperationalError
+from pyathenajdbc.util import as_arrow, as_pandas, to_parquet, to_sql
+from tests import ENV, S3_PREFIX, SCHEMA, WithConnect
 from tests.util import with_cursor
 
 
@@ -80,6 +86,15 @@ class TestUtil(unittest.TestCase, WithConnect):
         ]
         self.assertEqual(rows, expected)
 
+    @with_cursor()
+    def test_as_pandas_columns(self, cursor):
+        cursor.execute("SELECT col_int, col_string, col_boolean FROM one_row_complex")
+        df = as_pandas(cursor, columns=["col_boolean", "col_int"])
+        self.assertEqual(list(df.columns), ["col_boolean", "col_int"])
+        self.assertEqual(
+            [tuple(row) for row in df.to_records(index=False)], [(True, 2147483647)]
+        )
+
     @with_cursor()
     def test_as_pandas_integer_na_values(self, cursor):
         cursor.execute(
@@ -108,3 +123,181 @@ class TestUtil(unittest.TestCase, WithConnect):
         df = as_pandas(cursor)
         rows = [tuple([row["a"], row["b"]]) for _, row in df.iterrows()]
         self.assertEqual(rows, [(True, False), (False, None), (None, None)])
+
+    @with_cursor()
+    def test_as_arrow(self, cursor):
+        cursor.execute(
+            """
+            SELECT
+              col_boolean
+              ,col_int
+              ,col_bigint
+              ,col_double
+              ,col_string
+              ,col_timestamp
+              ,col_date
+              ,col_binary
+              ,col_map
+              ,col_decimal
+            FROM one_row_complex
+            """
+        )
+        table = as_arrow(cursor)
+        self.assertEqual(
+            [str(t) for t in table.schema.types],
+            [
+                "bool",
+                "int32",
+                "int64",
+                "double",
+                "string",
+                "timestamp[us]",
+                "date32[day]",
+                "binary",
+                "string",
+                "decimal128(10, 1)",
+            ],
+        )
+        self.assertEqual(
+            [tuple(r.values()) for r in table.to_pylist()],
+            [
+                (
+                    True,
+                    2147483647,
+                    9223372036854775807,
+                    0.25,
+                    "a string",
+                    datetime(2017, 1, 1, 0, 0, 0),
+                    date(2017, 1, 2),
+                    b"123",
+                    "{1=2, 3=4}",
+                    Decimal("0.1"),
+                )
+            ],
+        )
+
+    def test_to_parquet(self):
+        df = pd.DataFrame(
+            {
+                "col_int": np.int32([1, 2, 3]),
+                "col_string": ["a", "b", None],
+                "col_timestamp": [datetime(2020, 1, 1, 0, 0, 0)] * 3,
+                "col_partition": ["x", "y", "x"],
+            }
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            partitions = to_parquet(
+                df,
+                tmpdir,
+                partitions=["col_partition"],
+                compression="snappy",
+                chunksize=1,
+                filesystem=LocalFileSystem(),
+            )
+            self.assertEqual(sorted(p["col_partition"] for p in partitions), ["x", "y"])
+            self.assertEqual(
+                len(os.listdir(os.path.join(tmpdir, "col_partition=x"))), 2
+            )
+            table = pq.read_table(os.path.join(tmpdir, "col_partition=x"))
+            self.assertEqual(
+                table.column_names, ["col_int", "col_string", "col_timestamp"]
+            )
+            self.assertEqual(sorted(table.column("col_int").to_pylist()), [1, 3])
+            self.assertEqual(
+                table.column("col_timestamp").to_pylist(),
+                [datetime(2020, 1, 1, 0, 0, 0)] * 2,
+            )
+
+    def test_to_parquet_partition_values(self):
+        df = pd.DataFrame(
+            {
+                "col_int": np.int32([1, 2, 3, 4]),
+                "col_timestamp": [
+                    datetime(2020, 1, 1, 12, 30, 0),
+                    None,
+                    datetime(2020, 1, 1, 12, 30, 0),
+                    datetime(2020, 1, 2, 0, 0, 0),
+                ],
+                "col_double": [1.5, np.nan, 1.5, 2.0],
+            }
+        )
+        with tempfile.TemporaryDirectory() as tmpdir:
+            partitions = to_parquet(
+                df,
+                tmpdir,
+                partitions=["col_timestamp", "col_double"],
+                filesystem=LocalFileSystem(),
+            )
+            self.assertEqual(
+                sorted(tuple(p.values()) for p in partitions),
+                [
+                    ("2020-01-01 12:30:00", "1.5"),
+                    ("2020-01-02 00:00:00", "2.0"),
+                    ("__HIVE_DEFAULT_PARTITION__", "__HIVE_DEFAULT_PARTITION__"),
+                ],
+            )
+            # Rows of null partition values are not dropped.
+            table = pq.read_table(
+                os.path.join(
+                    tmpdir,
+                    "col_timestamp=__HIVE_DEFAULT_PARTITION__",
+                    "col_double=__HIVE_DEFAULT_PARTITION__",
+                )
+            )
+            self.assertEqual(table.column("col_int").to_pylist(), [2])
+            table = pq.read_table(
+                os.path.join(
+                    tmpdir, "col_timestamp=2020-01-01 12%3A30%3A00", "col_double=1.5"
+                )
+            )
+            self.assertEqual(sorted(table.column("col_int").to_pylist()), [1, 3])
+
+    @with_cursor()
+    def test_to_sql(self, cursor):
+        table_name = "to_sql_{0}".format(str(uuid.uuid4()).replace("-", ""))
+        location = "{0}{1}/{2}/".format(ENV.s3_staging_dir, S3_PREFIX, table_name)
+        df = pd.DataFrame(
+            {
+                "col_int": np.int32([1, 2]),
+                "col_bigint": np.int64([12345, 67890]),
+                "col_double": np.float64([1.2345, 6.789]),
+                "col_string": ["a", "b"],
+                "col_boolean": np.bool_([True, False]),
+                "col_date": [date(2020, 12, 31)] * 2,
+                "col_partition": ["x", "y"],
+            }
+        )
+        with self.connect(compression="snappy") as conn:
+            to_sql(
+                df,
+                table_name,
+                conn,
+                location=location,
+                schema=SCHEMA,
+                partitions=["col_partition"],
+            )
+            self.assertRaises(
+                OperationalError,
+                lambda: to_sql(df, table_name, conn, location=location, schema=SCHEMA),
+            )
+            to_sql(
+                df,
+                table_name,
+                conn,
+                location=location,
+                schema=SCHEMA,
+                partitions=["col_partition"],
+                if_exists="append",
+            )
+        cursor.execute(
+            "SELECT * FROM {0} ORDER BY col_int, col_partition".format(table_name)
+        )
+        self.assertEqual(
+            cursor.fetchall(),
+            [
+                (1, 12345, 1.2345, "a", True, date(2020, 12, 31), "x"),
+                (1, 12345, 1.2345, "a", True, date(2020, 12, 31), "x"),
+                (2, 67890, 6.789, "b", False, date(2020, 12, 31), "y"),
+                (2, 67890, 6.789, "b", False, date(2020, 12, 31), "y"),
+            ],
+        )
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import time
+import unittest
+
+import jpype
+
+from pyathenajdbc import __athena_driver_version__, prewarm
+from pyathenajdbc.connection import Connection
+from pyathenajdbc.converter import DefaultJDBCTypeConverter, get_jdbc_type_mappings
+
+
+class TestWarmup(unittest.TestCase):
+    def test_find_shared_archive(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            driver_path = os.path.join(tmpdir, "AthenaJDBC42.jar")
+            archive = os.path.join(
+                tmpdir, "AthenaJDBC42-{0}.jsa".format(__athena_driver_version__)
+            )
+            self.assertEqual(Connection._get_shared_archive_path(driver_path), archive)
+            open(driver_path, "wb").close()
+            self.assertIsNone(Connection._find_shared_archive(driver_path, None))
+
+            open(archive, "wb").close()
+            self.assertEqual(
+                Connection._find_shared_archive(driver_path, None), archive
+            )
+            self.assertEqual(
+                Connection._find_shared_archive(driver_path, ["-Xmx1024m"]), archive
+            )
+            self.assertIsNone(
+                Connection._find_shared_archive(driver_path, ["-Xshare:off"])
+            )
+            self.assertIsNone(
+                Connection._find_shared_archive(
+                    driver_path, ["-XX:SharedArchiveFile=/path/to/other.jsa"]
+                )
+            )
+
+            # The archive is stale if the driver was replaced afterwards.
+            now = time.time()
+            os.utime(archive, (now - 60, now - 60))
+            os.utime(driver_path, (now, now))
+            self.assertIsNone(Connection._find_shared_archive(driver_path, None))
+
+    def test_prewarm(self):
+        thread = prewarm(background=True)
+        thread.join()
+        self.assertTrue(jpype.isJVMStarted())
+        self.assertTrue(Connection._driver_loaded)
+        self.assertIsNone(prewarm())
+
+    def test_jdbc_type_mappings_cache(self):
+        prewarm()
+        name_mappings, code_mappings = get_jdbc_type_mappings()
+        self.assertIs(get_jdbc_type_mappings()[0], name_mappings)
+        self.assertEqual(code_mappings[name_mappings["VARCHAR"]], "VARCHAR")
+        converter = DefaultJDBCTypeConverter()
+        self.assertEqual(converter.get_jdbc_type_name(name_mappings["DATE"]), "DATE")
+        self.assertEqual(converter.get_jdbc_type_code("DATE"), name_mappings["DATE"])
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import threading
+import unittest
+
+from pyathenajdbc.watchdog import (
+    CancelMetrics,
+    StatementState,
+    Watchdog,
+    finalize_statement,
+    metrics,
+)
+
+
+class _Statement(object):
+    def __init__(self):
+        self.cancelled = 0
+        self.closed = False
+
+    def cancel(self):
+        self.cancelled += 1
+
+    def isClosed(self):
+        return self.closed
+
+    def close(self):
+        self.closed = True
+
+
+class TestWatchdog(unittest.TestCase):
+    def test_schedule(self):
+        watchdog = Watchdog()
+        called = []
+        done = threading.Event()
+        watchdog.schedule(0.2, lambda: (called.append(2), done.set()))
+        watchdog.schedule(0.1, lambda: called.append(1))
+        handle = watchdog.schedule(0.05, lambda: called.append(0))
+        watchdog.unschedule(handle)
+        self.assertTrue(done.wait(5))
+        self.assertEqual(called, [1, 2])
+
+    def test_statement_state(self):
+        statement = _Statement()
+        state = StatementState(statement)
+        # Nothing to cancel when no query is running.
+        self.assertFalse(state.cancel(CancelMetrics.CLOSE))
+
+        timed_out = metrics.timed_out
+        state.start()
+        self.assertTrue(state.cancel(CancelMetrics.TIMEOUT))
+        self.assertFalse(state.cancel(CancelMetrics.CLOSE))
+        state.finish()
+        self.assertEqual(statement.cancelled, 1)
+        self.assertEqual(state.cancel_reason, CancelMetrics.TIMEOUT)
+        self.assertEqual(metrics.timed_out, timed_out + 1)
+
+        collected = metrics.cancelled_on_collect
+        state.start()
+        self.assertIsNone(state.cancel_reason)
+        finalize_statement(state)
+        self.assertEqual(statement.cancelled, 2)
+        self.assertTrue(statement.closed)
+        self.assertEqual(metrics.cancelled_on_collect, collected + 1)
+
+    def test_metrics(self):
+        cancel_metrics = CancelMetrics()
+        cancel_metrics.increment(CancelMetrics.TIMEOUT)
+        cancel_metrics.increment(CancelMetrics.COLLECT)
+        self.assertEqual(cancel_metrics.timed_out, 1)
+        self.assertEqual(cancel_metrics.cancelled_on_collect, 1)
+        self.assertEqual(cancel_metrics.total, 2)
+        self.assertEqual(cancel_metrics.as_dict()["close"], 0)
+        cancel_metrics.reset()
+        self.assertEqual(cancel_metrics.total, 0)